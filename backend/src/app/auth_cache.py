@@ -0,0 +1,104 @@
+"""Cache-backed authentication: steady-state API auth costs no database queries.
+
+Two cache entries per user::
+
+    auth:token:<key>   -> user id           (written on first use of a token)
+    auth:user:<id>     -> User instance     (shared by token and session auth)
+
+``CachedTokenAuthentication`` replaces DRF's ``TokenAuthentication`` and
+``CachedModelBackend`` replaces ``ModelBackend.get_user`` for session requests. Entries
+expire after ``AUTH_CACHE_TTL`` seconds and are dropped immediately when a token is
+deleted or a user is saved (password change, deactivation) or deleted. Bulk
+``QuerySet.update()`` calls bypass signals; call :func:`invalidate_user` after them.
+
+With several worker processes ``CACHES['default']`` must be shared between them
+(see ``settings_prod``), otherwise invalidation only reaches the worker that did it.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+def _cache():
+    return caches[getattr(settings, 'AUTH_CACHE_ALIAS', 'default')]
+
+
+def _ttl():
+    return getattr(settings, 'AUTH_CACHE_TTL', 300)
+
+
+def _token_key(key):
+    return f'auth:token:{key}'
+
+
+def _user_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def get_cached_user(user_id):
+    """The user with ``user_id`` (active or not), or ``None`` if it does not exist."""
+    cache = _cache()
+    user = cache.get(_user_key(user_id))
+    if user is None:
+        user = get_user_model()._default_manager.filter(pk=user_id).first()
+        if user is not None:
+            cache.set(_user_key(user_id), user, _ttl())
+    return user
+
+
+def token_user_id(key):
+    """The id of the user owning token ``key``, or ``None`` for an unknown token."""
+    cache = _cache()
+    user_id = cache.get(_token_key(key))
+    if user_id is None:
+        # Unknown keys are not cached, so guessing tokens cannot fill the cache.
+        user_id = Token.objects.filter(key=key).values_list('user_id', flat=True).first()
+        if user_id is not None:
+            cache.set(_token_key(key), user_id, _ttl())
+    return user_id
+
+
+def invalidate_user(user_id):
+    _cache().delete(_user_key(user_id))
+
+
+def invalidate_token(key):
+    _cache().delete(_token_key(key))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """``TokenAuthentication`` that resolves ``key -> user`` from the cache."""
+
+    def authenticate_credentials(self, key):
+        user_id = token_user_id(key)
+        user = get_cached_user(user_id) if user_id is not None else None
+        if user is None:
+            raise exceptions.AuthenticationFailed('Invalid token.')
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        return (user, Token(key=key, user=user))
+
+
+class CachedModelBackend(ModelBackend):
+    """``ModelBackend`` whose per-request session user lookup is served from the cache."""
+
+    def get_user(self, user_id):
+        user = get_cached_user(user_id)
+        return user if user is not None and self.user_can_authenticate(user) else None
+
+
+@receiver(post_delete, sender=Token)
+def _token_deleted(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def _user_changed(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
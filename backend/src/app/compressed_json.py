@@ -0,0 +1,139 @@
+"""Opt-in compression for large JSON columns.
+
+``CompressedJSONField`` is a ``JSONField`` whose values are stored compressed once their JSON
+reaches ``COMPRESSED_JSON_MIN_BYTES`` (and ``COMPRESSED_JSON_ENABLED`` is on). The compressed
+bytes go in a small JSON envelope, ``{"__compressed__": "zlib", "data": "<base64>"}``, so the
+column type does not change: plain and compressed rows can be mixed, turning the setting off
+only stops compressing new writes, and ``manage.py compress_json_columns`` rewrites existing rows.
+
+Reading a row only parses the envelope. The payload is decompressed on first attribute access
+(``CompressedJSONDescriptor``); ``values()``/``values_list()`` on a ``CompressedJSONQuerySet``
+return decoded values. Database-side JSON lookups (``inventory__contains=...``) cannot see
+inside compressed rows, so only opt in fields that are not filtered on.
+"""
+import base64
+import json
+import zlib
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models
+from django.db.models.query import FlatValuesListIterable, NamedValuesListIterable, ValuesIterable, ValuesListIterable
+from django.db.models.query_utils import DeferredAttribute
+
+try:
+    import zstandard
+except ImportError:  # optional: only needed for COMPRESSED_JSON_CODEC = 'zstd'
+    zstandard = None
+
+
+ENVELOPE_KEY = '__compressed__'
+
+
+def _codec(name):
+    if name == 'zlib':
+        level = getattr(settings, 'COMPRESSED_JSON_LEVEL', 6)
+        return (lambda raw: zlib.compress(raw, level)), zlib.decompress
+    if name == 'zstd':
+        if zstandard is None:
+            raise ImproperlyConfigured("COMPRESSED_JSON_CODEC = 'zstd' needs the zstandard package")
+        return zstandard.ZstdCompressor().compress, zstandard.ZstdDecompressor().decompress
+    raise ImproperlyConfigured(f'Unknown COMPRESSED_JSON_CODEC {name!r}')
+
+
+class Packed:
+    """A compressed JSON value read from the database and not decoded yet."""
+    __slots__ = ('codec', 'data')
+
+    def __init__(self, codec, data):
+        self.codec = codec
+        self.data = data
+
+    def decode(self):
+        raw = _codec(self.codec)[1](base64.b64decode(self.data))
+        return json.loads(raw)
+
+    def __repr__(self):
+        return f'<Packed {self.codec} {len(self.data)} bytes>'
+
+
+def unpack(value):
+    return value.decode() if isinstance(value, Packed) else value
+
+
+def is_envelope(value):
+    return isinstance(value, dict) and value.keys() == {ENVELOPE_KEY, 'data'}
+
+
+class CompressedJSONDescriptor(DeferredAttribute):
+    """Decode a ``Packed`` value the first time the attribute is read, then keep the result."""
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if isinstance(value, Packed):
+            value = instance.__dict__[self.field.attname] = value.decode()
+        return value
+
+    def __set__(self, instance, value):
+        # A data descriptor, so reads go through __get__ even though the value lives in __dict__.
+        instance.__dict__[self.field.attname] = value
+
+
+class CompressedJSONField(models.JSONField):
+    descriptor_class = CompressedJSONDescriptor
+
+    def from_db_value(self, value, expression, connection):
+        value = super().from_db_value(value, expression, connection)
+        if is_envelope(value):
+            return Packed(value[ENVELOPE_KEY], value['data'])
+        return value
+
+    def get_db_prep_save(self, value, connection):
+        # Only writes are compressed; lookups keep comparing plain JSON.
+        value = unpack(value)
+        if value is not None and not hasattr(value, 'resolve_expression') and getattr(settings, 'COMPRESSED_JSON_ENABLED', False):
+            raw = json.dumps(value, cls=self.encoder).encode()
+            if len(raw) >= getattr(settings, 'COMPRESSED_JSON_MIN_BYTES', 2048):
+                codec = getattr(settings, 'COMPRESSED_JSON_CODEC', 'zlib')
+                packed = base64.b64encode(_codec(codec)[0](raw)).decode('ascii')
+                # Keep the plain value when compression does not pay for the envelope.
+                if len(packed) < len(raw):
+                    value = {ENVELOPE_KEY: codec, 'data': packed}
+        return super().get_db_prep_save(value, connection)
+
+
+def _unpacking(iterable_class):
+    class UnpackingIterable(iterable_class):
+        def __iter__(self):
+            for row in super().__iter__():
+                if isinstance(row, dict):
+                    yield {key: unpack(value) for key, value in row.items()}
+                elif isinstance(row, tuple):
+                    yield type(row)(*map(unpack, row)) if hasattr(row, '_fields') else tuple(map(unpack, row))
+                else:
+                    yield unpack(row)
+
+    UnpackingIterable.__name__ = f'Unpacking{iterable_class.__name__}'
+    return UnpackingIterable
+
+
+_UNPACKING = {
+    cls: _unpacking(cls)
+    for cls in (ValuesIterable, ValuesListIterable, FlatValuesListIterable, NamedValuesListIterable)
+}
+
+
+class CompressedJSONQuerySet(models.QuerySet):
+    """Default manager queryset for models with ``CompressedJSONField``s: values() rows come back decoded."""
+
+    def values(self, *fields, **expressions):
+        clone = super().values(*fields, **expressions)
+        clone._iterable_class = _UNPACKING.get(clone._iterable_class, clone._iterable_class)
+        return clone
+
+    def values_list(self, *fields, flat=False, named=False):
+        clone = super().values_list(*fields, flat=flat, named=named)
+        clone._iterable_class = _UNPACKING.get(clone._iterable_class, clone._iterable_class)
+        return clone
@@ -0,0 +1,20 @@
+"""SQLite backend for campaign shards (see app.sharding).
+
+Shard rows reference characters and sessions that live in the default database, so
+SQLite's foreign key enforcement, and the ``PRAGMA foreign_key_check`` Django runs after
+every schema change, would reject every one of them.
+"""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        conn.execute('PRAGMA foreign_keys = OFF')
+        return conn
+
+    def enable_constraint_checking(self):
+        pass
+
+    def check_constraints(self, table_names=None):
+        pass
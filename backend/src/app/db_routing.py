@@ -0,0 +1,96 @@
+"""Send reads from safe-method requests to read replicas.
+
+``DATABASE_REPLICAS`` lists the replica aliases defined in ``DATABASES`` (empty = off).
+``ReplicaRoutingMiddleware`` marks GET/HEAD/OPTIONS requests as replica-eligible and
+``ReplicaRouter`` then routes their reads to a random replica. Writes, and every read
+made while handling a POST/PUT/PATCH/DELETE, go to ``default``.
+
+Read-your-writes: after a user's unsafe request the user is pinned to ``default`` for
+``REPLICA_PIN_SECONDS``, so the next poll does not read stale data from a lagging
+replica. The pin lives in the shared cache, so it holds across worker processes.
+
+Locally, point ``DB_REPLICA_PATH`` at a copy of ``db.sqlite3`` to try it out.
+"""
+import contextvars
+import random
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+
+_replica_ok = contextvars.ContextVar('replica_ok', default=False)
+
+SAFE_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+
+def _replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', ())
+
+
+def _pin_key(user_id):
+    return f'dbpin:{user_id}'
+
+
+def _request_user_id(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.pk
+    # Token-authenticated API calls are only resolved by DRF inside the view.
+    auth = request.META.get('HTTP_AUTHORIZATION', '')
+    if auth.startswith('Token '):
+        from .auth_cache import token_user_id
+        return token_user_id(auth[6:].strip())
+    return None
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = _replicas()
+        if replicas and _replica_ok.get():
+            return random.choice(replicas)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        pool = {DEFAULT_DB_ALIAS, *_replicas()}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary.
+        return False if db in _replicas() else None
+
+
+class ReplicaRoutingMiddleware:
+    """Place after AuthenticationMiddleware; a no-op while ``DATABASE_REPLICAS`` is empty."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.pin_seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+        self.cache = caches[getattr(settings, 'REPLICA_PIN_CACHE', 'default')]
+
+    def __call__(self, request):
+        if not _replicas():
+            return self.get_response(request)
+
+        user_id = _request_user_id(request)
+        if request.method in SAFE_METHODS:
+            use_replica = user_id is None or not self.cache.get(_pin_key(user_id))
+            token = _replica_ok.set(use_replica)
+            try:
+                return self.get_response(request)
+            finally:
+                _replica_ok.reset(token)
+
+        token = _replica_ok.set(False)
+        try:
+            return self.get_response(request)
+        finally:
+            _replica_ok.reset(token)
+            if user_id is not None:
+                self.cache.set(_pin_key(user_id), True, self.pin_seconds)
@@ -0,0 +1,213 @@
+"""JSON Patch (RFC 6902) for JSON columns, applied by the database where it can be.
+
+``apply_patch`` is the reference implementation: it applies all six operations to a Python
+document and raises ``JSONPatchError`` for anything the RFC says must fail.
+
+``sql_operation`` turns a single add/remove/replace into a ``(new value, guards)`` pair for
+``QuerySet.update()``: SQLite ``json_set``/``json_insert``/``json_replace``/``json_remove``
+or Postgres ``jsonb_set``/``jsonb_insert``/``#-``. The guards are lookups the row must match
+for the operation to mean what the RFC says (the parent is an array/object, the target
+exists, the value is not a compressed envelope), so an UPDATE that matches no row means
+"do it in Python instead", never a wrong write. Operations the database cannot express
+exactly (``move``, ``copy``, ``test``, inserting into the middle of a SQLite array) return None.
+"""
+import copy
+import json
+
+from django.db import models
+from django.db.models import F, Func, Value
+from django.db.models.lookups import Exact, GreaterThanOrEqual, IsNull
+
+from .compressed_json import ENVELOPE_KEY
+
+
+OPERATIONS = ('add', 'remove', 'replace', 'move', 'copy', 'test')
+
+
+class JSONPatchError(ValueError):
+    pass
+
+
+def parse_pointer(pointer):
+    """RFC 6901 pointer to a list of reference tokens."""
+    if not isinstance(pointer, str) or (pointer and not pointer.startswith('/')):
+        raise JSONPatchError(f'Invalid JSON pointer {pointer!r}')
+    if not pointer:
+        return []
+    return [token.replace('~1', '/').replace('~0', '~') for token in pointer[1:].split('/')]
+
+
+def _is_index(token):
+    return token == '-' or (token.isdigit() and (token == '0' or not token.startswith('0')))
+
+
+def _container(document, tokens):
+    for token in tokens:
+        if isinstance(document, dict) and token in document:
+            document = document[token]
+        elif isinstance(document, list) and token.isdigit() and int(token) < len(document):
+            document = document[int(token)]
+        else:
+            raise JSONPatchError(f'Path /{"/".join(tokens)} does not exist')
+    return document
+
+
+def _index(container, token, inserting=False):
+    if token == '-' and inserting:
+        return len(container)
+    if token == '-' or not _is_index(token) or int(token) > len(container) - (0 if inserting else 1):
+        raise JSONPatchError(f'Invalid array index {token!r}')
+    return int(token)
+
+
+def _remove(document, tokens):
+    parent = _container(document, tokens[:-1])
+    if isinstance(parent, list):
+        return parent.pop(_index(parent, tokens[-1]))
+    if isinstance(parent, dict) and tokens[-1] in parent:
+        return parent.pop(tokens[-1])
+    raise JSONPatchError(f'Path /{"/".join(tokens)} does not exist')
+
+
+def _add(document, tokens, value):
+    if not tokens:
+        return value
+    parent = _container(document, tokens[:-1])
+    if isinstance(parent, list):
+        parent.insert(_index(parent, tokens[-1], inserting=True), value)
+    elif isinstance(parent, dict):
+        parent[tokens[-1]] = value
+    else:
+        raise JSONPatchError(f'Cannot add to /{"/".join(tokens[:-1])}')
+    return document
+
+
+def apply_patch(document, operations):
+    """Apply ``operations`` to a copy of ``document`` and return it. All or nothing."""
+    if not isinstance(operations, list):
+        raise JSONPatchError('A JSON patch is a list of operations')
+    document = copy.deepcopy(document)
+    for operation in operations:
+        op, tokens, value = _unpack(operation)
+        if op == 'add':
+            document = _add(document, tokens, value)
+        elif op == 'remove':
+            if not tokens:
+                raise JSONPatchError('Cannot remove the whole document')
+            _remove(document, tokens)
+        elif op == 'replace':
+            _container(document, tokens)
+            if not tokens:
+                document = value
+            else:
+                _remove(document, tokens)
+                document = _add(document, tokens, value)
+        elif op in ('move', 'copy'):
+            source = parse_pointer(operation.get('from'))
+            if op == 'move' and tokens[:len(source)] == source and tokens != source:
+                raise JSONPatchError('Cannot move a value into one of its children')
+            moved = _remove(document, source) if op == 'move' else copy.deepcopy(_container(document, source))
+            document = _add(document, tokens, moved)
+        elif _container(document, tokens) != value:  # test
+            raise JSONPatchError(f'Test failed at {operation["path"]}')
+    return document
+
+
+def _unpack(operation):
+    if not isinstance(operation, dict) or operation.get('op') not in OPERATIONS:
+        raise JSONPatchError(f'Invalid operation {operation!r}')
+    if operation['op'] in ('add', 'replace', 'test') and 'value' not in operation:
+        raise JSONPatchError(f'{operation["op"]} needs a value')
+    return operation['op'], parse_pointer(operation.get('path')), operation.get('value')
+
+
+def _pg_extract(column, path):
+    return Func(F(column), Value(path), template='(%(expressions)s)', arg_joiner=' #> ',
+                output_field=models.JSONField())
+
+
+def _json_type(vendor, column, path):
+    if vendor == 'sqlite':
+        return Func(F(column), Value(path), function='json_type', output_field=models.CharField())
+    return Func(_pg_extract(column, path), function='jsonb_typeof', output_field=models.CharField())
+
+
+def _sqlite_path(tokens):
+    path = '$'
+    for token in tokens:
+        if token == '-':
+            path += '[#]'
+        elif _is_index(token):
+            path += f'[{token}]'
+        elif '"' in token:
+            return None
+        else:
+            path += f'."{token}"'
+    return path
+
+
+def _postgres_path(tokens):
+    return '{' + ','.join(json.dumps(token) for token in tokens) + '}'
+
+
+def sql_operation(vendor, column, operation, sqlite_version=(0,)):
+    """``(expression, [guard lookups])`` applying one operation to ``column``, or None."""
+    op, tokens, value = _unpack(operation)
+    if op not in ('add', 'remove', 'replace') or not tokens or vendor not in ('sqlite', 'postgresql'):
+        return None
+    if (tokens[-1] == '-' and op != 'add') or '-' in tokens[:-1]:
+        return None
+    to_path = _sqlite_path if vendor == 'sqlite' else _postgres_path
+    prefixes = [to_path(tokens[:i]) for i in range(len(tokens) + 1)]
+    if None in prefixes:
+        return None
+
+    # Every container on the way must be the type its child token implies, and a compressed
+    # envelope (an object whose keys are not the document's) is never patched in place.
+    guards = [
+        Exact(_json_type(vendor, column, prefixes[i]), Value('array' if _is_index(token) else 'object'))
+        for i, token in enumerate(tokens)
+    ]
+    guards.append(IsNull(_json_type(vendor, column, to_path([ENVELOPE_KEY])), True))
+    target, parent, last = prefixes[-1], prefixes[-2], tokens[-1]
+    if op in ('remove', 'replace'):
+        guards.append(IsNull(_json_type(vendor, column, target), False))
+
+    json_field = models.JSONField()
+    if vendor == 'sqlite':
+        new_value = Func(Value(json.dumps(value)), function='json', output_field=json_field)
+        if op == 'remove':
+            return Func(F(column), Value(target), function='json_remove', output_field=json_field), guards
+        if op == 'replace':
+            return Func(F(column), Value(target), new_value, function='json_replace', output_field=json_field), guards
+        if last == '-':
+            if sqlite_version < (3, 31):  # the [#] append path
+                return None
+            return Func(F(column), Value(target), new_value, function='json_insert', output_field=json_field), guards
+        if _is_index(last):
+            return None  # SQLite cannot insert into the middle of an array
+        return Func(F(column), Value(target), new_value, function='json_set', output_field=json_field), guards
+
+    new_value = Func(Value(json.dumps(value)), template='%(expressions)s::jsonb', output_field=json_field)
+    if op == 'remove':
+        expression = Func(F(column), Value(target), template='(%(expressions)s)', arg_joiner=' #- ',
+                          output_field=json_field)
+    elif op == 'replace':
+        expression = Func(F(column), Value(target), new_value, Value(False), function='jsonb_set',
+                          output_field=json_field)
+    elif last == '-':
+        appended = Func(_pg_extract(column, parent),
+                        Func(new_value, function='jsonb_build_array', output_field=json_field),
+                        template='(%(expressions)s)', arg_joiner=' || ', output_field=json_field)
+        expression = appended if len(tokens) == 1 else Func(
+            F(column), Value(parent), appended, function='jsonb_set', output_field=json_field
+        )
+    elif _is_index(last):
+        length = Func(_pg_extract(column, parent), function='jsonb_array_length',
+                      output_field=models.IntegerField())
+        guards.append(GreaterThanOrEqual(length, Value(int(last))))
+        expression = Func(F(column), Value(target), new_value, function='jsonb_insert', output_field=json_field)
+    else:
+        expression = Func(F(column), Value(target), new_value, Value(True), function='jsonb_set',
+                          output_field=json_field)
+    return expression, guards
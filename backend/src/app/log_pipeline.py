@@ -0,0 +1,149 @@
+"""Non-blocking logging: request threads enqueue records, one listener thread does the I/O.
+
+Configured from ``LOGGING`` in settings, with ``LOGGING_CONFIG = 'app.log_pipeline.configure'``::
+
+    'async': {
+        '()': 'app.log_pipeline.AsyncQueueHandler',
+        'handlers': ['console', 'file'],   # names of ordinary handlers defined alongside
+        'filters': ['sampling'],
+    }
+
+:func:`configure` runs ``dictConfig`` and then hands each queue handler the target handlers
+it built under those names. Targets are only ever called from the listener thread.
+"""
+import copy
+import json
+import logging
+import logging.config
+import logging.handlers
+import queue
+import random
+import threading
+from datetime import datetime, timezone
+
+
+_RESERVED_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'trace_id'}
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line; ``extra={...}`` fields are included as top-level keys."""
+
+    def format(self, record):
+        data = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'line': record.lineno,
+            'thread': record.threadName,
+        }
+        trace_id = getattr(record, 'trace_id', None)
+        if trace_id:
+            data['trace_id'] = trace_id
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exc'] = record.exc_text
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and not key.startswith('_'):
+                data[key] = value
+        return json.dumps(data, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of records from noisy loggers, e.g. ``{'django.db.backends': 0.01}``.
+
+    The longest matching logger-name prefix wins; WARNING and above are never dropped.
+    """
+
+    def __init__(self, rates=None):
+        super().__init__()
+        self.rates = sorted((rates or {}).items(), key=lambda item: len(item[0]), reverse=True)
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        for prefix, rate in self.rates:
+            if record.name == prefix or record.name.startswith(prefix + '.'):
+                return rate >= 1 or random.random() < rate
+        return True
+
+
+class _DrainingQueueListener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        # Wait for room instead of failing when stop() is called with a full queue.
+        self.queue.put(self._sentinel)
+
+
+class AsyncQueueHandler(logging.handlers.QueueHandler):
+    """Bounded, drop-on-full queue in front of a :class:`~logging.handlers.QueueListener`."""
+
+    def __init__(self, handlers, queue_size=10000):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.targets = list(handlers)  # handlers, or names for configure() to resolve
+        self.listener = None
+        self.dropped = 0
+        self._start_lock = threading.Lock()
+
+    def _start_listener(self):
+        with self._start_lock:
+            if self.listener is not None:
+                return
+            unresolved = [target for target in self.targets if not isinstance(target, logging.Handler)]
+            if unresolved:
+                raise ValueError(f'Target handlers {unresolved} were not resolved; use app.log_pipeline.configure')
+            self.listener = _DrainingQueueListener(self.queue, *self.targets, respect_handler_level=True)
+            self.listener.start()
+
+    def prepare(self, record):
+        # Resolve everything that depends on the calling thread before handing the record off.
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        from .tracing import _current_trace
+        trace = _current_trace.get()
+        record.trace_id = trace.trace_id if trace is not None else None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def emit(self, record):
+        if self.listener is None:
+            try:
+                self._start_listener()
+            except Exception:
+                self.handleError(record)
+                return
+        super().emit(record)
+
+    def drain(self):
+        """Stop the listener once everything queued so far is handled; the next record restarts it."""
+        with self._start_lock:
+            if self.listener is not None:
+                self.listener.stop()
+                self.listener = None
+
+    def close(self):
+        # logging.shutdown() closes handlers at exit, so queued records are not lost.
+        self.drain()
+        super().close()
+
+
+def configure(config):
+    """``LOGGING_CONFIG`` callable: ``dictConfig``, then resolve each AsyncQueueHandler's target names."""
+    configurator = logging.config.dictConfigClass(config)
+    configurator.configure()
+    # dictConfig replaces each handler's entry with the handler it built from it.
+    built = configurator.config.get('handlers', {})
+    for handler in built.values():
+        if isinstance(handler, AsyncQueueHandler):
+            handler.targets = [built[target] if isinstance(target, str) else target for target in handler.targets]
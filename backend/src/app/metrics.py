@@ -0,0 +1,217 @@
+"""Request latency / DB time / payload histograms exported in Prometheus text format.
+
+Each process aggregates in memory. When ``METRICS_MULTIPROC_DIR`` is set (one shared
+directory for all gunicorn workers, emptied on deploy), every process periodically
+writes its totals to ``metrics_<pid>.json`` in that directory and the exporter sums
+all files, so whichever worker serves ``/metrics/`` reports fleet-wide numbers.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+HISTOGRAMS = {
+    'jojo_request_duration_seconds': ('Request latency by view action, status and role.', LATENCY_BUCKETS),
+    'jojo_request_db_duration_seconds': ('Time spent in database queries per request.', LATENCY_BUCKETS),
+    'jojo_response_size_bytes': ('Response payload size per request.', SIZE_BUCKETS),
+}
+LABEL_NAMES = ('view', 'method', 'status', 'role')
+
+
+class MetricsRegistry:
+    """Per-process histogram storage keyed by (metric name, label values)."""
+
+    def __init__(self, multiproc_dir=None, flush_interval=1.0):
+        self.multiproc_dir = multiproc_dir
+        self.flush_interval = flush_interval
+        self._series = {}
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+
+    def observe(self, name, labels, value):
+        buckets = HISTOGRAMS[name][1]
+        key = (name, tuple(labels))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(buckets), 0.0, 0]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def _dump(self):
+        with self._lock:
+            return [[name, list(labels), s[0][:], s[1], s[2]] for (name, labels), s in self._series.items()]
+
+    def flush(self, force=False):
+        """Write this process' totals to the shared directory (throttled unless ``force``)."""
+        if not self.multiproc_dir:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.flush_interval:
+            return
+        self._last_flush = now
+        os.makedirs(self.multiproc_dir, exist_ok=True)
+        path = os.path.join(self.multiproc_dir, f'metrics_{os.getpid()}.json')
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as fh:
+            json.dump(self._dump(), fh)
+        os.replace(tmp_path, path)
+
+    def collect(self):
+        """Merge series from every process (or just this one) into {(name, labels): [buckets, sum, count]}."""
+        if not self.multiproc_dir:
+            dumps = [self._dump()]
+        else:
+            self.flush(force=True)
+            dumps = []
+            for filename in os.listdir(self.multiproc_dir):
+                if not (filename.startswith('metrics_') and filename.endswith('.json')):
+                    continue
+                try:
+                    with open(os.path.join(self.multiproc_dir, filename)) as fh:
+                        dumps.append(json.load(fh))
+                except (OSError, ValueError):
+                    continue
+        merged = {}
+        for dump in dumps:
+            for name, labels, buckets, total, count in dump:
+                if name not in HISTOGRAMS:
+                    continue
+                key = (name, tuple(labels))
+                series = merged.setdefault(key, [[0] * len(buckets), 0.0, 0])
+                series[0] = [a + b for a, b in zip(series[0], buckets)]
+                series[1] += total
+                series[2] += count
+        return merged
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        merged = self.collect()
+        lines = []
+        for name, (help_text, bounds) in HISTOGRAMS.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} histogram')
+            for (series_name, labels), (buckets, total, count) in sorted(merged.items()):
+                if series_name != name:
+                    continue
+                label_str = ','.join(f'{k}="{_escape(v)}"' for k, v in zip(LABEL_NAMES, labels))
+                for bound, bucket_count in zip(bounds, buckets):
+                    lines.append(f'{name}_bucket{{{label_str},le="{bound}"}} {bucket_count}')
+                lines.append(f'{name}_bucket{{{label_str},le="+Inf"}} {count}')
+                lines.append(f'{name}_sum{{{label_str}}} {total}')
+                lines.append(f'{name}_count{{{label_str}}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = MetricsRegistry(
+    multiproc_dir=getattr(settings, 'METRICS_MULTIPROC_DIR', None),
+    flush_interval=getattr(settings, 'METRICS_FLUSH_INTERVAL', 1.0),
+)
+atexit.register(registry.flush, force=True)
+
+
+def view_label(view_func, method):
+    """``CharacterViewSet.roll_action`` for viewsets, the class or function name otherwise."""
+    cls = getattr(view_func, 'cls', None)
+    if cls is None:
+        return getattr(view_func, '__name__', 'unknown')
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(method.lower())
+    if action:
+        return f'{cls.__name__}.{action}'
+    if cls.__name__ == 'WrappedAPIView':
+        return getattr(view_func, '__name__', cls.__name__)
+    return f'{cls.__name__}.{method.lower()}'
+
+
+_role_cache = {}
+ROLE_CACHE_TTL = 300
+
+
+def user_role(user):
+    """'staff', 'gm' (leads at least one campaign), 'player' or 'anonymous'; cached per process."""
+    if user is None or not user.is_authenticated:
+        return 'anonymous'
+    if user.is_staff:
+        return 'staff'
+    now = time.monotonic()
+    cached = _role_cache.get(user.pk)
+    if cached and cached[1] > now:
+        return cached[0]
+    from characters.models import Campaign
+    role = 'gm' if Campaign.objects.filter(gm_id=user.pk).exists() else 'player'
+    if len(_role_cache) > 10000:
+        _role_cache.clear()
+    _role_cache[user.pk] = (role, now + ROLE_CACHE_TTL)
+    return role
+
+
+class _DBTimer:
+    def __init__(self):
+        self.elapsed = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.elapsed += time.perf_counter() - start
+
+
+class MetricsMiddleware:
+    """Records latency, DB time and response size for every routed request."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'METRICS_ENABLED', True)
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+        db_timer = _DBTimer()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(db_timer))
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        view = getattr(request, '_metrics_view', None)
+        if view is None:
+            return response
+        if getattr(response, 'streaming', False):
+            size = 0
+        else:
+            size = len(response.content)
+        labels = (view, request.method, str(response.status_code), user_role(getattr(request, 'user', None)))
+        registry.observe('jojo_request_duration_seconds', labels, duration)
+        registry.observe('jojo_request_db_duration_seconds', labels, db_timer.elapsed)
+        registry.observe('jojo_response_size_bytes', labels, size)
+        registry.flush()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if getattr(view_func, 'metrics_exempt', False):
+            return None
+        request._metrics_view = view_label(view_func, request.method)
+        return None
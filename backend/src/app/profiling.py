@@ -0,0 +1,292 @@
+"""On-demand request profiling.
+
+Staff arm a trigger (user, path prefix and/or campaign id) through
+``/api/_debug/profiles/arm/``; the next matching requests are captured with cProfile
+(``.prof``, readable with ``pstats``/snakeviz) or a statistical stack sampler
+(``.collapsed``, flamegraph.pl / speedscope input). Independently, when
+``PROFILING_SLOW_THRESHOLD_MS`` is set, a ``PROFILING_SAMPLE_RATE`` fraction of all
+requests run under the sampler and are kept if they end up slower than the threshold.
+
+Triggers live in ``armed.json`` inside ``PROFILES_DIR`` so every gunicorn worker sees them.
+"""
+import cProfile
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows development machines
+    fcntl = None
+
+
+PROFILE_EXTENSIONS = ('.prof', '.collapsed')
+_SAFE_NAME = re.compile(r'^[\w.-]+$')
+
+
+class StackSampler:
+    """Samples one thread's Python stack every ``interval`` seconds from a helper thread."""
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f'{frame.f_globals.get("__name__", "?")}:{code.co_name}:{frame.f_lineno}')
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(names))] += 1
+
+    def collapsed(self):
+        """Brendan Gregg's folded format: ``root;child;leaf count`` per line."""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+class ProfileStore:
+    """Profiles and armed triggers on disk under one directory."""
+
+    def __init__(self, directory, max_files=200):
+        self.directory = str(directory)
+        self.max_files = max_files
+        self._triggers = []
+        self._triggers_mtime = None
+
+    @property
+    def triggers_path(self):
+        return os.path.join(self.directory, 'armed.json')
+
+    @contextmanager
+    def _locked(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, '.lock'), 'w') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_triggers(self):
+        try:
+            with open(self.triggers_path) as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return []
+
+    def _write_triggers(self, triggers):
+        tmp_path = f'{self.triggers_path}.tmp'
+        with open(tmp_path, 'w') as fh:
+            json.dump(triggers, fh)
+        os.replace(tmp_path, self.triggers_path)
+
+    def triggers(self):
+        """Active triggers; re-read from disk only when the file changed (one stat per request)."""
+        try:
+            mtime = os.stat(self.triggers_path).st_mtime_ns
+        except OSError:
+            self._triggers, self._triggers_mtime = [], None
+            return []
+        if mtime != self._triggers_mtime:
+            self._triggers, self._triggers_mtime = self._read_triggers(), mtime
+        now = time.time()
+        return [t for t in self._triggers if t['remaining'] > 0 and t['expires'] > now]
+
+    def arm(self, user_id=None, path=None, campaign_id=None, count=1, ttl=3600, mode='cprofile'):
+        trigger = {
+            'id': uuid.uuid4().hex[:12],
+            'user_id': user_id,
+            'path': path,
+            'campaign_id': None if campaign_id is None else str(campaign_id),
+            'remaining': count,
+            'expires': time.time() + ttl,
+            'mode': mode,
+        }
+        with self._locked():
+            triggers = [t for t in self._read_triggers() if t['remaining'] > 0 and t['expires'] > time.time()]
+            triggers.append(trigger)
+            self._write_triggers(triggers)
+        return trigger
+
+    def disarm(self):
+        with self._locked():
+            self._write_triggers([])
+
+    def consume(self, trigger_id):
+        """Atomically take one capture from a trigger; False if another worker used it up."""
+        with self._locked():
+            triggers = self._read_triggers()
+            for trigger in triggers:
+                if trigger['id'] == trigger_id and trigger['remaining'] > 0:
+                    trigger['remaining'] -= 1
+                    self._write_triggers([t for t in triggers if t['remaining'] > 0])
+                    return True
+        return False
+
+    def save(self, extension, meta, write):
+        """Store one profile (``write(path)`` produces the file) plus its metadata sidecar."""
+        os.makedirs(self.directory, exist_ok=True)
+        slug = re.sub(r'[^\w]+', '-', meta['path']).strip('-')[:60] or 'root'
+        name = f'{time.strftime("%Y%m%dT%H%M%S")}-{uuid.uuid4().hex[:6]}-{meta["method"]}-{slug}{extension}'
+        path = os.path.join(self.directory, name)
+        write(path)
+        with open(f'{path}.json', 'w') as fh:
+            json.dump(dict(meta, name=name, size=os.path.getsize(path)), fh)
+        self._prune()
+        return name
+
+    def list(self):
+        entries = []
+        for filename in os.listdir(self.directory) if os.path.isdir(self.directory) else []:
+            if not filename.endswith(tuple(f'{ext}.json' for ext in PROFILE_EXTENSIONS)):
+                continue
+            try:
+                with open(os.path.join(self.directory, filename)) as fh:
+                    entries.append(json.load(fh))
+            except (OSError, ValueError):
+                continue
+        return sorted(entries, key=lambda e: e['captured_at'], reverse=True)
+
+    def path_for(self, name):
+        if not _SAFE_NAME.match(name) or not name.endswith(PROFILE_EXTENSIONS):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+
+    def _prune(self):
+        profiles = sorted(
+            (f for f in os.listdir(self.directory) if f.endswith(PROFILE_EXTENSIONS)),
+            key=lambda f: os.path.getmtime(os.path.join(self.directory, f)),
+        )
+        for filename in profiles[:max(0, len(profiles) - self.max_files)]:
+            for path in (filename, f'{filename}.json'):
+                try:
+                    os.remove(os.path.join(self.directory, path))
+                except OSError:
+                    pass
+
+
+store = ProfileStore(
+    getattr(settings, 'PROFILES_DIR', os.path.join(settings.BASE_DIR, 'profiles')),
+    max_files=getattr(settings, 'PROFILING_MAX_FILES', 200),
+)
+
+
+def _request_user_id(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.pk
+    # Token-authenticated API calls are only resolved by DRF inside the view.
+    auth = request.META.get('HTTP_AUTHORIZATION', '')
+    if auth.startswith('Token '):
+        from .auth_cache import token_user_id
+        return token_user_id(auth[6:].strip())
+    return None
+
+
+def _request_campaign_id(request, view_func, view_kwargs):
+    campaign_id = request.GET.get('campaign') or request.GET.get('campaign_id')
+    if campaign_id:
+        return str(campaign_id)
+    cls = getattr(view_func, 'cls', None)
+    if cls is not None and cls.__name__ == 'CampaignViewSet' and 'pk' in view_kwargs:
+        return str(view_kwargs['pk'])
+    return None
+
+
+class ProfilingMiddleware:
+    """Runs matching views under a profiler. Keep it last in MIDDLEWARE: it calls the view itself."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.threshold_ms = getattr(settings, 'PROFILING_SLOW_THRESHOLD_MS', None)
+        self.sample_rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0.05)
+        self.sample_interval = getattr(settings, 'PROFILING_SAMPLE_INTERVAL', 0.005)
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def _match(self, request, view_func, view_kwargs):
+        for trigger in store.triggers():
+            if trigger['path'] and not request.path.startswith(trigger['path']):
+                continue
+            if trigger['campaign_id'] is not None and _request_campaign_id(request, view_func, view_kwargs) != trigger['campaign_id']:
+                continue
+            if trigger['user_id'] is not None and _request_user_id(request) != trigger['user_id']:
+                continue
+            if store.consume(trigger['id']):
+                return trigger
+        return None
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if getattr(view_func, 'profiling_exempt', False):
+            return None
+        trigger = self._match(request, view_func, view_kwargs)
+        if trigger is None and not (self.threshold_ms is not None and random.random() < self.sample_rate):
+            return None
+        mode = trigger['mode'] if trigger else 'sample'
+
+        def run_view():
+            response = view_func(request, *view_args, **view_kwargs)
+            # Include DRF's JSON rendering in the profile; Django skips the second render().
+            if hasattr(response, 'render') and callable(response.render):
+                response.render()
+            return response
+
+        start = time.perf_counter()
+        if mode == 'cprofile':
+            profiler = cProfile.Profile()
+            response = profiler.runcall(run_view)
+        else:
+            sampler = StackSampler(threading.get_ident(), self.sample_interval)
+            sampler.start()
+            try:
+                response = run_view()
+            finally:
+                sampler.stop()
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        if trigger is None and duration_ms < self.threshold_ms:
+            return response
+        meta = {
+            'path': request.path,
+            'method': request.method,
+            'status': response.status_code,
+            'duration_ms': round(duration_ms, 2),
+            'captured_at': time.time(),
+            'trigger': trigger['id'] if trigger else 'slow_request',
+            'user_id': _request_user_id(request),
+        }
+        if mode == 'cprofile':
+            store.save('.prof', meta, profiler.dump_stats)
+        else:
+            def write_collapsed(path):
+                with open(path, 'w') as fh:
+                    fh.write(sampler.collapsed())
+            store.save('.collapsed', meta, write_collapsed)
+        return response
@@ -36,13 +36,18 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # must be at top
+    'app.tracing.TracingMiddleware',
+    'app.metrics.MetricsMiddleware',
+    'app.sql_stats.SQLStatsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'app.db_routing.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'app.profiling.ProfilingMiddleware',  # must be last: runs the view itself when profiling
 ]
 
 ROOT_URLCONF = 'app.urls'
@@ -69,9 +74,60 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Keep connections open between requests (pragmas then run once per connection).
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Take the write lock at BEGIN so two writers queue on busy_timeout instead
+            # of deadlocking when both try to upgrade a read transaction.
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
+# Read replicas (app.db_routing): safe-method requests read from a replica; a user is pinned
+# to the primary for REPLICA_PIN_SECONDS after a write. Set DB_REPLICA_PATH to a copy of the
+# database file to try it locally.
+DATABASE_ROUTERS = ['app.sharding.CampaignShardRouter', 'app.db_routing.ReplicaRouter']
+DATABASE_REPLICAS = []
+REPLICA_PIN_SECONDS = 5
+if os.environ.get('DB_REPLICA_PATH'):
+    DATABASES['replica'] = dict(DATABASES['default'], NAME=os.environ['DB_REPLICA_PATH'], TEST={'MIRROR': 'default'})
+    DATABASE_REPLICAS = ['replica']
+
+# Database-per-campaign sharding of rolls, chat and session events (app.sharding); run
+# `manage.py split_campaign_shards` when turning it on for an existing database.
+CAMPAIGN_SHARDING = os.environ.get('CAMPAIGN_SHARDING', '') == '1'
+CAMPAIGN_SHARD_DIR = os.path.join(BASE_DIR, 'shards')
+
+# SQLite connection pragmas come from app.sqlite_tuning.DEFAULT_PRAGMAS; set SQLITE_PRAGMAS to
+# replace them, or override per database via DATABASES[...]['PRAGMAS'].
+
+# Route roll/chat/stress writes through one writer thread per process (app.write_queue),
+# batching concurrent writes into one commit; a file lock orders writers across processes.
+SQLITE_WRITE_QUEUE = os.environ.get('SQLITE_WRITE_QUEUE', '') == '1'
+SQLITE_WRITE_QUEUE_BATCH = 50
+SQLITE_WRITE_LOCK_PATH = None  # default: '<database file>.writelock'
+
+# Character history (characters.services.history_service): a full snapshot every
+# SNAPSHOT_EVERY saves, compressed deltas in between. `manage.py compact_character_history`
+# merges deltas older than COMPACT_AFTER_DAYS into one per day and folds everything older
+# than RETENTION_DAYS into a single snapshot.
+CHARACTER_HISTORY_SNAPSHOT_EVERY = 20
+CHARACTER_HISTORY_COMPACT_AFTER_DAYS = 30
+CHARACTER_HISTORY_RETENTION_DAYS = 365
+
+# `manage.py archive_sessions` packs the rolls, events, chat, XP and stress rows of sessions
+# completed for this many days into one compressed SessionArchive row each.
+SESSION_ARCHIVE_AFTER_DAYS = 14
+
+# Compress large Character/NPC JSON columns (app.compressed_json). Existing rows are rewritten
+# by `manage.py compress_json_columns`; 'zstd' needs the zstandard package.
+COMPRESSED_JSON_ENABLED = os.environ.get('COMPRESSED_JSON', '') == '1'
+COMPRESSED_JSON_MIN_BYTES = 2048
+COMPRESSED_JSON_CODEC = 'zlib'
+COMPRESSED_JSON_LEVEL = 6
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -95,35 +151,99 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Cache (per process here; settings_prod points this at a cache shared by all workers)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+
+# Authentication: token -> user and session user lookups are served from the cache
+# (app.auth_cache); sessions are read from the cache and written through to the DB.
+AUTHENTICATION_BACKENDS = ['app.auth_cache.CachedModelBackend']
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+AUTH_CACHE_ALIAS = 'default'
+AUTH_CACHE_TTL = 300
+
 # Django REST Framework config
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.TokenAuthentication',
+        'app.auth_cache.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
 }
 
-# Logging for development
+# SQL fingerprint statistics (served at /api/_debug/sql-stats/ for staff)
+SQL_STATS_ENABLED = True
+SQL_STATS_MAX_FINGERPRINTS = 500
+SQL_STATS_SAMPLE_SIZE = 256
+
+# Prometheus metrics served at /metrics/. Set METRICS_MULTIPROC_DIR to a directory shared
+# by all gunicorn workers (and emptied on deploy) to aggregate across processes.
+METRICS_ENABLED = True
+METRICS_MULTIPROC_DIR = os.environ.get('METRICS_MULTIPROC_DIR')
+METRICS_FLUSH_INTERVAL = 1.0
+# /metrics/ is served to staff sessions, to "Authorization: Bearer $METRICS_TOKEN" and to the
+# addresses in METRICS_ALLOWED_IPS (none by default: behind a reverse proxy on the same host
+# every request comes from 127.0.0.1). List that proxy in METRICS_TRUSTED_PROXIES and the
+# client address is read from X-Forwarded-For instead.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+METRICS_ALLOWED_IPS = []
+METRICS_TRUSTED_PROXIES = []
+
+# On-demand profiling (arm via /api/_debug/profiles/arm/). Set a threshold to also keep
+# stack samples of a PROFILING_SAMPLE_RATE fraction of requests that turn out slow.
+PROFILES_DIR = BASE_DIR / 'profiles'
+PROFILING_MAX_FILES = 200
+PROFILING_SLOW_THRESHOLD_MS = None
+PROFILING_SAMPLE_RATE = 0.05
+
+# Request tracing (recent traces at /api/_debug/traces/; JSONL export when a path is set).
+# Development traces every request; settings_prod samples from TRACING_SAMPLE_RATE.
+TRACING_ENABLED = True
+TRACING_SAMPLE_RATE = 1.0
+TRACING_BUFFER_SIZE = 200
+TRACING_MAX_SPANS = 2000
+TRACING_JSONL_PATH = os.environ.get('TRACING_JSONL_PATH')
+
+# Logging for development. Request threads only enqueue records; a listener thread writes
+# them (JSON lines with size-based rotation in debug.log). SQL debug output is sampled.
+LOGGING_CONFIG = 'app.log_pipeline.configure'
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
     'formatters': {
         'verbose': {'format': '[{levelname}] {asctime} {name} - {message}', 'style': '{'},
         'simple': {'format': '[{levelname}] {message}', 'style': '{'},
+        'json': {'()': 'app.log_pipeline.JSONFormatter'},
+    },
+    'filters': {
+        'sampling': {
+            '()': 'app.log_pipeline.SamplingFilter',
+            'rates': {'django.db.backends': 0.01},
+        },
     },
     'handlers': {
         'console': {'class': 'logging.StreamHandler', 'formatter': 'simple'},
         'file': {
             'level': 'DEBUG',
-            'class': 'logging.FileHandler',
+            'class': 'logging.handlers.RotatingFileHandler',
             'filename': BASE_DIR / 'debug.log',
-            'formatter': 'verbose',
+            'maxBytes': 1024*1024*5,  # 5 MB
+            'backupCount': 3,
+            'formatter': 'json',
+        },
+        'async': {
+            '()': 'app.log_pipeline.AsyncQueueHandler',
+            'handlers': ['console', 'file'],
+            'filters': ['sampling'],
         },
     },
-    'root': {'handlers': ['console', 'file'], 'level': 'DEBUG'},
+    'root': {'handlers': ['async'], 'level': 'DEBUG'},
 }
 
 # 🔐 CORS settings
@@ -138,7 +258,10 @@ CORS_ALLOW_CREDENTIALS = True
 CORS_ALLOW_HEADERS = list(default_headers) + [
     'authorization',
     'ngrok-skip-browser-warning',  # required for ngrok free tier API calls
+    'if-match',  # optimistic concurrency on PUT/PATCH (app/versioning.py)
 ]
 
+CORS_EXPOSE_HEADERS = ['ETag']
+
 # Dev-only: allow all origins (optional fallback, comment out in production)
 # CORS_ALLOW_ALL_ORIGINS = True
@@ -27,9 +27,34 @@ DATABASES = {
         'PASSWORD': os.environ.get('DB_PASSWORD', ''),
         'HOST': os.environ.get('DB_HOST', 'localhost'),
         'PORT': os.environ.get('DB_PORT', '5432'),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Connection pooling (psycopg 3 pool, one per worker process): requests borrow an open
+# connection instead of paying a TCP + auth handshake. Size max_size to the number of
+# threads per gunicorn worker; workers x max_size must stay below Postgres max_connections.
+# DB_POOL=0 falls back to persistent per-thread connections.
+if os.environ.get('DB_POOL', '1') == '1':
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '2')),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', '10')),
+            'timeout': float(os.environ.get('DB_POOL_TIMEOUT', '10')),   # wait for a free connection
+            'max_idle': float(os.environ.get('DB_POOL_MAX_IDLE', '300')),  # close idle extras after
+            'max_lifetime': 1800,
+        },
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = 60
+
+# Read replicas: comma-separated hosts in DB_REPLICA_HOSTS (same name/user/password as the primary)
+DATABASE_REPLICAS = []
+for _index, _host in enumerate(h.strip() for h in os.environ.get('DB_REPLICA_HOSTS', '').split(',') if h.strip()):
+    _alias = f'replica{_index + 1}'
+    DATABASES[_alias] = dict(DATABASES['default'], HOST=_host, TEST={'MIRROR': 'default'})
+    DATABASE_REPLICAS.append(_alias)
+
 # CORS Settings for production
 CORS_ALLOWED_ORIGINS = [
     "https://your-domain.com",
@@ -57,7 +82,12 @@ STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
-# Logging for production
+# Request tracing builds a span tree and wraps every query, so production only traces a
+# TRACING_SAMPLE_RATE fraction of requests (e.g. 0.01) and none unless it is set.
+TRACING_SAMPLE_RATE = float(os.environ.get('TRACING_SAMPLE_RATE', '0'))
+TRACING_ENABLED = TRACING_SAMPLE_RATE > 0
+
+# Logging for production (same queue/listener pipeline as development, JSON to file)
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -66,6 +96,13 @@ LOGGING = {
             'format': '[{levelname}] {asctime} {name} - {message}',
             'style': '{',
         },
+        'json': {'()': 'app.log_pipeline.JSONFormatter'},
+    },
+    'filters': {
+        'sampling': {
+            '()': 'app.log_pipeline.SamplingFilter',
+            'rates': {'django.db.backends': 0.01},
+        },
     },
     'handlers': {
         'file': {
@@ -74,16 +111,21 @@ LOGGING = {
             'filename': os.path.join(BASE_DIR, 'logs', 'django.log'),
             'maxBytes': 1024*1024*5,  # 5 MB
             'backupCount': 5,
-            'formatter': 'verbose',
+            'formatter': 'json',
         },
         'console': {
             'level': 'ERROR',
             'class': 'logging.StreamHandler',
             'formatter': 'verbose',
         },
+        'async': {
+            '()': 'app.log_pipeline.AsyncQueueHandler',
+            'handlers': ['file', 'console'],
+            'filters': ['sampling'],
+        },
     },
     'root': {
-        'handlers': ['file', 'console'],
+        'handlers': ['async'],
         'level': 'INFO',
     },
 }
@@ -97,6 +139,23 @@ EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'noreply@your-domain.com')
 
+# Shared cache so auth cache invalidation reaches every gunicorn worker
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_DIR', os.path.join(BASE_DIR, 'cache')),
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+
 # Session settings
 SESSION_COOKIE_SECURE = True
 SESSION_COOKIE_HTTPONLY = True
@@ -0,0 +1,335 @@
+"""Optional database-per-campaign sharding for the in-session event tables.
+
+With ``CAMPAIGN_SHARDING = True`` the models in ``SHARDED_MODELS`` (rolls, roll history,
+chat and session events, i.e. what a table writes during play) live in one SQLite file
+per campaign under ``CAMPAIGN_SHARD_DIR``. Everything else (users, tokens, campaigns,
+characters, sessions, SRD data) stays in ``default``, so one campaign's dice storm only
+locks its own file.
+
+``CampaignShardRouter`` picks the shard from the instance Django hands it: a sharded row
+(``campaign_id``, or its session's campaign), or the campaign/session/character whose
+reverse relation is being read (``session.rolls.all()``). Queries with no instance must
+say which campaign they are for: ``Roll.objects.for_campaign(campaign_id)``. Joins
+between a shard and ``default`` are not possible; use ``prefetch_related`` instead.
+
+Each shard numbers its rows from ``campaign_id * SHARD_PK_SPAN``, so ids are unique across
+shards and a detail route (``/rolls/<id>/``) finds the shard from the id alone
+(``campaign_of_pk``). Rows copied in with their old ids (``split_campaign_shards``, or shards
+created before the ranges existed) are found by looking through the shards of the campaigns
+the user can see.
+
+Shard files are created on first use, by copying a migrated template. ``split_campaign_shards``
+moves the rows of an existing database into the shards, and ``--migrate`` applies new
+migrations to every shard.
+"""
+import os
+import re
+import shutil
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, models
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+
+SHARD_PREFIX = 'campaign_'
+_SHARD_FILE = re.compile(r'^campaign_(\d+)\.sqlite3$')
+SHARDED_MODELS = frozenset({
+    'characters.roll',
+    'characters.rollhistory',
+    'characters.chatmessage',
+    'characters.sessionevent',
+})
+
+# Ids per campaign and table; campaign ids up to 9 million keep ids within JavaScript's safe integers.
+SHARD_PK_SPAN = 10 ** 9
+
+_shards_lock = threading.RLock()
+_ready = set()
+_session_campaigns = {}
+
+
+def enabled():
+    return getattr(settings, 'CAMPAIGN_SHARDING', False)
+
+
+def is_sharded(model):
+    return model._meta.label_lower in SHARDED_MODELS
+
+
+def shard_directory():
+    return getattr(settings, 'CAMPAIGN_SHARD_DIR', os.path.join(settings.BASE_DIR, 'shards'))
+
+
+def _register(alias, path):
+    config = connections.configure_settings({
+        DEFAULT_DB_ALIAS: connections.settings[DEFAULT_DB_ALIAS],
+        alias: {
+            # SQLite without foreign key enforcement: parents live in default.
+            'ENGINE': 'app.db_backends.sqlite_shard',
+            'NAME': path,
+            'CONN_MAX_AGE': connections.settings[DEFAULT_DB_ALIAS]['CONN_MAX_AGE'],
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {'transaction_mode': 'IMMEDIATE'},
+        },
+    })[alias]
+    # Rebind rather than mutate: other threads may be iterating connections.all().
+    connections.settings = {**connections.settings, alias: config}
+
+
+def _unregister(alias):
+    connections[alias].close()
+    del connections[alias]
+    connections.settings = {k: v for k, v in connections.settings.items() if k != alias}
+
+
+def _template_path():
+    """An empty, fully migrated shard to copy; running migrate per new campaign takes seconds."""
+    from django.db.migrations.loader import MigrationLoader
+
+    path = os.path.join(shard_directory(), '_template.sqlite3')
+    expected = set(MigrationLoader(None, ignore_no_migrations=True).graph.nodes)
+    if os.path.exists(path):
+        raw = sqlite3.connect(path)
+        try:
+            applied = set(raw.execute('SELECT app, name FROM django_migrations').fetchall())
+        except sqlite3.Error:
+            applied = set()
+        finally:
+            raw.close()
+        if applied == expected:
+            return path
+        os.remove(path)
+    from django.core.management import call_command
+    alias = f'{SHARD_PREFIX}template'
+    _register(alias, path)
+    try:
+        call_command('migrate', database=alias, verbosity=0)
+    finally:
+        _unregister(alias)
+    return path
+
+
+def shard_alias(campaign_id, create=True):
+    """Database alias for ``campaign_id``'s shard, registering (and creating) it on first use."""
+    alias = f'{SHARD_PREFIX}{int(campaign_id)}'
+    if alias in _ready:
+        return alias
+    with _shards_lock:
+        if alias in _ready:
+            return alias
+        path = os.path.join(shard_directory(), f'{alias}.sqlite3')
+        if not os.path.exists(path):
+            if not create:
+                return None
+            os.makedirs(shard_directory(), exist_ok=True)
+            shutil.copyfile(_template_path(), path)
+        _register(alias, path)
+        _reserve_pk_range(alias, int(campaign_id))
+        _ready.add(alias)
+    return alias
+
+
+def _reserve_pk_range(alias, campaign_id):
+    """Make the shard's AUTOINCREMENT ids start at ``campaign_id * SHARD_PK_SPAN``."""
+    floor = campaign_id * SHARD_PK_SPAN
+    with connections[alias].cursor() as cursor:
+        for label in sorted(SHARDED_MODELS):
+            table = apps.get_model(label)._meta.db_table
+            cursor.execute('UPDATE sqlite_sequence SET seq = %s WHERE name = %s AND seq < %s', [floor, table, floor])
+            cursor.execute(
+                'INSERT INTO sqlite_sequence (name, seq) SELECT %s, %s '
+                'WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = %s)',
+                [table, floor, table],
+            )
+
+
+def campaign_of_pk(pk):
+    """The campaign whose shard numbered a row with id ``pk``, None for ids from before the ranges."""
+    return int(pk) // SHARD_PK_SPAN or None
+
+
+def existing_shards():
+    """Aliases of every shard file on disk, registering them as needed."""
+    aliases = []
+    for name in sorted(os.listdir(shard_directory()) if os.path.isdir(shard_directory()) else []):
+        match = _SHARD_FILE.match(name)
+        if match:
+            aliases.append(shard_alias(int(match.group(1)), create=False))
+    return aliases
+
+
+def drop_shard(campaign_id):
+    """Close and delete a campaign's shard file."""
+    alias = shard_alias(campaign_id, create=False)
+    if alias is None:
+        return
+    with _shards_lock:
+        _ready.discard(alias)
+        path = connections.settings[alias]['NAME']
+        _unregister(alias)
+        for suffix in ('', '-wal', '-shm'):
+            try:
+                os.remove(f'{path}{suffix}')
+            except FileNotFoundError:
+                pass
+
+
+def _campaign_of_session(session_id):
+    if session_id is None:
+        return None
+    if session_id not in _session_campaigns:
+        Session = apps.get_model('characters', 'Session')
+        campaign_id = Session.objects.using(DEFAULT_DB_ALIAS).filter(pk=session_id).values_list(
+            'campaign_id', flat=True
+        ).first()
+        if len(_session_campaigns) > 10000:
+            _session_campaigns.clear()
+        # A session never moves to another campaign, so this can be cached for good.
+        _session_campaigns[session_id] = campaign_id
+    return _session_campaigns[session_id]
+
+
+def campaign_for(instance):
+    """The campaign id that decides where rows related to ``instance`` live, if any."""
+    if instance is None:
+        return None
+    label = instance._meta.label_lower
+    if label == 'characters.campaign':
+        return instance.pk
+    if hasattr(instance, 'campaign_id'):
+        return instance.campaign_id
+    if hasattr(instance, 'session_id'):
+        return _campaign_of_session(instance.session_id)
+    return None
+
+
+@contextmanager
+def keep_timestamps(model):
+    """Stop auto_now_add from stamping rows copied between databases with the time of the copy."""
+    fields = [f for f in model._meta.concrete_fields if getattr(f, 'auto_now_add', False)]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class CampaignShardQuerySet(models.QuerySet):
+    def for_campaign(self, campaign_id):
+        """Point this query at ``campaign_id``'s shard (a no-op when sharding is off)."""
+        if not enabled() or campaign_id is None:
+            return self
+        return self.using(shard_alias(campaign_id))
+
+    def create(self, **kwargs):
+        if self._db is not None or not enabled():
+            return super().create(**kwargs)
+        # Let save() route by the new instance rather than by a hint-less queryset.
+        obj = self.model(**kwargs)
+        obj.save(force_insert=True)
+        return obj
+
+
+class CampaignShardRouter:
+    """List before ``ReplicaRouter``; it only answers for models in ``SHARDED_MODELS``."""
+
+    def _db_for(self, model, **hints):
+        if not enabled() or not is_sharded(model):
+            return None
+        campaign_id = campaign_for(hints.get('instance'))
+        return shard_alias(campaign_id) if campaign_id is not None else None
+
+    db_for_read = _db_for
+    db_for_write = _db_for
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Shard rows reference characters and sessions in default by id.
+        if enabled() and (is_sharded(type(obj1)) or is_sharded(type(obj2))):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db.startswith(SHARD_PREFIX):
+            return model_name is not None and f'{app_label}.{model_name}' in SHARDED_MODELS
+        return None
+
+
+def visible_campaigns(user):
+    """Ids of the campaigns whose shards ``user`` may read."""
+    Campaign = apps.get_model('characters', 'Campaign')
+    campaigns = Campaign.objects.all()
+    if not user.is_staff:
+        campaigns = campaigns.filter(
+            models.Q(gm=user) | models.Q(characters__user=user) | models.Q(players=user)
+        )
+    return campaigns.values_list('pk', flat=True).distinct()
+
+
+def requested_campaign(request, model=None, pk=None):
+    """Campaign named by ``?campaign=``/``?session=``/``?character=``, if the user may see it.
+
+    List endpoints of sharded models need this to know which shard to read. Detail routes
+    pass their ``model`` and ``pk`` instead, and the campaign is found from the id.
+    """
+    params = request.query_params
+    Character = apps.get_model('characters', 'Character')
+    try:
+        if params.get('campaign'):
+            campaign_id = int(params['campaign'])
+        elif params.get('session'):
+            campaign_id = _campaign_of_session(int(params['session']))
+        elif params.get('character'):
+            campaign_id = Character.objects.filter(pk=int(params['character'])).values_list(
+                'campaign_id', flat=True
+            ).first()
+        elif pk is not None and model is not None:
+            return _campaign_of_row(request.user, model, int(pk))
+        else:
+            return None
+    except ValueError:
+        return None
+    if campaign_id is None:
+        return None
+    return campaign_id if visible_campaigns(request.user).filter(pk=campaign_id).exists() else None
+
+
+def _campaign_of_row(user, model, pk):
+    campaign_id = campaign_of_pk(pk)
+    visible = visible_campaigns(user)
+    if campaign_id is not None:
+        return campaign_id if visible.filter(pk=campaign_id).exists() else None
+    # An id from before the ranges: look in the user's campaigns' shards.
+    for candidate in visible.order_by('pk'):
+        alias = shard_alias(candidate, create=False)
+        if alias is not None and model.objects.using(alias).filter(pk=pk).exists():
+            return candidate
+    return None
+
+
+@receiver(post_delete, sender='characters.Campaign')
+def _campaign_deleted(sender, instance, **kwargs):
+    if enabled():
+        drop_shard(instance.pk)
+
+
+@receiver(post_delete, sender='characters.Session')
+def _session_deleted(sender, instance, **kwargs):
+    _session_campaigns.pop(instance.pk, None)
+    if enabled() and instance.campaign_id is not None:
+        # The cascade in default cannot reach rows in the shard.
+        for label in ('characters.Roll', 'characters.SessionEvent', 'characters.ChatMessage'):
+            apps.get_model(label).objects.for_campaign(instance.campaign_id).filter(session_id=instance.pk).delete()
+
+
+@receiver(post_delete, sender='characters.Character')
+def _character_deleted(sender, instance, **kwargs):
+    if enabled() and instance.campaign_id is not None:
+        for label in ('characters.Roll', 'characters.SessionEvent'):
+            apps.get_model(label).objects.for_campaign(instance.campaign_id).filter(character_id=instance.pk).delete()
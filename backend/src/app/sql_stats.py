@@ -0,0 +1,180 @@
+"""In-process SQL fingerprint statistics (a small pg_stat_statements for any backend).
+
+``rows`` counts the rows a statement affected, or for queries the driver reports no count
+for (every SELECT on SQLite, where ``cursor.rowcount`` is -1) the rows actually fetched.
+"""
+import math
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w\"$])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|\?")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_VALUES_LIST = re.compile(r"\bVALUES\s*(\(\s*\?(?:\s*,\s*\?)*\s*\))(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))*", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(sql):
+    """Normalize a SQL statement so that queries differing only by literals share one key."""
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    sql = _VALUES_LIST.sub(r'VALUES \1', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def _percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered), max(1, math.ceil(pct / 100.0 * len(ordered)))) - 1
+    return ordered[index]
+
+
+class _Entry:
+    __slots__ = ('query', 'calls', 'total_time', 'rows', 'samples')
+
+    def __init__(self, query, sample_size):
+        self.query = query
+        self.calls = 0
+        self.total_time = 0.0
+        self.rows = 0
+        self.samples = deque(maxlen=sample_size)
+
+
+class SQLStatsCollector:
+    """Thread-safe aggregate of call count, time and rows per SQL fingerprint.
+
+    Memory is bounded: at most ``max_fingerprints`` entries are kept (least recently
+    seen are evicted first) and p95 is computed from the last ``sample_size`` timings.
+    """
+
+    def __init__(self, max_fingerprints=500, sample_size=256):
+        self.max_fingerprints = max_fingerprints
+        self.sample_size = sample_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.evicted = 0
+        self.since = time.time()
+
+    def record(self, sql, duration, rows=0):
+        """Count one call of ``sql``; returns its fingerprint."""
+        key = fingerprint(sql)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if len(self._entries) >= self.max_fingerprints:
+                    self._entries.popitem(last=False)
+                    self.evicted += 1
+                entry = self._entries[key] = _Entry(key, self.sample_size)
+            else:
+                self._entries.move_to_end(key)
+            entry.calls += 1
+            entry.total_time += duration
+            entry.rows += max(rows or 0, 0)
+            entry.samples.append(duration)
+        return key
+
+    def add_rows(self, key, rows):
+        """Add rows fetched after the call was recorded (ignored if the entry is gone)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.rows += rows
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+            self.evicted = 0
+            self.since = time.time()
+
+    def snapshot(self, order_by='total_time', limit=None):
+        """Return per-fingerprint stats (times in milliseconds), largest first."""
+        with self._lock:
+            rows = [
+                {
+                    'query': e.query,
+                    'calls': e.calls,
+                    'total_time': e.total_time * 1000,
+                    'mean_time': e.total_time / e.calls * 1000,
+                    'p95_time': _percentile(e.samples, 95) * 1000,
+                    'rows': e.rows,
+                }
+                for e in self._entries.values()
+            ]
+        if order_by not in ('calls', 'total_time', 'mean_time', 'p95_time', 'rows'):
+            order_by = 'total_time'
+        rows.sort(key=lambda r: r[order_by], reverse=True)
+        return rows[:limit] if limit else rows
+
+
+collector = SQLStatsCollector(
+    max_fingerprints=getattr(settings, 'SQL_STATS_MAX_FINGERPRINTS', 500),
+    sample_size=getattr(settings, 'SQL_STATS_SAMPLE_SIZE', 256),
+)
+
+
+def _count_fetched_rows(cursor, key):
+    # Shadow the driver cursor's fetch methods until its next execute(), which installs fresh ones.
+    cls = type(cursor)
+
+    def fetchone():
+        row = cls.fetchone(cursor)
+        if row is not None:
+            collector.add_rows(key, 1)
+        return row
+
+    def fetchmany(*args, **kwargs):
+        rows = cls.fetchmany(cursor, *args, **kwargs)
+        collector.add_rows(key, len(rows))
+        return rows
+
+    def fetchall():
+        rows = cls.fetchall(cursor)
+        collector.add_rows(key, len(rows))
+        return rows
+
+    try:
+        cursor.fetchone, cursor.fetchmany, cursor.fetchall = fetchone, fetchmany, fetchall
+    except AttributeError:
+        pass  # C cursors without a __dict__; their drivers report rowcount for queries
+
+
+def record_query(execute, sql, params, many, context):
+    """``connection.execute_wrapper`` hook that feeds the module-level collector."""
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        # context['cursor'] is Django's CursorWrapper; fetches go through to the driver cursor.
+        cursor = getattr(context.get('cursor'), 'cursor', None)
+        rowcount = getattr(cursor, 'rowcount', -1)
+        key = collector.record(sql, duration, rowcount)
+        if rowcount < 0 and getattr(cursor, 'description', None) is not None:
+            _count_fetched_rows(cursor, key)
+
+
+class SQLStatsMiddleware:
+    """Installs :func:`record_query` on every database connection for the duration of a request."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'SQL_STATS_ENABLED', True)
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(record_query))
+            return self.get_response(request)
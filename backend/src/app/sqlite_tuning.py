@@ -0,0 +1,50 @@
+"""PRAGMA tuning for SQLite connections, applied from the ``connection_created`` signal.
+
+Defaults are ``DEFAULT_PRAGMAS`` below, replaced by ``SQLITE_PRAGMAS`` when settings define
+it; a database entry can override them with its own ``'PRAGMAS'`` key (``{}`` leaves the
+connection untouched)::
+
+    DATABASES = {'default': {'ENGINE': 'django.db.backends.sqlite3', ..., 'PRAGMAS': {...}}}
+
+``journal_mode=WAL`` lets readers keep reading while a roll is being written, and with
+``synchronous=NORMAL`` a commit no longer waits for an fsync. ``busy_timeout`` makes a
+second writer wait for the lock instead of failing at once with "database is locked".
+"""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,         # ms
+    'mmap_size': 134217728,       # 128 MiB
+    'cache_size': -20000,         # negative = KiB, i.e. ~20 MB of page cache
+    'temp_store': 'MEMORY',
+}
+
+
+def pragmas_for(settings_dict):
+    if 'PRAGMAS' in settings_dict:
+        return settings_dict['PRAGMAS'] or {}
+    return getattr(settings, 'SQLITE_PRAGMAS', DEFAULT_PRAGMAS)
+
+
+def apply_pragmas(connection, pragmas):
+    """Run ``PRAGMA name=value`` for each entry on a raw DB-API connection."""
+    cursor = connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+    finally:
+        cursor.close()
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = pragmas_for(connection.settings_dict)
+    if pragmas:
+        apply_pragmas(connection.connection, pragmas)
@@ -0,0 +1,238 @@
+"""Lightweight request tracing.
+
+``TracingMiddleware`` opens a root span per request plus child spans for the view
+action and every DB query. Code elsewhere adds spans with :func:`span` or the
+:func:`traced` / :func:`trace_methods` decorators; outside a traced request these are
+no-ops. Finished traces go to an in-memory ring buffer (served to staff at
+``/api/_debug/traces/``) and, when ``TRACING_JSONL_PATH`` is set, to a JSONL file.
+"""
+import contextvars
+import functools
+import json
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+
+_current_trace = contextvars.ContextVar('current_trace', default=None)
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+
+class Span:
+    __slots__ = ('span_id', 'parent_id', 'name', 'kind', 'start', 'end', 'attrs')
+
+    def __init__(self, name, kind, parent_id, attrs):
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start = time.perf_counter()
+        self.end = None
+        self.attrs = attrs
+
+    def finish(self):
+        if self.end is None:
+            self.end = time.perf_counter()
+
+    def as_dict(self, origin):
+        return {
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'kind': self.kind,
+            'start_ms': round((self.start - origin) * 1000, 3),
+            'duration_ms': round(((self.end or time.perf_counter()) - self.start) * 1000, 3),
+            'attrs': self.attrs,
+        }
+
+
+class Trace:
+    def __init__(self, max_spans):
+        self.trace_id = uuid.uuid4().hex
+        self.started_at = time.time()
+        self.spans = []
+        self.dropped = 0
+        self.max_spans = max_spans
+
+    def add(self, span):
+        if len(self.spans) >= self.max_spans:
+            self.dropped += 1
+            return False
+        self.spans.append(span)
+        return True
+
+    def as_dict(self):
+        root = self.spans[0]
+        return {
+            'trace_id': self.trace_id,
+            'started_at': self.started_at,
+            'name': root.name,
+            'attrs': root.attrs,
+            'duration_ms': round(((root.end or time.perf_counter()) - root.start) * 1000, 3),
+            'dropped_spans': self.dropped,
+            'spans': [s.as_dict(root.start) for s in self.spans],
+        }
+
+
+@contextmanager
+def span(name, kind='internal', **attrs):
+    """Open a child of the current span; does nothing when no trace is active."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    parent = _current_span.get()
+    current = Span(name, kind, parent.span_id if parent else None, attrs)
+    if not trace.add(current):
+        yield None
+        return
+    token = _current_span.set(current)
+    try:
+        yield current
+    finally:
+        current.finish()
+        _current_span.reset(token)
+
+
+def traced(kind='internal', name=None):
+    """Decorator form of :func:`span`, named after the qualified function name."""
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_trace.get() is None:
+                return func(*args, **kwargs)
+            with span(span_name, kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def traced_method(kind='internal'):
+    """Like :func:`traced` but names the span after the runtime class (for inherited methods)."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if _current_trace.get() is None:
+                return func(self, *args, **kwargs)
+            with span(f'{type(self).__name__}.{func.__name__}', kind):
+                return func(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def trace_methods(kind='internal'):
+    """Class decorator: trace every public static/class/instance method of a service class."""
+    def decorator(cls):
+        for attr, value in list(vars(cls).items()):
+            if attr.startswith('_'):
+                continue
+            if isinstance(value, staticmethod):
+                setattr(cls, attr, staticmethod(traced(kind, f'{cls.__name__}.{attr}')(value.__func__)))
+            elif isinstance(value, classmethod):
+                setattr(cls, attr, classmethod(traced(kind, f'{cls.__name__}.{attr}')(value.__func__)))
+            elif callable(value):
+                setattr(cls, attr, traced(kind, f'{cls.__name__}.{attr}')(value))
+        return cls
+    return decorator
+
+
+class TraceBuffer:
+    """Keeps the last ``size`` finished traces in memory; optionally appends them to a JSONL file."""
+
+    def __init__(self, size=200, jsonl_path=None):
+        self.jsonl_path = jsonl_path
+        self._traces = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def export(self, trace):
+        data = trace.as_dict()
+        with self._lock:
+            self._traces.append(data)
+            if self.jsonl_path:
+                with open(self.jsonl_path, 'a') as fh:
+                    fh.write(json.dumps(data, default=str) + '\n')
+
+    def recent(self):
+        with self._lock:
+            return list(reversed(self._traces))
+
+    def get(self, trace_id):
+        with self._lock:
+            return next((t for t in self._traces if t['trace_id'] == trace_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._traces.clear()
+
+
+buffer = TraceBuffer(
+    size=getattr(settings, 'TRACING_BUFFER_SIZE', 200),
+    jsonl_path=getattr(settings, 'TRACING_JSONL_PATH', None),
+)
+
+
+def _trace_query(execute, sql, params, many, context):
+    with span('db.query', 'db', sql=sql[:500], many=many) as current:
+        result = execute(sql, params, many, context)
+        cursor = context.get('cursor')
+        if current is not None and cursor is not None:
+            current.attrs['rows'] = getattr(cursor, 'rowcount', None)
+        return result
+
+
+class TracingMiddleware:
+    """Root span per request, a view span from ``process_view`` and one span per DB query."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'TRACING_ENABLED', True)
+        self.sample_rate = getattr(settings, 'TRACING_SAMPLE_RATE', 1.0)
+        self.max_spans = getattr(settings, 'TRACING_MAX_SPANS', 2000)
+
+    def __call__(self, request):
+        if not self.enabled or request.path.startswith('/api/_debug/') or random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        trace = Trace(self.max_spans)
+        trace_token = _current_trace.set(trace)
+        root = Span('http.request', 'http', None, {'method': request.method, 'path': request.path})
+        trace.add(root)
+        span_token = _current_span.set(root)
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(_trace_query))
+                response = self.get_response(request)
+            root.attrs['status'] = response.status_code
+            response['X-Trace-Id'] = trace.trace_id
+            return response
+        finally:
+            view_span = getattr(request, '_trace_view_span', None)
+            if view_span is not None:
+                view_span.finish()
+            root.finish()
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+            buffer.export(trace)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        trace = _current_trace.get()
+        if trace is None:
+            return None
+        from .metrics import view_label
+        root = _current_span.get()
+        view_span = Span(view_label(view_func, request.method), 'view', root.span_id, {})
+        if trace.add(view_span):
+            root.attrs['view'] = view_span.name
+            request._trace_view_span = view_span
+            # The view runs in this same context, so its spans nest under the view span.
+            _current_span.set(view_span)
+        return None
@@ -19,7 +19,8 @@ from characters.views import (
     get_available_playbook_abilities, api_documentation,
     XPHistoryViewSet, StressHistoryViewSet, ChatMessageViewSet,
     ClaimViewSet, CrewPlaybookViewSet, CrewSpecialAbilityViewSet, CrewUpgradeViewSet,
-    ProgressClockViewSet
+    ProgressClockViewSet, sql_stats, profile_list, profile_arm, profile_download,
+    trace_list, trace_detail, metrics
 )
 
 
@@ -70,4 +71,12 @@ urlpatterns = [
     path('api/accounts/login/', LoginView.as_view(), name='login'),
     path('api/accounts/signup/', RegisterView.as_view(), name='signup'),
     path('api/accounts/me/', CurrentUserView.as_view(), name='current_user'),
+    # Staff-only diagnostics
+    path('api/_debug/sql-stats/', sql_stats, name='sql_stats'),
+    path('api/_debug/profiles/', profile_list, name='profile_list'),
+    path('api/_debug/profiles/arm/', profile_arm, name='profile_arm'),
+    path('api/_debug/profiles/<str:name>/', profile_download, name='profile_download'),
+    path('api/_debug/traces/', trace_list, name='trace_list'),
+    path('api/_debug/traces/<str:trace_id>/', trace_detail, name='trace_detail'),
+    path('metrics/', metrics, name='metrics'),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,124 @@
+"""Optimistic concurrency for rows edited by several people at once.
+
+A ``VersionedModel`` has an integer ``version`` that every save bumps. Detail responses
+of a ``VersionedViewMixin`` viewset carry it as an ``ETag``; a PUT/PATCH that sends it
+back in ``If-Match`` is only applied if the row is still at that version. The check is the
+UPDATE itself (``... WHERE id = %s AND version = %s``), so there is no lock and no window
+between checking and writing. When it fails the client gets a 412 with the row's current
+state, to merge with and retry.
+
+Requests without ``If-Match`` keep last-write-wins; they still bump the version.
+``QuerySet.update()`` does not bump it.
+"""
+from django.db import models, transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+
+class VersionConflict(Exception):
+    """A conditional save found the row at a different version."""
+
+
+class VersionedModel(models.Model):
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        field = self._meta.get_field('version')
+        values = [value for value in values if value[0] is not field]
+        expected = self.__dict__.pop('_expected_version', None)
+        if expected is None:
+            values.append((field, None, models.F('version') + 1))
+            updated = super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+            if updated:
+                # A stale instance can only undercount, which never matches a later If-Match.
+                self.version += 1
+            return updated
+
+        values.append((field, None, expected + 1))
+        updated = super()._do_update(
+            base_qs.filter(version=expected), using, pk_val, values, update_fields, forced_update
+        )
+        if not updated and base_qs.filter(pk=pk_val).exists():
+            raise VersionConflict(f'{self._meta.label} {pk_val} is no longer at version {expected}')
+        if updated:
+            self.version = expected + 1
+        return updated
+
+    def expect_version(self, version):
+        """Make the next save a conditional UPDATE that only applies at ``version``."""
+        self._expected_version = version
+
+    @property
+    def expected_version(self):
+        """The version the next save is conditional on, if any."""
+        return self.__dict__.get('_expected_version')
+
+
+def parse_if_match(header):
+    """The versions listed in an ``If-Match`` header, None for a missing header or ``*``."""
+    if not header or header.strip() == '*':
+        return None
+    versions = set()
+    for tag in header.split(','):
+        tag = tag.strip().removeprefix('W/').strip('"')
+        if tag.isdigit():
+            versions.add(int(tag))
+    return versions
+
+
+class VersionedViewMixin:
+    """ETag on retrieve/update and ``If-Match`` enforcement on PUT/PATCH for a VersionedModel viewset."""
+
+    def get_object(self):
+        obj = super().get_object()
+        expected = getattr(self, '_if_match_version', None)
+        if expected is not None:
+            obj.expect_version(expected)
+        return obj
+
+    def check_if_match(self, instance):
+        """Arm a conditional save of ``instance`` from the request's If-Match, or return a 412 response."""
+        versions = parse_if_match(self.request.headers.get('If-Match'))
+        if versions is None:
+            return None
+        if instance.version not in versions:
+            return self.precondition_failed(instance)
+        self._if_match_version = instance.version
+        instance.expect_version(instance.version)
+        return None
+
+    def precondition_failed(self, instance):
+        instance.refresh_from_db()
+        current = self.get_serializer(instance).data
+        return self.with_etag(
+            Response(
+                {'error': 'This record was changed by someone else.', 'current': current},
+                status=status.HTTP_412_PRECONDITION_FAILED
+            ),
+            instance.version
+        )
+
+    @staticmethod
+    def with_etag(response, version):
+        if version is not None:
+            response['ETag'] = f'"{version}"'
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        return self.with_etag(response, response.data.get('version'))
+
+    def update(self, request, *args, **kwargs):
+        instance = self.get_object()
+        failed = self.check_if_match(instance)
+        if failed is not None:
+            return failed
+        try:
+            with transaction.atomic():
+                response = super().update(request, *args, **kwargs)
+        except VersionConflict:
+            return self.precondition_failed(instance)
+        return self.with_etag(response, response.data.get('version'))
@@ -0,0 +1,142 @@
+"""Optional single-writer queue for SQLite.
+
+SQLite allows one writer at a time. Without coordination every request thread opens its
+own write transaction and they take turns through ``busy_timeout`` retries. With
+``SQLITE_WRITE_QUEUE = True``, :func:`run_write` instead hands the write to one
+writer thread per process. That thread:
+
+* takes whatever jobs are waiting (up to ``SQLITE_WRITE_QUEUE_BATCH``) and runs them in
+  one transaction and one commit, each in its own savepoint, so a failing job only rolls
+  back its own writes;
+* holds an exclusive file lock (``SQLITE_WRITE_LOCK_PATH``) around the transaction, so
+  writers from different gunicorn processes queue on the lock instead of timing out.
+
+Callers block until their job has committed and get its return value (or its exception).
+When the queue is off, when the database is not SQLite, or when the caller is already in
+a transaction, the job just runs inline in ``transaction.atomic()``.
+"""
+import os
+import queue
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows development machines
+    fcntl = None
+
+
+class _Job:
+    __slots__ = ('func', 'args', 'kwargs', 'done', 'result', 'error')
+
+    def __init__(self, func, args, kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class WriteQueue:
+    """One writer thread per process and database alias, started on first use."""
+
+    def __init__(self, using=DEFAULT_DB_ALIAS, batch_size=50, lock_path=None):
+        self.using = using
+        self.batch_size = batch_size
+        self.lock_path = lock_path
+        self.batches = 0
+        self.jobs = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, func, *args, **kwargs):
+        """Run ``func(*args, **kwargs)`` on the writer thread and wait for it to commit."""
+        self._ensure_started()
+        job = _Job(func, args, kwargs)
+        self._queue.put(job)
+        job.done.wait()
+        if job.error is not None:
+            raise job.error
+        return job.result
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                thread = threading.Thread(target=self._run, name=f'sqlite-writer-{self.using}', daemon=True)
+                thread.start()
+                self._thread = thread
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def _write(self, batch):
+        try:
+            with self._process_lock(), transaction.atomic(using=self.using):
+                for job in batch:
+                    try:
+                        with transaction.atomic(using=self.using):
+                            job.result = job.func(*job.args, **job.kwargs)
+                    except Exception as exc:
+                        job.error = exc
+        except Exception as exc:
+            # The commit itself failed: nothing in the batch was written.
+            for job in batch:
+                job.error = job.error or exc
+        finally:
+            self.batches += 1
+            self.jobs += len(batch)
+            for job in batch:
+                job.done.set()
+            connections[self.using].close_if_unusable_or_obsolete()
+
+    @contextmanager
+    def _process_lock(self):
+        if not self.lock_path or fcntl is None:
+            yield
+            return
+        with open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def get_queue(using=DEFAULT_DB_ALIAS):
+    with _queues_lock:
+        if using not in _queues:
+            lock_path = getattr(settings, 'SQLITE_WRITE_LOCK_PATH', None)
+            if lock_path is None:
+                lock_path = f"{os.fspath(connections[using].settings_dict['NAME'])}.writelock"
+            _queues[using] = WriteQueue(
+                using, batch_size=getattr(settings, 'SQLITE_WRITE_QUEUE_BATCH', 50), lock_path=lock_path,
+            )
+        return _queues[using]
+
+
+def run_write(func, *args, using=DEFAULT_DB_ALIAS, **kwargs):
+    """Run a group of ORM writes as one transaction, through the writer queue when enabled."""
+    conn = connections[using]
+    if (not getattr(settings, 'SQLITE_WRITE_QUEUE', False) or conn.vendor != 'sqlite'
+            or conn.in_atomic_block):
+        with transaction.atomic(using=using):
+            return func(*args, **kwargs)
+    return get_queue(using).submit(func, *args, **kwargs)
@@ -0,0 +1,153 @@
+"""In-memory index of Hamon/Spin abilities by the number of A-rank Coin stats they need.
+
+The ability tables are SRD reference data that rarely change, so they are read once per
+process into an ``AbilityIndex``:
+
+* ``available(playbook, a_count)`` is a precomputed tuple per (playbook, A count), an O(1)
+  lookup instead of a table scan per request;
+* ``check(playbook, ability_ids, a_count)`` validates a submitted ability set in one pass
+  over the ids and returns the ones the character does not qualify for.
+
+Each process holds its own copy, stamped with the generation it was built from. The
+current generation lives in ``CACHES['default']``, shared between workers like the auth
+cache (see ``settings_prod``); saving or deleting a ``HamonAbility``/``SpinAbility``
+starts a new one, and every worker rebuilds on its next use. Bulk ``QuerySet.update()``
+calls bypass signals; call :func:`invalidate` after them.
+
+Ids that the index does not know may have been added through another worker whose new
+generation has not reached this one (a cache that is not shared, or an evicted stamp);
+:func:`get_index_knowing` rebuilds once before they are treated as unknown.
+"""
+import threading
+import uuid
+from typing import NamedTuple
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import HamonAbility, SpinAbility
+
+
+PLAYBOOK_MODELS = {'HAMON': HamonAbility, 'SPIN': SpinAbility}
+
+
+class IndexedAbility(NamedTuple):
+    id: int
+    name: str
+    ability_type: str
+    required_a_count: int
+    description: str
+    stress_cost: int
+    frequency: str
+
+
+def count_a_ranks(coin_stats):
+    """How many Coin stats are graded A."""
+    if not isinstance(coin_stats, dict):
+        return 0
+    return sum(1 for grade in coin_stats.values() if grade == 'A')
+
+
+class AbilityIndex:
+    def __init__(self, abilities_by_playbook, generation=None):
+        self.generation = generation
+        self._by_id = {}
+        self._available = {}
+        for playbook, abilities in abilities_by_playbook.items():
+            abilities = sorted(abilities, key=lambda ability: (ability.required_a_count, ability.id))
+            self._by_id[playbook] = {ability.id: ability for ability in abilities}
+            top = max((ability.required_a_count for ability in abilities), default=0)
+            # available[k] holds every ability needing at most k A-ranks.
+            self._available[playbook] = tuple(
+                tuple(ability for ability in abilities if ability.required_a_count <= k) for k in range(top + 1)
+            )
+
+    @classmethod
+    def build(cls, generation=None):
+        abilities = {}
+        for playbook, model in PLAYBOOK_MODELS.items():
+            type_field = f'{playbook.lower()}_type'
+            rows = model.objects.values_list(
+                'id', 'name', type_field, 'required_a_count', 'description', 'stress_cost', 'frequency'
+            )
+            abilities[playbook] = [IndexedAbility(*row) for row in rows]
+        return cls(abilities, generation)
+
+    def available(self, playbook, a_count=None):
+        """The playbook's abilities needing at most ``a_count`` A-ranks (all of them if None)."""
+        levels = self._available.get(playbook)
+        if not levels:
+            return ()
+        if a_count is None:
+            return levels[-1]
+        return levels[min(max(a_count, 0), len(levels) - 1)]
+
+    def get(self, playbook, ability_id):
+        return self._by_id.get(playbook, {}).get(ability_id)
+
+    def check(self, playbook, ability_ids, a_count):
+        """``(unknown ids, abilities needing more than a_count A-ranks)`` for ``ability_ids``, in one pass."""
+        by_id = self._by_id.get(playbook, {})
+        unknown, insufficient = [], []
+        for ability_id in ability_ids:
+            ability = by_id.get(ability_id)
+            if ability is None:
+                unknown.append(ability_id)
+            elif ability.required_a_count > a_count:
+                insufficient.append(ability)
+        return unknown, insufficient
+
+
+GENERATION_KEY = 'ability_index:generation'
+
+_index = None
+_lock = threading.Lock()
+
+
+def _generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # First use, or the stamp was evicted: agree on a new one with the other workers.
+        cache.add(GENERATION_KEY, uuid.uuid4().hex, None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def get_index(rebuild=False):
+    """The index for the current generation; ``rebuild`` reads the tables again regardless."""
+    global _index
+    # Read the stamp before the tables, so a change made during the build is not missed.
+    generation = _generation()
+    index = _index
+    if rebuild or index is None or index.generation != generation:
+        with _lock:
+            if rebuild or _index is None or _index.generation != generation:
+                _index = AbilityIndex.build(generation)
+            index = _index
+    return index
+
+
+def get_index_knowing(playbook, ability_ids):
+    """The index, rebuilt once if it does not know one of the playbook's ``ability_ids``."""
+    index = get_index()
+    if any(index.get(playbook, ability_id) is None for ability_id in ability_ids):
+        index = get_index(rebuild=True)
+    return index
+
+
+def invalidate():
+    global _index
+    _index = None
+    cache.set(GENERATION_KEY, uuid.uuid4().hex, None)
+
+
+@receiver(post_save, sender=HamonAbility)
+@receiver(post_delete, sender=HamonAbility)
+@receiver(post_save, sender=SpinAbility)
+@receiver(post_delete, sender=SpinAbility)
+def _ability_changed(sender, **kwargs):
+    invalidate()
+    # A rebuild inside the writing transaction may have seen rows that are later rolled back.
+    transaction.on_commit(invalidate)
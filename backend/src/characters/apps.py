@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class CharactersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'characters'
+
+    def ready(self):
+        # Connects the auth cache / ability index invalidation and SQLite tuning signals.
+        from app import auth_cache, sqlite_tuning  # noqa: F401
+        from . import ability_index  # noqa: F401
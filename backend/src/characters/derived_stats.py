@@ -0,0 +1,157 @@
+"""Stand grade rules: one lookup table per derived stat.
+
+Every stat that follows from a Stand Coin grade (armor charges, vulnerability clock,
+movement speed, stress capacity, Development XP bonus) is a ``GradeRule`` here. The same
+table serves three paths:
+
+* ``DerivedStat`` model attributes (``npc.vulnerability_clock_max``), computed on access;
+* ``npc_stats()`` / ``character_stats()``, which read the grades of a whole queryset in one
+  query and resolve each distinct grade combination once;
+* ``npc_annotations()`` / ``character_annotations()``, ``Case``/``When`` expressions the
+  database evaluates, so lists can be filtered and ordered by derived stats. An annotation
+  with the stat's name replaces the attribute's computed value on the fetched instances
+  until they are saved (``forget_annotations()``), since a save may change their grades.
+"""
+from functools import lru_cache
+from typing import NamedTuple
+
+from django.db.models import Case, IntegerField, Q, Value, When
+
+
+# Stand Coin points per grade (a level 1 Stand has exactly 6).
+GRADE_POINTS = {'S': 5, 'A': 4, 'B': 3, 'C': 2, 'D': 1, 'F': 0}
+STAND_STATS = ('power', 'speed', 'range', 'durability', 'precision', 'development')
+
+
+class GradeRule(NamedTuple):
+    stat: str       # Stand Coin stat the grade is read from
+    table: dict     # grade -> value
+    missing: int    # no grade recorded (or no Stand)
+    unknown: int    # a grade outside S..F
+
+    def value(self, grade):
+        if grade is None:
+            return self.missing
+        return self.table.get(grade, self.unknown)
+
+    def case(self, lookup):
+        """The rule as a database expression over the grade at ``lookup``."""
+        return Case(
+            When(Q(**{f'{lookup}__isnull': True}) | Q(**{lookup: None}), then=Value(self.missing)),
+            *[When(**{lookup: grade}, then=Value(value)) for grade, value in self.table.items()],
+            default=Value(self.unknown),
+            output_field=IntegerField(),
+        )
+
+
+NPC_RULES = {
+    'regular_armor_charges': GradeRule('durability', {'S': 5, 'A': 4, 'B': 3, 'C': 2, 'D': 2, 'F': 1}, 1, 1),
+    # Special armor completely negates harm/consequences.
+    'special_armor_charges': GradeRule('durability', {'S': 3, 'A': 3, 'B': 2, 'C': 1, 'D': 1, 'F': 0}, 0, 0),
+    # S: a special condition, cannot be defeated by normal harm.
+    'vulnerability_clock_max': GradeRule('durability', {'S': 0, 'A': 12, 'B': 10, 'C': 8, 'D': 6, 'F': 4}, 4, 0),
+    'movement_speed': GradeRule('speed', {'S': 200, 'A': 60, 'B': 40, 'C': 35, 'D': 30, 'F': 25}, 25, 0),
+}
+
+CHARACTER_RULES = {
+    # SRD: Durability sets stress capacity. Base 9; S +4, A +3, B +2, C +1, D 0, F -1.
+    'stress_capacity': GradeRule('durability', {'S': 13, 'A': 12, 'B': 11, 'C': 10, 'D': 9, 'F': 8}, 9, 9),
+    'development_xp_bonus': GradeRule('development', {'S': 5, 'A': 4, 'B': 3, 'C': 2, 'D': 1, 'F': 0}, 0, 0),
+}
+
+
+def grade_rank(lookup):
+    """A grade's Stand Coin points (S=5 .. F=0, -1 if missing or invalid), for ordering by grade."""
+    return Case(
+        *[When(**{lookup: grade}, then=Value(points)) for grade, points in GRADE_POINTS.items()],
+        default=Value(-1),
+        output_field=IntegerField(),
+    )
+
+
+def grades_between(low=None, high=None):
+    """The grades from ``low`` up to ``high`` (either end open), e.g. ``grades_between('B')`` is S, A, B."""
+    low_points = GRADE_POINTS[low] if low else min(GRADE_POINTS.values())
+    high_points = GRADE_POINTS[high] if high else max(GRADE_POINTS.values())
+    return [grade for grade, points in GRADE_POINTS.items() if low_points <= points <= high_points]
+
+
+def npc_grade(npc, stat):
+    stats = npc.stand_coin_stats
+    return stats.get(stat.upper()) if isinstance(stats, dict) else None
+
+
+def stand_grade(character, stat):
+    stand = getattr(character, 'stand', None)
+    return getattr(stand, stat, None) if stand is not None else None
+
+
+class DerivedStat:
+    """A model attribute computed from a GradeRule; a same-named annotation takes precedence."""
+
+    def __init__(self, rule, grade_of):
+        self.rule = rule
+        self.grade_of = grade_of
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        if self.name in instance.__dict__:
+            return instance.__dict__[self.name]
+        return self.rule.value(self.grade_of(instance, self.rule.stat))
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.name] = value
+
+
+def forget_annotations(instance):
+    """Drop annotated derived stats from ``instance`` so they are computed from its current grades."""
+    for name, attr in vars(type(instance)).items():
+        if isinstance(attr, DerivedStat):
+            instance.__dict__.pop(name, None)
+
+
+def npc_annotations(*names):
+    """``{name: Case(...)}`` for ``NPC.objects.annotate(**...)``; all NPC rules by default."""
+    return {name: NPC_RULES[name].case(f'stand_coin_stats__{NPC_RULES[name].stat.upper()}')
+            for name in names or NPC_RULES}
+
+
+def character_annotations(*names):
+    """``{name: Case(...)}`` for ``Character.objects.annotate(**...)``; all character rules by default."""
+    return {name: CHARACTER_RULES[name].case(f'stand__{CHARACTER_RULES[name].stat}')
+            for name in names or CHARACTER_RULES}
+
+
+@lru_cache(maxsize=None)
+def _resolve(rules_key, grades):
+    rules = NPC_RULES if rules_key == 'npc' else CHARACTER_RULES
+    by_stat = dict(grades)
+    return {name: rule.value(by_stat.get(rule.stat)) for name, rule in rules.items()}
+
+
+def _hashable(grade):
+    return grade if grade is None or isinstance(grade, str) else repr(grade)
+
+
+def npc_stats(queryset):
+    """``{npc_id: {stat: value}}`` for every NPC in ``queryset``, from one query."""
+    stats = {rule.stat for rule in NPC_RULES.values()}
+    result = {}
+    for pk, coin_stats in queryset.values_list('pk', 'stand_coin_stats'):
+        coin_stats = coin_stats if isinstance(coin_stats, dict) else {}
+        grades = tuple(sorted((stat, _hashable(coin_stats.get(stat.upper()))) for stat in stats))
+        result[pk] = dict(_resolve('npc', grades))
+    return result
+
+
+def character_stats(queryset):
+    """``{character_id: {stat: value}}`` for every character in ``queryset``, from one query."""
+    stats = sorted({rule.stat for rule in CHARACTER_RULES.values()})
+    result = {}
+    for pk, *values in queryset.values_list('pk', *[f'stand__{stat}' for stat in stats]):
+        result[pk] = dict(_resolve('character', tuple(zip(stats, values))))
+    return result
@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from characters.models import Session
+from characters.services.archive_service import SessionArchiveService
+
+
+class Command(BaseCommand):
+    help = 'Move the records of completed sessions out of the hot tables into compressed archives.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--session', type=int, action='append', help='Only these session ids.')
+        parser.add_argument('--older-than-days', type=int, default=settings.SESSION_ARCHIVE_AFTER_DAYS,
+                            help='Archive completed sessions dated more than this many days ago.')
+        parser.add_argument('--restore', action='store_true',
+                            help='Move archived records of the given --session ids back into the hot tables.')
+
+    def handle(self, *args, **options):
+        if options['restore']:
+            if not options['session']:
+                raise CommandError('--restore needs at least one --session')
+            for session in Session.objects.filter(pk__in=options['session'], archive__isnull=False):
+                SessionArchiveService.restore(session)
+                self.stdout.write(self.style.SUCCESS(f'Restored {session.name} (#{session.pk})'))
+            return
+
+        sessions = Session.objects.filter(status='COMPLETED', archive__isnull=True).order_by('pk')
+        if options['session']:
+            sessions = sessions.filter(pk__in=options['session'])
+        else:
+            sessions = sessions.filter(session_date__lt=timezone.now() - timedelta(days=options['older_than_days']))
+
+        for session in sessions:
+            archive = SessionArchiveService.archive(session)
+            self.stdout.write(self.style.SUCCESS(
+                f'Archived {session.name} (#{session.pk}): {sum(archive.record_counts.values())} records'
+            ))
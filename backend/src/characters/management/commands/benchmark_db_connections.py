@@ -0,0 +1,84 @@
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+
+from characters.models import Campaign
+
+
+PROFILES = {
+    # A fresh connection (TCP + auth) for every request.
+    'direct': {'CONN_MAX_AGE': 0, 'OPTIONS': {}},
+    # One long-lived connection per thread.
+    'persistent': {'CONN_MAX_AGE': 60, 'OPTIONS': {}},
+    # Connections borrowed from a psycopg 3 pool shared by the process's threads.
+    'pooled': {'CONN_MAX_AGE': 0, 'OPTIONS': {'pool': {'min_size': 2, 'max_size': 10}}},
+}
+
+
+class Command(BaseCommand):
+    help = 'Measure requests/sec against the default Postgres database with direct, persistent and pooled connections.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=20, help='Concurrent simulated clients (threads).')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per client.')
+        parser.add_argument('--profile', choices=sorted(PROFILES), action='append',
+                            help='Profile(s) to run; default runs all of them.')
+
+    def handle(self, *args, **options):
+        base = connections.settings['default']
+        if base['ENGINE'] != 'django.db.backends.postgresql':
+            raise CommandError('Run with a PostgreSQL default database, e.g. DJANGO_SETTINGS_MODULE=app.settings_prod.')
+
+        for name in options['profile'] or ['direct', 'persistent', 'pooled']:
+            alias = f'bench_{name}'
+            options_ = dict(base.get('OPTIONS', {}), **PROFILES[name]['OPTIONS'])
+            if name != 'pooled':
+                options_.pop('pool', None)
+            connections.settings[alias] = dict(base, CONN_MAX_AGE=PROFILES[name]['CONN_MAX_AGE'], OPTIONS=options_)
+            try:
+                result = self._run(alias, options['clients'], options['requests'])
+            finally:
+                if name == 'pooled':
+                    connections[alias].close_pool()
+                connections[alias].close()
+            self.stdout.write(
+                f"{name:>10}: {result['requests_per_sec']:8.1f} requests/sec  "
+                f"p50 {result['p50_ms']:6.2f} ms  p95 {result['p95_ms']:6.2f} ms"
+            )
+
+    def _run(self, alias, clients, requests):
+        latencies = []
+        lock = threading.Lock()
+        start_gate = threading.Barrier(clients)
+
+        def client():
+            mine = []
+            start_gate.wait()
+            for _ in range(requests):
+                started = time.perf_counter()
+                # The same connection handling Django does on request_started / request_finished.
+                close_old_connections()
+                Campaign.objects.using(alias).filter(is_active=True).exists()
+                close_old_connections()
+                mine.append(time.perf_counter() - started)
+            connections[alias].close()
+            with lock:
+                latencies.extend(mine)
+
+        threads = [threading.Thread(target=client) for _ in range(clients)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            'requests_per_sec': len(latencies) / elapsed if elapsed else 0.0,
+            'p50_ms': statistics.median(latencies) * 1000 if latencies else 0.0,
+            'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0.0,
+        }
@@ -0,0 +1,144 @@
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections, transaction
+from django.db.models import F
+
+from app.write_queue import WriteQueue
+from characters.models import Campaign, Character, Roll, RollHistory, Session, StressHistory
+from django.contrib.auth.models import User
+
+
+PROFILES = {
+    # Plain SQLite as Django opens it: rollback journal, deferred transactions.
+    'baseline': {'PRAGMAS': {}, 'CONN_MAX_AGE': 0, 'OPTIONS': {}},
+    # What settings.py configures for the default database.
+    'tuned': {'PRAGMAS': None, 'CONN_MAX_AGE': 600, 'OPTIONS': {'transaction_mode': 'IMMEDIATE'}},
+    # Tuned, with the roll writes going through app.write_queue.
+    'queued': {'PRAGMAS': None, 'CONN_MAX_AGE': 600, 'OPTIONS': {'transaction_mode': 'IMMEDIATE'}},
+}
+
+
+class Command(BaseCommand):
+    help = 'Measure rolls/sec on a scratch SQLite file with concurrent simulated players: untuned, tuned, and tuned with the write queue.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--players', type=int, default=20, help='Concurrent simulated players (threads).')
+        parser.add_argument('--rolls', type=int, default=50, help='Rolls per player.')
+        parser.add_argument('--profile', choices=sorted(PROFILES), action='append',
+                            help='Profile(s) to run; default runs all of them.')
+
+    def handle(self, *args, **options):
+        workdir = tempfile.mkdtemp(prefix='jojo-bench-')
+        try:
+            for name in options['profile'] or ['baseline', 'tuned', 'queued']:
+                path = os.path.join(workdir, f'{name}.sqlite3')
+                alias = self._add_database(name, path)
+                writer = WriteQueue(alias, lock_path=f'{path}.writelock') if name == 'queued' else None
+                try:
+                    character_ids, session_id = self._seed(alias, options['players'])
+                    result = self._run(alias, character_ids, session_id, options['rolls'], writer)
+                finally:
+                    connections[alias].close()
+                self.stdout.write(
+                    f"{name:>8}: {result['rolls_per_sec']:8.1f} rolls/sec  "
+                    f"p50 {result['p50_ms']:7.1f} ms  p95 {result['p95_ms']:7.1f} ms  "
+                    f"errors {result['errors']}"
+                )
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def _add_database(self, profile, path):
+        alias = f'bench_{profile}'
+        config = dict(connections.settings['default'], NAME=path, TEST={}, **PROFILES[profile])
+        if config['PRAGMAS'] is None:
+            del config['PRAGMAS']
+        connections.settings[alias] = config
+        call_command('migrate', database=alias, verbosity=0)
+        return alias
+
+    def _seed(self, alias, players):
+        gm = User.objects.db_manager(alias).create_user(username='bench-gm', password='bench')
+        campaign = Campaign.objects.using(alias).create(name='Benchmark', gm=gm)
+        session = Session.objects.using(alias).create(campaign=campaign, name='Benchmark session', status='ACTIVE')
+        character_ids = []
+        for i in range(players):
+            user = User.objects.db_manager(alias).create_user(username=f'bench-player-{i}', password='bench')
+            character = Character.objects.using(alias).create(
+                true_name=f'Player {i}', user=user, campaign=campaign, stress=9,
+                action_dots={'hunt': 2, 'study': 1, 'skirmish': 2},
+            )
+            character_ids.append(character.id)
+        return character_ids, session.id
+
+    def _run(self, alias, character_ids, session_id, rolls, writer=None):
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+        start_gate = threading.Barrier(len(character_ids))
+
+        def player(character_id):
+            mine, failed = [], 0
+            start_gate.wait()
+            for _ in range(rolls):
+                started = time.perf_counter()
+                try:
+                    self._roll(alias, character_id, session_id, writer)
+                except OperationalError:
+                    failed += 1
+                else:
+                    mine.append(time.perf_counter() - started)
+                # Each request is its own connection unless CONN_MAX_AGE keeps it open.
+                connections[alias].close_if_unusable_or_obsolete()
+            connections[alias].close()
+            with lock:
+                latencies.extend(mine)
+                errors.append(failed)
+
+        threads = [threading.Thread(target=player, args=(cid,)) for cid in character_ids]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            'rolls_per_sec': len(latencies) / elapsed if elapsed else 0.0,
+            'p50_ms': statistics.median(latencies) * 1000 if latencies else 0.0,
+            'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0.0,
+            'errors': sum(errors),
+        }
+
+    def _roll(self, alias, character_id, session_id, writer=None):
+        """The writes of a pushed roll_action: Roll + RollHistory + stress, plus the dice-log poll."""
+        # values(): Character.__init__ reads every FK, which would hit the default database.
+        character = Character.objects.using(alias).values('campaign_id', 'action_dots').get(id=character_id)
+        results = [random.randint(1, 6) for _ in range(3)]
+
+        def write():
+            roll = Roll.objects.using(alias).create(
+                character_id=character_id, session_id=session_id, roll_type='ACTION', action_name='hunt',
+                position='risky', effect='standard', dice_pool=len(results), results=results,
+                outcome='FULL_SUCCESS' if max(results) >= 4 else 'PARTIAL_SUCCESS', description='hunt roll',
+            )
+            RollHistory.objects.using(alias).create(campaign_id=character['campaign_id'], roll=roll)
+            StressHistory.objects.using(alias).create(
+                character_id=character_id, session_id=session_id, amount=0, reason='benchmark roll'
+            )
+            Character.objects.using(alias).filter(id=character_id).update(stress=F('stress'))
+
+        if writer is not None:
+            writer.submit(write)
+        else:
+            with transaction.atomic(using=alias):
+                write()
+        list(Roll.objects.using(alias).filter(session_id=session_id).order_by('-id')[:20])
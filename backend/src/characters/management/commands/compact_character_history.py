@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from characters.models import CharacterHistory
+from characters.services.history_service import CharacterHistoryService
+
+
+class Command(BaseCommand):
+    help = 'Merge old character history deltas into one per day and fold expired entries into a single snapshot.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--character', type=int, action='append', help='Only compact these character ids.')
+        parser.add_argument('--compact-after-days', type=int, default=settings.CHARACTER_HISTORY_COMPACT_AFTER_DAYS,
+                            help='Merge deltas older than this many days.')
+        parser.add_argument('--retention-days', type=int, default=settings.CHARACTER_HISTORY_RETENTION_DAYS,
+                            help='Keep individual entries for this many days; older ones become one snapshot.')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        merge_before = now - timedelta(days=options['compact_after_days'])
+        retain_after = now - timedelta(days=options['retention_days'])
+
+        character_ids = options['character'] or (
+            CharacterHistory.objects.filter(timestamp__lt=max(merge_before, retain_after))
+            .values_list('character_id', flat=True).distinct().order_by('character_id')
+        )
+        total = 0
+        for character_id in character_ids:
+            total += CharacterHistoryService.compact(character_id, merge_before, retain_after)
+        self.stdout.write(self.style.SUCCESS(f'Removed {total} character history entries'))
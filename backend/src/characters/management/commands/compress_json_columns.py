@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from app.compressed_json import CompressedJSONField
+from characters.models import Character, NPC
+
+
+class Command(BaseCommand):
+    help = ('Rewrite the compressed JSON columns of characters and NPCs so every row matches the '
+            'COMPRESSED_JSON_* settings (compressing large values, or decompressing when disabled).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+
+    def handle(self, *args, **options):
+        mode = 'compressing' if settings.COMPRESSED_JSON_ENABLED else 'decompressing'
+        for model in (Character, NPC):
+            fields = [f.attname for f in model._meta.concrete_fields if isinstance(f, CompressedJSONField)]
+            rows = model.objects.order_by('pk').values_list('pk', *fields)
+            rewritten = 0
+            batch = []
+            for row in rows.iterator(chunk_size=options['batch_size']):
+                batch.append(row)
+                if len(batch) >= options['batch_size']:
+                    rewritten += self._rewrite(model, fields, batch)
+                    batch = []
+            rewritten += self._rewrite(model, fields, batch)
+            self.stdout.write(self.style.SUCCESS(
+                f'{model._meta.verbose_name_plural}: rewrote {rewritten} rows ({mode}, {", ".join(fields)})'
+            ))
+
+    def _rewrite(self, model, fields, batch):
+        # update() skips save() and its signals; the values themselves do not change.
+        with transaction.atomic():
+            for pk, *values in batch:
+                model.objects.filter(pk=pk).update(**dict(zip(fields, values)))
+        return len(batch)
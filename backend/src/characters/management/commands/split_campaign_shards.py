@@ -0,0 +1,70 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from app import sharding
+from characters.models import Campaign, ChatMessage, Roll, RollHistory, SessionEvent
+
+
+# Parents before children, so RollHistory rows find their Roll in the shard.
+SHARDED_QUERIES = [
+    (Roll, 'session__campaign_id'),
+    (RollHistory, 'campaign_id'),
+    (SessionEvent, 'session__campaign_id'),
+    (ChatMessage, 'campaign_id'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Move each campaign\'s rolls, roll history, session events and chat from the default database into its shard.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--campaign', type=int, action='append', help='Only split these campaign ids.')
+        parser.add_argument('--keep-source', action='store_true', help='Copy without deleting the rows from default.')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--migrate', action='store_true',
+                            help='Instead of splitting, apply pending migrations to every existing shard.')
+
+    def handle(self, *args, **options):
+        if not sharding.enabled():
+            raise CommandError('Set CAMPAIGN_SHARDING = True (env CAMPAIGN_SHARDING=1) first.')
+
+        if options['migrate']:
+            for alias in sharding.existing_shards():
+                call_command('migrate', database=alias, verbosity=0)
+                self.stdout.write(self.style.SUCCESS(f'Migrated {alias}'))
+            return
+
+        campaigns = Campaign.objects.using(DEFAULT_DB_ALIAS).order_by('pk')
+        if options['campaign']:
+            campaigns = campaigns.filter(pk__in=options['campaign'])
+
+        for campaign in campaigns:
+            alias = sharding.shard_alias(campaign.pk)
+            counts = []
+            with transaction.atomic(using=alias):
+                for model, campaign_field in SHARDED_QUERIES:
+                    source = model.objects.using(DEFAULT_DB_ALIAS).filter(**{campaign_field: campaign.pk})
+                    with sharding.keep_timestamps(model):
+                        moved = self._copy(source, alias, options['batch_size'])
+                    counts.append(f'{moved} {model._meta.verbose_name_plural}')
+            # Only delete once the shard has committed the copies.
+            if not options['keep_source']:
+                with transaction.atomic(using=DEFAULT_DB_ALIAS):
+                    for model, campaign_field in reversed(SHARDED_QUERIES):
+                        model.objects.using(DEFAULT_DB_ALIAS).filter(**{campaign_field: campaign.pk}).delete()
+            self.stdout.write(self.style.SUCCESS(f'{campaign.name} (#{campaign.pk}) -> {alias}: ' + ', '.join(counts)))
+
+    def _copy(self, source, alias, batch_size):
+        existing = set(source.model.objects.using(alias).values_list('pk', flat=True))
+        batch, moved = [], 0
+        for obj in source.order_by('pk').iterator(chunk_size=batch_size):
+            if obj.pk in existing:
+                continue
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                moved += len(source.model.objects.using(alias).bulk_create(batch))
+                batch = []
+        if batch:
+            moved += len(source.model.objects.using(alias).bulk_create(batch))
+        return moved
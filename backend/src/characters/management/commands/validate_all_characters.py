@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from characters.models import Character
+from characters.validation import MODEL_RULES, RULES, facts_for, summarize, validate_characters
+
+
+class Command(BaseCommand):
+    help = ('Check every character sheet against the validation rules and list the ones that break them. '
+            'Reads characters in chunks, a few queries per chunk; nothing is written.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--campaign', type=int, help='Only characters in this campaign')
+        parser.add_argument('--rules', nargs='+', choices=sorted(RULES), default=list(MODEL_RULES),
+                            help=f'Rules to check (default: {" ".join(MODEL_RULES)})')
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        characters = Character.objects.all()
+        if options['campaign'] is not None:
+            characters = characters.filter(campaign_id=options['campaign'])
+
+        checked = 0
+
+        def counted(facts):
+            nonlocal checked
+            for character in facts:
+                checked += 1
+                yield character
+
+        results = validate_characters(counted(facts_for(characters, options['chunk_size'])), options['rules'])
+        for character_id, issues in results.items():
+            for issue in issues:
+                self.stdout.write(f'Character {character_id}: {issue.field}: {issue.message}')
+
+        for code, count in summarize(results):
+            self.stdout.write(f'{code}: {count}')
+        style = self.style.WARNING if results else self.style.SUCCESS
+        self.stdout.write(style(f'{len(results)} of {checked} characters have problems'))
@@ -0,0 +1,88 @@
+# Generated by Django 5.2 on 2026-10-19 12:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characters', '0013_add_npc_faction'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='campaigninvitation',
+            name='invited_user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='campaign_invitations', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='characterhistory',
+            name='character',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='history_entries', to='characters.character'),
+        ),
+        migrations.AlterField(
+            model_name='chatmessage',
+            name='campaign',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='chat_messages', to='characters.campaign'),
+        ),
+        migrations.AlterField(
+            model_name='npc',
+            name='campaign',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='npcs', to='characters.campaign'),
+        ),
+        migrations.AlterField(
+            model_name='progressclock',
+            name='campaign',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='progress_clocks', to='characters.campaign'),
+        ),
+        migrations.AlterField(
+            model_name='roll',
+            name='character',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='rolls', to='characters.character'),
+        ),
+        migrations.AlterField(
+            model_name='roll',
+            name='session',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='rolls', to='characters.session'),
+        ),
+        migrations.AlterField(
+            model_name='sessionevent',
+            name='session',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='events', to='characters.session'),
+        ),
+        migrations.AddIndex(
+            model_name='campaigninvitation',
+            index=models.Index(fields=['invited_user', 'status'], name='invite_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='characterhistory',
+            index=models.Index(fields=['character', 'timestamp'], name='charhistory_char_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['campaign', 'timestamp'], name='chat_campaign_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='npc',
+            index=models.Index(fields=['campaign', 'faction'], name='npc_campaign_faction_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='progressclock',
+            index=models.Index(fields=['campaign', 'visible_to_players'], name='clock_campaign_visible_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='roll',
+            index=models.Index(fields=['session', 'timestamp'], name='roll_session_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='roll',
+            index=models.Index(fields=['character', 'timestamp'], name='roll_character_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sessionevent',
+            index=models.Index(fields=['session', 'timestamp'], name='sessionevent_session_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,122 @@
+# Generated by Django 5.2 on 2026-10-19 12:12
+
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import migrations, models, router
+from django.db.models.fields.files import FieldFile
+from django.utils import timezone
+
+
+SNAPSHOT_EVERY = 20
+
+
+def _pack(values):
+    return zlib.compress(json.dumps(values, cls=DjangoJSONEncoder, separators=(',', ':')).encode())
+
+
+def _unpack(payload):
+    return json.loads(zlib.decompress(bytes(payload))) if payload else {}
+
+
+def convert_history(apps, schema_editor):
+    """Rewrite the old {field: {'old', 'new'}} rows as snapshots and deltas of the new values.
+
+    Old values were stringified, so each character with history also gets a fresh snapshot
+    of its current row; deltas recorded from now on diff against real field values.
+    """
+    Character = apps.get_model('characters', 'Character')
+    CharacterHistory = apps.get_model('characters', 'CharacterHistory')
+    db = schema_editor.connection.alias
+    if not router.allow_migrate_model(db, CharacterHistory):
+        return
+    character_ids = CharacterHistory.objects.using(db).values_list('character_id', flat=True).distinct()
+    for character_id in list(character_ids):
+        state, since_snapshot, empty = {}, None, []
+        for entry in CharacterHistory.objects.using(db).filter(character_id=character_id).order_by('timestamp', 'pk'):
+            new = {name: change.get('new') if isinstance(change, dict) else change
+                   for name, change in (entry.changed_fields or {}).items()}
+            changes = {name: value for name, value in new.items() if state.get(name) != value}
+            state.update(new)
+            if since_snapshot is None or since_snapshot >= SNAPSHOT_EVERY:
+                entry.kind, entry.payload, since_snapshot = 'SNAPSHOT', _pack(state), 0
+            elif changes:
+                entry.kind, entry.payload = 'DELTA', _pack(changes)
+                since_snapshot += 1
+            else:
+                empty.append(entry.pk)
+                continue
+            entry.save(update_fields=['kind', 'payload'])
+        CharacterHistory.objects.using(db).filter(pk__in=empty).delete()
+
+        character = Character.objects.using(db).get(pk=character_id)
+        current = {}
+        for field in character._meta.concrete_fields:
+            if not field.primary_key:
+                value = field.value_from_object(character)
+                current[field.attname] = (value.name or '') if isinstance(value, FieldFile) else value
+        CharacterHistory.objects.using(db).create(
+            character_id=character_id, timestamp=timezone.now(), kind='SNAPSHOT', payload=_pack(current),
+            changed_fields={},
+        )
+
+
+def rebuild_changed_fields(apps, schema_editor):
+    """Replay the snapshots and deltas back into {field: {'old', 'new'}} rows of stringified values.
+
+    Keys stay as stored in the payload (``heritage_id`` rather than ``heritage``), and rows
+    that change nothing are dropped, as the old signal never wrote them.
+    """
+    CharacterHistory = apps.get_model('characters', 'CharacterHistory')
+    db = schema_editor.connection.alias
+    if not router.allow_migrate_model(db, CharacterHistory):
+        return
+    character_ids = CharacterHistory.objects.using(db).values_list('character_id', flat=True).distinct()
+    for character_id in list(character_ids):
+        state, empty = {}, []
+        for entry in CharacterHistory.objects.using(db).filter(character_id=character_id).order_by('timestamp', 'pk'):
+            values = {name: str(value) for name, value in _unpack(entry.payload).items()}
+            changed = {name: {'old': state.get(name), 'new': value}
+                       for name, value in values.items() if state.get(name) != value}
+            if entry.kind == 'SNAPSHOT':
+                state = values
+            else:
+                state.update(values)
+            if not changed:
+                empty.append(entry.pk)
+                continue
+            entry.changed_fields = changed
+            entry.save(update_fields=['changed_fields'])
+        CharacterHistory.objects.using(db).filter(pk__in=empty).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characters', '0014_add_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='characterhistory',
+            name='kind',
+            field=models.CharField(choices=[('SNAPSHOT', 'Snapshot'), ('DELTA', 'Delta')], default='DELTA', max_length=8),
+        ),
+        migrations.AddField(
+            model_name='characterhistory',
+            name='payload',
+            field=models.BinaryField(default=bytes),
+        ),
+        migrations.RunPython(convert_history, rebuild_changed_fields),
+        # A default lets the column be added back to existing rows when migrating backwards.
+        migrations.AlterField(
+            model_name='characterhistory',
+            name='changed_fields',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.RemoveField(
+            model_name='characterhistory',
+            name='changed_fields',
+        ),
+    ]
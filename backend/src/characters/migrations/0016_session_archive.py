@@ -0,0 +1,24 @@
+# Generated by Django 5.2 on 2026-10-19 12:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characters', '0015_character_history_snapshots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('record_counts', models.JSONField(default=dict, help_text='Rows archived per model, readable without decompressing')),
+                ('payload', models.BinaryField(help_text='zlib-compressed JSON of the archived rows')),
+                ('session', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='archive', to='characters.session')),
+            ],
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.2 on 2026-10-19 12:21
+
+import app.compressed_json
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characters', '0016_session_archive'),
+    ]
+
+    # Same column type as JSONField; only the Python-side field class changes.
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='character',
+                    name='action_dots',
+                    field=app.compressed_json.CompressedJSONField(default=dict),
+                ),
+                migrations.AlterField(
+                    model_name='character',
+                    name='coin_stats',
+                    field=app.compressed_json.CompressedJSONField(blank=True, default=dict),
+                ),
+                migrations.AlterField(
+                    model_name='character',
+                    name='extra_custom_abilities',
+                    field=app.compressed_json.CompressedJSONField(blank=True, default=list, null=True),
+                ),
+                migrations.AlterField(
+                    model_name='character',
+                    name='faction_reputation',
+                    field=app.compressed_json.CompressedJSONField(blank=True, default=list, null=True),
+                ),
+                migrations.AlterField(
+                    model_name='character',
+                    name='gm_allowed_edit_fields',
+                    field=app.compressed_json.CompressedJSONField(blank=True, default=dict, null=True),
+                ),
+                migrations.AlterField(
+                    model_name='character',
+                    name='inventory',
+                    field=app.compressed_json.CompressedJSONField(blank=True, default=list, help_text='List of items the character possesses'),
+                ),
+                migrations.AlterField(
+                    model_name='character',
+                    name='reputation_status',
+                    field=app.compressed_json.CompressedJSONField(blank=True, default=dict, help_text="Tracks character's reputation with allies, rivals, and factions (e.g., {'Faction Name': 2, 'NPC Name': -1})"),
+                ),
+                migrations.AlterField(
+                    model_name='character',
+                    name='xp_clocks',
+                    field=app.compressed_json.CompressedJSONField(blank=True, default=dict),
+                ),
+                migrations.AlterField(
+                    model_name='npc',
+                    name='contacts',
+                    field=app.compressed_json.CompressedJSONField(blank=True, default=list),
+                ),
+                migrations.AlterField(
+                    model_name='npc',
+                    name='faction_status',
+                    field=app.compressed_json.CompressedJSONField(blank=True, default=dict),
+                ),
+                migrations.AlterField(
+                    model_name='npc',
+                    name='inventory',
+                    field=app.compressed_json.CompressedJSONField(blank=True, default=list),
+                ),
+                migrations.AlterField(
+                    model_name='npc',
+                    name='items',
+                    field=app.compressed_json.CompressedJSONField(blank=True, default=list),
+                ),
+                migrations.AlterField(
+                    model_name='npc',
+                    name='relationships',
+                    field=app.compressed_json.CompressedJSONField(default=dict),
+                ),
+            ],
+            database_operations=[],
+        ),
+    ]
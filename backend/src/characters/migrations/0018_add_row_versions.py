@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-19 12:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characters', '0017_compressed_json_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='campaign',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='character',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='crew',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
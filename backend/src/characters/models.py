@@ -3,11 +3,21 @@ from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
 import json
+import zlib
 
+from app.compressed_json import CompressedJSONField, CompressedJSONQuerySet, unpack
+from app.sharding import CampaignShardQuerySet
+from app.tracing import traced
+from app.versioning import VersionedModel
+from .derived_stats import (
+    CHARACTER_RULES, NPC_RULES, DerivedStat, forget_annotations, npc_grade, stand_grade,
+)
 
-class Campaign(models.Model):
+
+class Campaign(VersionedModel):
     name = models.CharField(max_length=100)
     gm = models.ForeignKey(User, on_delete=models.CASCADE, related_name='campaigns_led')
     players = models.ManyToManyField(User, related_name='campaigns_joined', blank=True)
@@ -36,13 +46,17 @@ class CampaignInvitation(models.Model):
     ]
 
     campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name='invitations')
-    invited_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='campaign_invitations')
+    invited_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='campaign_invitations', db_index=False)
     invited_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sent_invitations')
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         unique_together = ('campaign', 'invited_user')
+        indexes = [
+            # A user's pending invitations.
+            models.Index(fields=['invited_user', 'status'], name='invite_user_status_idx'),
+        ]
 
     def __str__(self):
         return f"{self.invited_user.username} invited to {self.campaign.name} ({self.status})"
@@ -103,7 +117,7 @@ class CrewUpgrade(models.Model):
     def __str__(self):
         return f"{self.name} ({self.total_boxes} boxes)"
 
-class Crew(models.Model):
+class Crew(VersionedModel):
     name = models.CharField(max_length=100)
     campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name='crews')
     playbook = models.ForeignKey(CrewPlaybook, on_delete=models.SET_NULL, null=True, blank=True)
@@ -196,12 +210,12 @@ class NPC(models.Model):
     heritage = models.ForeignKey(Heritage, on_delete=models.SET_NULL, null=True, blank=True)
     playbook = models.CharField(max_length=20, choices=PLAYBOOK_CHOICES, default='STAND')
     custom_abilities = models.TextField(blank=True)
-    relationships = models.JSONField(default=dict)
+    relationships = CompressedJSONField(default=dict)
     harm_clock_current = models.IntegerField(default=0)
     vulnerability_clock_current = models.IntegerField(default=0)
     armor_charges = models.IntegerField(default=0)
     creator = models.ForeignKey(User, on_delete=models.CASCADE, related_name='created_npcs')
-    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, null=True, blank=True, related_name='npcs')
+    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, null=True, blank=True, related_name='npcs', db_index=False)
     faction = models.ForeignKey(Faction, on_delete=models.SET_NULL, null=True, blank=True, related_name='npcs')
     image = models.ImageField(upload_to='npc_images/', null=True, blank=True)
     image_url = models.URLField(max_length=500, blank=True, default='')
@@ -216,76 +230,29 @@ class NPC(models.Model):
     # New fields for Alonzo Fortuna
     purveyor = models.CharField(max_length=100, blank=True)
     notes = models.TextField(blank=True)
-    items = models.JSONField(default=list, blank=True)
-    contacts = models.JSONField(default=list, blank=True)
-    faction_status = models.JSONField(default=dict, blank=True)
-    inventory = models.JSONField(default=list, blank=True)
+    items = CompressedJSONField(default=list, blank=True)
+    contacts = CompressedJSONField(default=list, blank=True)
+    faction_status = CompressedJSONField(default=dict, blank=True)
+    inventory = CompressedJSONField(default=list, blank=True)
 
     harm_clock_max = models.IntegerField(default=4)
 
-    @property
-    def regular_armor_charges(self):
-        """Regular armor charges based on durability grade."""
-        durability_grade = self.stand_coin_stats.get('DURABILITY', 'F')
-        if durability_grade == 'S':
-            return 5
-        elif durability_grade == 'A':
-            return 4
-        elif durability_grade == 'B':
-            return 3
-        elif durability_grade == 'C':
-            return 2
-        elif durability_grade == 'D':
-            return 2
-        else: # F
-            return 1
+    objects = CompressedJSONQuerySet.as_manager()
 
-    @property
-    def special_armor_charges(self):
-        """Special armor charges that completely negate harm/consequences."""
-        durability_grade = self.stand_coin_stats.get('DURABILITY', 'F')
-        if durability_grade in ['S', 'A']:
-            return 3
-        elif durability_grade == 'B':
-            return 2
-        elif durability_grade in ['C', 'D']:
-            return 1
-        else: # F
-            return 0
+    class Meta:
+        indexes = [
+            models.Index(fields=['campaign', 'faction'], name='npc_campaign_faction_idx'),
+        ]
 
-    @property
-    def vulnerability_clock_max(self):
-        durability_grade = self.stand_coin_stats.get('DURABILITY', 'F')
-        if durability_grade == 'S':
-            return 0  # Indicates a special condition; cannot be defeated by normal harm.
-        elif durability_grade == 'A':
-            return 12
-        elif durability_grade == 'B':
-            return 10
-        elif durability_grade == 'C':
-            return 8
-        elif durability_grade == 'D':
-            return 6
-        elif durability_grade == 'F':
-            return 4
-        return 0
+    regular_armor_charges = DerivedStat(NPC_RULES['regular_armor_charges'], npc_grade)
+    special_armor_charges = DerivedStat(NPC_RULES['special_armor_charges'], npc_grade)
+    vulnerability_clock_max = DerivedStat(NPC_RULES['vulnerability_clock_max'], npc_grade)
+    movement_speed = DerivedStat(NPC_RULES['movement_speed'], npc_grade)
 
-    @property
-    def movement_speed(self):
-        speed_grade = self.stand_coin_stats.get('SPEED', 'F')
-        if speed_grade == 'S':
-            return 200
-        elif speed_grade == 'A':
-            return 60
-        elif speed_grade == 'B':
-            return 40
-        elif speed_grade == 'C':
-            return 35
-        elif speed_grade == 'D':
-            return 30
-        elif speed_grade == 'F':
-            return 25
-        return 0
+    def save(self, *args, **kwargs):
+        # stand_coin_stats may have changed since the derived stats were annotated.
+        forget_annotations(self)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.name} (NPC for {self.campaign.name})"
@@ -324,15 +291,21 @@ class Ability(models.Model):
     category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, default="aggression")
 
 
-class Character(models.Model):
+class Character(VersionedModel):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self._original_data = {field.name: getattr(self, field.name) for field in self._meta.fields}
+        # Compressed JSON stays packed until a GM-locked field needs comparing.
+        self._original_data = {
+            field.name: self.__dict__[field.attname]
+            if isinstance(field, CompressedJSONField) and field.attname in self.__dict__
+            else getattr(self, field.name)
+            for field in self._meta.fields
+        }
 
     def save(self, *args, **kwargs):
         if self.pk:  # Only enforce for existing objects (not on creation)
             for field_name in self.gm_locked_fields:
-                if field_name in self._original_data and getattr(self, field_name) != self._original_data[field_name]:
+                if field_name in self._original_data and getattr(self, field_name) != unpack(self._original_data[field_name]):
                     raise ValidationError(f'Field \'{field_name}\' is locked by the GM and cannot be changed.')
         super().save(*args, **kwargs)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -345,24 +318,8 @@ class Character(models.Model):
     image = models.ImageField(upload_to='character_images/', blank=True, null=True)
     image_url = models.URLField(max_length=500, blank=True, default='')
 
-    @property
-    def development_xp_bonus(self):
-        if not hasattr(self, 'stand'):
-            return 0  # Or handle as an error, depending on game rules for non-Stand users
-
-        dev_grade = self.stand.development
-        if dev_grade == 'S':
-            return 5
-        elif dev_grade == 'A':
-            return 4
-        elif dev_grade == 'B':
-            return 3
-        elif dev_grade == 'C':
-            return 2
-        elif dev_grade == 'D':
-            return 1
-        else:  # F or other
-            return 0
+    development_xp_bonus = DerivedStat(CHARACTER_RULES['development_xp_bonus'], stand_grade)
+    stress_capacity = DerivedStat(CHARACTER_RULES['stress_capacity'], stand_grade)
 
     @property
     def level(self):
@@ -377,14 +334,14 @@ class Character(models.Model):
     background_note = models.TextField(blank=True, null=True)
     background_note2 = models.TextField(blank=True, null=True)
 
-    action_dots = models.JSONField(default=dict)
+    action_dots = CompressedJSONField(default=dict)
     playbook = models.CharField(max_length=20, choices=[('STAND','Stand'),('HAMON','Hamon'),('SPIN','Spin')], default='STAND')
 
     stand_type = models.CharField(max_length=50, blank=True, null=True)
     stand_name = models.CharField(max_length=100, blank=True, null=True)
     stand_form = models.TextField(blank=True, null=True)
     stand_conscious = models.BooleanField(default=True)
-    coin_stats = models.JSONField(default=dict, blank=True)
+    coin_stats = CompressedJSONField(default=dict, blank=True)
 
     armor_type = models.CharField(
         max_length=20,
@@ -419,13 +376,13 @@ class Character(models.Model):
     harm_level4_used = models.BooleanField(default=False)
     harm_level4_name = models.CharField(max_length=100, blank=True, null=True)
 
-    xp_clocks = models.JSONField(default=dict, blank=True)
+    xp_clocks = CompressedJSONField(default=dict, blank=True)
     total_xp_spent = models.IntegerField(default=0)
     heritage_points_gained = models.IntegerField(default=0)
     stand_coin_points_gained = models.IntegerField(default=0)
     action_dice_gained = models.IntegerField(default=0)
-    inventory = models.JSONField(default=list, blank=True, help_text="List of items the character possesses")
-    reputation_status = models.JSONField(default=dict, blank=True, help_text="Tracks character's reputation with allies, rivals, and factions (e.g., {'Faction Name': 2, 'NPC Name': -1})")
+    inventory = CompressedJSONField(default=list, blank=True, help_text="List of items the character possesses")
+    reputation_status = CompressedJSONField(default=dict, blank=True, help_text="Tracks character's reputation with allies, rivals, and factions (e.g., {'Faction Name': 2, 'NPC Name': -1})")
 
     ACTION_CATEGORIES = {
         'insight': ['hunt', 'study', 'survey', 'tinker'],
@@ -464,142 +421,12 @@ class Character(models.Model):
 
     def clean(self):
         super().clean()
-        if self.level == 1:
-            self._validate_action_dots_distribution()
-            self._validate_stand_coin_stats()
-            self._validate_stress_based_on_durability()
-        self._validate_initial_abilities_count()
-        self._validate_xp_advancements()
-        if hasattr(self, 'stand'):
-            self._validate_a_rank_abilities()
-
-    def _validate_level_1_creation(self):
-        self._validate_action_dots_distribution()
-        self._validate_stand_coin_stats()
-        self._validate_stress_based_on_durability()
-        self._validate_initial_abilities_count()
-
-    def _validate_action_dots_distribution(self):
-        total_dots = sum(self.action_dots.values())
-        if total_dots != 7:
-            raise ValidationError(
-                {'action_dots': 'A new character at level 1 must have exactly 7 action dots.'}
-            )
-        for action, dots in self.action_dots.items():
-            if self.level == 1 and dots > 2:  # Max 2 dots per action at level 1
-                raise ValidationError(
-                    {'action_dots': f'Action "{action}" cannot have more than 2 dots at level 1.'}
-                )
-            elif self.level > 1 and dots > 4: # Max 4 dots per action after level 1
-                raise ValidationError(
-                    {'action_dots': f'Action "{action}" cannot have more than 4 dots.'}
-                )
-
-    def _validate_stand_coin_stats(self):
-        grade_points = {'S': 5, 'A': 4, 'B': 3, 'C': 2, 'D': 1, 'F': 0}
-        total_stand_coin_points = 0
-        
-        # Ensure stand exists
-        if not hasattr(self, 'stand'):
-            raise ValidationError(
-                {'stand': 'A level 1 character must have a Stand with stats defined.'}
-            )
-
-        # Check individual Stand fields
-        stand_fields = ['power', 'speed', 'range', 'durability', 'precision', 'development']
-        for field in stand_fields:
-            if hasattr(self.stand, field):
-                grade = getattr(self.stand, field)
-                if grade not in grade_points:
-                    raise ValidationError(
-                        {'stand_coin_stats': f'Invalid grade "{grade}" for stat "{field}". Must be S, A, B, C, D, or F.'}
-                    )
-                if grade == 'S' and not self.gm_can_have_s_rank_stand_stats:
-                    raise ValidationError(
-                        {'stand_coin_stats': f'Player characters cannot have S-rank in {field} unless explicitly allowed by the GM.'}
-                    )
-                total_stand_coin_points += grade_points[grade]
-
-        if total_stand_coin_points != 6:
-            raise ValidationError(
-                {'stand_coin_stats': f'A new character at level 1 must have exactly 6 Stand Coin points. Current total: {total_stand_coin_points}.'}
-            )
-
-    def _validate_stress_based_on_durability(self):
-        # SRD: Durability sets stress capacity. Base 9; S +4, A +3, B +2, C +1, D 0, F -1.
-        expected_stress = 9
-        durability_grade = None
-        if hasattr(self, 'stand') and hasattr(self.stand, 'durability'):
-            durability_grade = self.stand.durability
-        if durability_grade == 'S':
-            expected_stress = 13
-        elif durability_grade == 'A':
-            expected_stress = 12
-        elif durability_grade == 'B':
-            expected_stress = 11
-        elif durability_grade == 'C':
-            expected_stress = 10
-        elif durability_grade == 'D':
-            expected_stress = 9
-        elif durability_grade == 'F':
-            expected_stress = 8
-        if self.level == 1 and self.stress != expected_stress:
-            raise ValidationError(
-                {'stress': f'Stress must be {expected_stress} for a level 1 character with {durability_grade} Stand Durability.'}
-            )
-
-    def _validate_initial_abilities_count(self):
-        # SRD: At start choose 3 abilities; each A-rank in Stand Coin unlocks 2 more.
-        if self.level != 1:
-            return
-        a_rank_count = 0
-        if hasattr(self, 'stand'):
-            stand_fields = ['power', 'speed', 'range', 'durability', 'precision', 'development']
-            for field in stand_fields:
-                if hasattr(self.stand, field) and getattr(self.stand, field) == 'A':
-                    a_rank_count += 1
-        expected_total_abilities = 3 + (a_rank_count * 2)
-        if self.total_abilities_count != expected_total_abilities:
-            raise ValidationError(
-                {'standard_abilities': f'A level 1 character must have exactly {expected_total_abilities} abilities (3 base + 2 per A-rank in Stand Coin).', 'total_abilities_count': self.total_abilities_count}
-            )
-
-    def _validate_a_rank_abilities(self):
-        # A-rank ability count is validated in _validate_initial_abilities_count for level 1.
-        pass
-
-    def _validate_xp_advancements(self):
-        # Ensure total_xp_spent is a multiple of 10
-        if self.total_xp_spent % 10 != 0:
-            raise ValidationError(
-                {'total_xp_spent': 'Total XP spent must be a multiple of 10 for advancements.'}
-            )
-
-        # Calculate expected total XP from advancements
-        expected_xp_from_advancements = (
-            self.heritage_points_gained * 5 +  # 5 XP per heritage point
-            self.stand_coin_points_gained * 10 + # 10 XP per stand coin point
-            self.action_dice_gained * 5  # 5 XP per action die
-        )
-
-        if self.total_xp_spent != expected_xp_from_advancements:
-            raise ValidationError(
-                {'total_xp_spent': f'Total XP spent ({self.total_xp_spent}) does not match XP calculated from advancements ({expected_xp_from_advancements}).'}
-            )
-
-        # Ensure gained values are non-negative
-        if self.action_dice_gained < 0:
-            raise ValidationError(
-                {'action_dice_gained': 'Action dice gained cannot be negative.'}
-            )
-        if self.stand_coin_points_gained < 0:
-            raise ValidationError(
-                {'stand_coin_points_gained': 'Stand coin points gained cannot be negative.'}
-            )
-        if self.heritage_points_gained < 0:
-            raise ValidationError(
-                {'heritage_points_gained': 'Heritage points gained cannot be negative.'}
-            )
+        # Rules live in characters.validation, which can also check many characters at once.
+        from .validation import MODEL_RULES, CharacterFacts, as_validation_error, validate_character
+
+        issues = validate_character(CharacterFacts.from_instance(self), MODEL_RULES)
+        if issues:
+            raise as_validation_error(issues)
 
     def gain_xp(self, xp_amount, xp_type):
         if xp_type not in self.xp_clocks:
@@ -655,57 +482,65 @@ class Character(models.Model):
     standard_abilities = models.ManyToManyField(Ability, blank=True, related_name='characters_standard')
 
     # JSON field to store additional abilities based on "A" grade logic
-    extra_custom_abilities = models.JSONField(default=list, blank=True, null=True)
+    extra_custom_abilities = CompressedJSONField(default=list, blank=True, null=True)
     development_temporary_ability = models.JSONField(default=None, null=True, blank=True, help_text="Temporary ability gained from A-rank Development Potential until the end of the session")
     
     # Faction reputation tracking - list of {name: str, rep: int} objects
-    faction_reputation = models.JSONField(default=list, blank=True, null=True)
+    faction_reputation = CompressedJSONField(default=list, blank=True, null=True)
     
     # GM settings for character creation locking
     gm_character_locked = models.BooleanField(default=False)
-    gm_allowed_edit_fields = models.JSONField(default=dict, blank=True, null=True)
+    gm_allowed_edit_fields = CompressedJSONField(default=dict, blank=True, null=True)
     gm_can_have_s_rank_stand_stats = models.BooleanField(default=False)
     gm_locked_fields = models.JSONField(default=list, blank=True, help_text="List of fields locked by the GM (e.g., ['level', 'action_dots'])")
 
+    objects = CompressedJSONQuerySet.as_manager()
+
 
 class CharacterHistory(models.Model):
-    character = models.ForeignKey(Character, on_delete=models.CASCADE, related_name='history_entries')
+    """A full snapshot of a character's fields, or a delta of the fields changed since the previous entry.
+
+    The payload is zlib-compressed JSON. Any point in time is rebuilt from the latest snapshot
+    before it plus the deltas that follow (see ``CharacterHistoryService.state_at``).
+    """
+    SNAPSHOT = 'SNAPSHOT'
+    DELTA = 'DELTA'
+    KIND_CHOICES = [
+        (SNAPSHOT, 'Snapshot'),
+        (DELTA, 'Delta'),
+    ]
+
+    character = models.ForeignKey(Character, on_delete=models.CASCADE, related_name='history_entries', db_index=False)
     editor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
     timestamp = models.DateTimeField(auto_now_add=True)
-    changed_fields = models.JSONField()
-    
-    def __str__(self):
-        return f"Changes for {self.character.true_name} at {self.timestamp}"
+    kind = models.CharField(max_length=8, choices=KIND_CHOICES, default=DELTA)
+    payload = models.BinaryField(default=bytes)
 
-@receiver(post_save, sender=Character)
-def log_character_changes(sender, instance, created, **kwargs):
-    if created:
-        # Don't log creation as a change
-        return
+    class Meta:
+        indexes = [
+            # log_character_changes reads the latest entry on every Character save.
+            models.Index(fields=['character', 'timestamp'], name='charhistory_char_ts_idx'),
+        ]
 
-    try:
-        latest_history = CharacterHistory.objects.filter(character=instance).latest('timestamp')
-        old_data = latest_history.changed_fields
-    except CharacterHistory.DoesNotExist:
-        old_data = {}
+    @property
+    def changed_fields(self):
+        """Field values stored in this entry: all of them for a snapshot, the changed ones for a delta."""
+        return json.loads(zlib.decompress(bytes(self.payload))) if self.payload else {}
 
-    new_data = {}
-    for field in instance._meta.fields:
-        new_data[field.name] = str(getattr(instance, field.name))
+    @changed_fields.setter
+    def changed_fields(self, values):
+        self.payload = zlib.compress(json.dumps(values, cls=DjangoJSONEncoder, separators=(',', ':')).encode())
 
-    changed_fields = {}
-    for field_name, new_value in new_data.items():
-        if old_data.get(field_name) != new_value:
-            changed_fields[field_name] = {
-                'old': old_data.get(field_name),
-                'new': new_value
-            }
+    def __str__(self):
+        return f"{self.get_kind_display()} of {self.character.true_name} at {self.timestamp}"
 
-    if changed_fields:
-        CharacterHistory.objects.create(
-            character=instance,
-            changed_fields=changed_fields
-        )
+@receiver(post_save, sender=Character)
+@traced('signal')
+def log_character_changes(sender, instance, created, update_fields=None, **kwargs):
+    from .services.history_service import CharacterHistoryService
+
+    # Creation is recorded as the first snapshot, so later states can be rebuilt from it.
+    CharacterHistoryService.record(instance, fields=update_fields)
 
 
 
@@ -855,7 +690,7 @@ class ProgressClock(models.Model):
     description = models.TextField(blank=True)
     
     # Can be associated with campaigns, crews, characters, sessions, or NPCs
-    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, null=True, blank=True, related_name='progress_clocks')
+    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, null=True, blank=True, related_name='progress_clocks', db_index=False)
     crew = models.ForeignKey(Crew, on_delete=models.CASCADE, null=True, blank=True, related_name='progress_clocks')
     character = models.ForeignKey('Character', on_delete=models.CASCADE, null=True, blank=True, related_name='progress_clocks')
     faction = models.ForeignKey(Faction, on_delete=models.CASCADE, null=True, blank=True, related_name='progress_clocks')
@@ -865,6 +700,11 @@ class ProgressClock(models.Model):
     visible_to_players = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     completed = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['campaign', 'visible_to_players'], name='clock_campaign_visible_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.filled_segments}/{self.max_segments})"
@@ -984,6 +824,21 @@ class Session(models.Model):
         return f"{self.campaign.name} - {self.name} ({self.get_status_display()}) - {self.session_date.strftime('%Y-%m-%d')}"
 
 
+class SessionArchive(models.Model):
+    """A completed session's rolls, events, chat, XP and stress rows, packed into one compressed blob.
+
+    The hot rows are deleted once archived; ``SessionArchiveService.hydrate`` puts them back on
+    the session's relations (as unsaved instances) when its records are read.
+    """
+    session = models.OneToOneField(Session, on_delete=models.CASCADE, related_name='archive')
+    archived_at = models.DateTimeField(auto_now_add=True)
+    record_counts = models.JSONField(default=dict, help_text="Rows archived per model, readable without decompressing")
+    payload = models.BinaryField(help_text="zlib-compressed JSON of the archived rows")
+
+    def __str__(self):
+        return f"Archive of {self.session.name} ({sum(self.record_counts.values())} records)"
+
+
 class FactionRelationship(models.Model):
     source_faction = models.ForeignKey(Faction, on_delete=models.CASCADE, related_name='outgoing_relationships')
     target_faction = models.ForeignKey(Faction, on_delete=models.CASCADE, related_name='incoming_relationships')
@@ -1021,13 +876,20 @@ class SessionEvent(models.Model):
         ('OTHER', 'Other'),
     ]
 
-    session = models.ForeignKey(Session, on_delete=models.CASCADE, related_name='events')
+    session = models.ForeignKey(Session, on_delete=models.CASCADE, related_name='events', db_index=False)
     character = models.ForeignKey(Character, on_delete=models.CASCADE, null=True, blank=True, related_name='session_events')
     npc = models.ForeignKey(NPC, on_delete=models.CASCADE, null=True, blank=True, related_name='session_events')
     event_type = models.CharField(max_length=20, choices=EVENT_TYPE_CHOICES)
     details = models.JSONField(default=dict)
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    objects = CampaignShardQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['session', 'timestamp'], name='sessionevent_session_ts_idx'),
+        ]
+
     def __str__(self):
         return f"{self.session.name} - {self.get_event_type_display()} at {self.timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
 
@@ -1053,12 +915,19 @@ class StressHistory(models.Model):
         return f"{self.character.true_name} stress changed by {self.amount} ({self.reason}) on {self.timestamp.strftime('%Y-%m-%d')}"
 
 class ChatMessage(models.Model):
-    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name='chat_messages')
+    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name='chat_messages', db_index=False)
     session = models.ForeignKey(Session, on_delete=models.CASCADE, related_name='session_chat_messages', null=True, blank=True)
     sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sent_messages')
     message = models.TextField()
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    objects = CampaignShardQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['campaign', 'timestamp'], name='chat_campaign_ts_idx'),
+        ]
+
     def __str__(self):
         return f"[{self.timestamp.strftime('%H:%M')}] {self.sender.username}: {self.message[:50]}..."
 
@@ -1090,8 +959,8 @@ class Roll(models.Model):
         ('BOTCH', 'Botch'),
     ]
 
-    character = models.ForeignKey(Character, on_delete=models.CASCADE, related_name='rolls')
-    session = models.ForeignKey(Session, on_delete=models.CASCADE, related_name='rolls')
+    character = models.ForeignKey(Character, on_delete=models.CASCADE, related_name='rolls', db_index=False)
+    session = models.ForeignKey(Session, on_delete=models.CASCADE, related_name='rolls', db_index=False)
     roll_type = models.CharField(max_length=20, choices=ROLL_TYPE_CHOICES, default='ACTION')
     action_name = models.CharField(max_length=50, blank=True)
     position = models.CharField(max_length=20, choices=POSITION_CHOICES, default='risky')
@@ -1102,6 +971,15 @@ class Roll(models.Model):
     description = models.TextField(blank=True)
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    objects = CampaignShardQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Session dice log and a character's roll history, both newest first.
+            models.Index(fields=['session', 'timestamp'], name='roll_session_ts_idx'),
+            models.Index(fields=['character', 'timestamp'], name='roll_character_ts_idx'),
+        ]
+
     def __str__(self):
         return f"{self.character.true_name} - {self.action_name} ({self.outcome})"
 
@@ -1111,6 +989,8 @@ class RollHistory(models.Model):
     campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name='roll_history')
     roll = models.OneToOneField(Roll, on_delete=models.CASCADE, related_name='history_entry')
 
+    objects = CampaignShardQuerySet.as_manager()
+
     class Meta:
         verbose_name_plural = 'Roll histories'
 
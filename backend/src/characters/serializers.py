@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from django.db import transaction
 from .models import (
     UserProfile, Heritage, Vice, Ability, Character, Stand,
     Campaign, CampaignInvitation, NPC, Crew, Detriment, Benefit, StandAbility,
@@ -9,7 +10,10 @@ from .models import (
     Claim, CrewPlaybook, CrewSpecialAbility, CrewUpgrade, XPHistory, StressHistory, ChatMessage,
     Faction, ShowcasedNPC, ProgressClock, Roll
 )
-import re
+from app.tracing import traced_method
+from .ability_index import count_a_ranks, get_index_knowing
+from .validation import SERIALIZER_RULES, CharacterFacts, validate_character
+from .services.archive_service import SessionArchiveService
 
 class ClaimSerializer(serializers.ModelSerializer):
     class Meta:
@@ -49,7 +53,7 @@ class CrewSerializer(serializers.ModelSerializer):
             'xp', 'xp_track_size', 'advancement_points',
             'level', 'hold', 'rep', 'wanted_level',
             'coin', 'stash', 'claims', 'upgrade_progress', 'special_abilities',
-            'proposed_name', 'proposed_by', 'approved_by'
+            'proposed_name', 'proposed_by', 'approved_by', 'version'
         ]
 
 
@@ -146,7 +150,7 @@ class SessionRecordsSerializer(serializers.ModelSerializer):
     events = SessionEventSerializer(many=True, read_only=True)
     xp_history = XPHistorySerializer(source='session_xp_history', many=True, read_only=True)
     stress_history = StressHistorySerializer(source='session_stress_history', many=True, read_only=True)
-    xp_entries = ExperienceTrackerSerializer(source='xp_entries', many=True, read_only=True)
+    xp_entries = ExperienceTrackerSerializer(many=True, read_only=True)
     rolls = RollSerializer(many=True, read_only=True)
 
     class Meta:
@@ -158,13 +162,19 @@ class SessionRecordsSerializer(serializers.ModelSerializer):
             'events', 'xp_history', 'stress_history', 'xp_entries', 'rolls',
         ]
 
+    @traced_method('serializer')
+    def to_representation(self, instance):
+        # Archived sessions read their records from the archive blob, not the hot tables.
+        SessionArchiveService.hydrate(instance)
+        return super().to_representation(instance)
+
 
 class CharacterHistorySerializer(serializers.ModelSerializer):
     editor = serializers.StringRelatedField()
 
     class Meta:
         model = CharacterHistory
-        fields = ['id', 'character', 'editor', 'timestamp', 'changed_fields']
+        fields = ['id', 'character', 'editor', 'timestamp', 'kind', 'changed_fields']
 
 
 class BenefitSerializer(serializers.ModelSerializer):
@@ -235,11 +245,12 @@ class CharacterSerializer(serializers.ModelSerializer):
     # custom ability fields and extra custom abilities JSON
     extra_custom_abilities = serializers.JSONField(required=False)
     # hamon and spin ability inputs
-    hamon_ability_ids = serializers.PrimaryKeyRelatedField(
-        queryset=HamonAbility.objects.all(), many=True, write_only=True, required=False
+    # (checked against the in-memory ability index, not looked up one by one)
+    hamon_ability_ids = serializers.ListField(
+        child=serializers.IntegerField(), write_only=True, required=False
     )
-    spin_ability_ids = serializers.PrimaryKeyRelatedField(
-        queryset=SpinAbility.objects.all(), many=True, write_only=True, required=False
+    spin_ability_ids = serializers.ListField(
+        child=serializers.IntegerField(), write_only=True, required=False
     )
     # nested ability details for playbook abilities
     hamon_ability_details = serializers.SerializerMethodField()
@@ -267,6 +278,22 @@ class CharacterSerializer(serializers.ModelSerializer):
         model = Character
         fields = '__all__'
 
+    @traced_method('serializer')
+    def to_representation(self, instance):
+        return super().to_representation(instance)
+
+    def _validate_ability_ids(self, playbook, value):
+        unknown, _ = get_index_knowing(playbook, value).check(playbook, value, 0)
+        if unknown:
+            raise serializers.ValidationError(f'Invalid pk "{unknown[0]}" - object does not exist.')
+        return list(dict.fromkeys(value))
+
+    def validate_hamon_ability_ids(self, value):
+        return self._validate_ability_ids('HAMON', value)
+
+    def validate_spin_ability_ids(self, value):
+        return self._validate_ability_ids('SPIN', value)
+
     def validate(self, data):
         # Validate stress/trauma system
         stress = data.get('stress', 0) or getattr(self.instance, 'stress', 0)
@@ -281,24 +308,16 @@ class CharacterSerializer(serializers.ModelSerializer):
                 )
             # Note: We don't auto-add trauma here, that's handled by the frontend
         
-        # enforce playbook ability prerequisites based on coin_stats
-        # count 'A' ratings in coin_stats
-        coin_stats = data.get('coin_stats') or getattr(self.instance, 'coin_stats', {})
-        count_A = sum(1 for v in coin_stats.values() if v == 'A')
-        # validate requested Hamon abilities
-        for ha in data.get('hamon_ability_ids', []):
-            m = re.match(r"^(\d)A", ha.name)
-            if m and count_A < int(m.group(1)):
-                raise serializers.ValidationError(
-                    f"Insufficient 'A' ratings: need {m.group(1)} 'A's to select Hamon ability '{ha.name}' (you have {count_A})."
-                )
-        # validate requested Spin abilities
-        for sa in data.get('spin_ability_ids', []):
-            m = re.match(r"^(\d)A", sa.name)
-            if m and count_A < int(m.group(1)):
-                raise serializers.ValidationError(
-                    f"Insufficient 'A' ratings: need {m.group(1)} 'A's to select Spin ability '{sa.name}' (you have {count_A})."
-                )
+        # playbook ability prerequisites ('A' ratings in coin_stats) and the playbook XP cap
+        issues = validate_character(CharacterFacts(
+            pk=getattr(self.instance, 'pk', None),
+            hamon_ability_ids=tuple(data.get('hamon_ability_ids', ())),
+            spin_ability_ids=tuple(data.get('spin_ability_ids', ())),
+            coin_a_ranks=count_a_ranks(data.get('coin_stats') or getattr(self.instance, 'coin_stats', {})),
+            xp_clocks=data.get('xp_clocks') or getattr(self.instance, 'xp_clocks', {}),
+        ), SERIALIZER_RULES)
+        if issues:
+            raise serializers.ValidationError([issue.message for issue in issues])
         heritage   = data.get('heritage') or getattr(self.instance, 'heritage', None)
         benefits   = data.get('selected_benefits', [])
         detriments = data.get('selected_detriments', [])
@@ -353,14 +372,6 @@ class CharacterSerializer(serializers.ModelSerializer):
             #         f"Not enough XP: {extra_dice} extra dice require {required_xp} XP (5 XP each), but only {xp_gained} XP available."
             #     )
             pass  # Temporarily bypass XP validation for character creation
-        # Enforce playbook XP track cap at 10 XP
-        xp_clocks = data.get('xp_clocks') or getattr(self.instance, 'xp_clocks', {})
-        playbook_xp = xp_clocks.get('playbook', 0)
-        if playbook_xp > 10:
-            raise serializers.ValidationError(
-                f"Playbook track XP cannot exceed 10; received {playbook_xp}."
-            )
-        
         # GM character locking validation
         if self.instance and self.instance.campaign:
             gm_locked = data.get('gm_character_locked') or getattr(self.instance, 'gm_character_locked', False)
@@ -373,8 +384,7 @@ class CharacterSerializer(serializers.ModelSerializer):
                 
                 if gm_locked and not is_gm:
                     # Check if any locked fields are being modified
-                    restricted_fields = ['heritage', 'selected_benefits', 'selected_detriments', 'playbook']
-                    for field in restricted_fields:
+                    for field in self.GM_RESTRICTED_FIELDS:
                         if field in data and not allowed_fields.get(field, True):
                             raise serializers.ValidationError(
                                 f"Field '{field}' is locked by GM and cannot be modified."
@@ -382,70 +392,124 @@ class CharacterSerializer(serializers.ModelSerializer):
         
         return data
 
+    # Fields a player cannot change on a gm_character_locked sheet unless gm_allowed_edit_fields allows them.
+    GM_RESTRICTED_FIELDS = ('heritage', 'selected_benefits', 'selected_detriments', 'playbook')
+
+    # (validated data key, reverse relation, link model, ability id column)
+    PLAYBOOK_LINKS = (
+        ('hamon_ability_ids', 'hamon_abilities', CharacterHamonAbility, 'hamon_ability_id'),
+        ('spin_ability_ids', 'spin_abilities', CharacterSpinAbility, 'spin_ability_id'),
+    )
+    M2M_FIELDS = ('standard_abilities', 'selected_benefits', 'selected_detriments')
+
+    @staticmethod
+    def _custom_vice(name):
+        # Reuse a custom vice someone already typed instead of adding a row per sheet.
+        return Vice.objects.filter(name=name).first() or Vice.objects.create(name=name, description="Custom vice")
+
+    @staticmethod
+    def _cache_related(character, relation, objects):
+        """Make ``character.<relation>.all()`` return ``objects`` without a query."""
+        cache = character.__dict__.setdefault('_prefetched_objects_cache', {})
+        cache.pop(relation, None)
+        queryset = getattr(character, relation).all()
+        queryset._result_cache = list(objects)
+        queryset._prefetch_done = True
+        cache[relation] = queryset
+
     def create(self, validated_data):
+        """One INSERT for the character and one bulk INSERT per non-empty link table, in one transaction."""
         custom_vice = validated_data.pop('custom_vice', None)
-        # extract playbook abilities
-        hamon_ids = validated_data.pop('hamon_ability_ids', [])
-        spin_ids = validated_data.pop('spin_ability_ids', [])
-        # extract standard abilities
-        std_ids = validated_data.pop('standard_abilities', [])
-
-        if custom_vice:
-            vice = Vice.objects.create(name=custom_vice, description="Custom vice")
-            validated_data['vice'] = vice
-
-        # create character instance and assign m2m
-        character = super().create(validated_data)
-        # assign standard abilities
-        character.standard_abilities.set(std_ids)
-        # assign hamon abilities
-        for ha in hamon_ids:
-            CharacterHamonAbility.objects.create(character=character, hamon_ability=ha)
-        # assign spin abilities
-        for sa in spin_ids:
-            CharacterSpinAbility.objects.create(character=character, spin_ability=sa)
+        playbook_ids = {key: validated_data.pop(key, []) for key, _, _, _ in self.PLAYBOOK_LINKS}
+        m2m_values = {name: validated_data.pop(name, []) for name in self.M2M_FIELDS}
+
+        with transaction.atomic():
+            if custom_vice:
+                validated_data['vice'] = self._custom_vice(custom_vice)
+            character = Character.objects.create(**validated_data)
+
+            # A new character has no links yet, so the through rows are inserted without diffing.
+            for name, objects in m2m_values.items():
+                objects = list({obj.pk: obj for obj in objects}.values())
+                if objects:
+                    field = Character._meta.get_field(name)
+                    through = field.remote_field.through
+                    through.objects.bulk_create([
+                        through(**{f'{field.m2m_field_name()}_id': character.pk,
+                                   f'{field.m2m_reverse_field_name()}_id': obj.pk})
+                        for obj in objects
+                    ])
+                self._cache_related(character, name, objects)
+            for key, relation, model, column in self.PLAYBOOK_LINKS:
+                links = [model(character=character, **{column: ability_id}) for ability_id in playbook_ids[key]]
+                if links:
+                    model.objects.bulk_create(links)
+                self._cache_related(character, relation, links)
+
+        # A new sheet has no Stand yet; the response should not look one up.
+        Character.stand.related.set_cached_value(character, None)
         return character
     
     def update(self, instance, validated_data):
-        # handle custom vice
+        """Save the sheet and diff its ability links: only added links are inserted, only dropped ones deleted."""
         custom_vice = validated_data.pop('custom_vice', None)
-        hamon_ids = validated_data.pop('hamon_ability_ids', None)
-        spin_ids = validated_data.pop('spin_ability_ids', None)
-        # extract standard abilities
-        std_ids = validated_data.pop('standard_abilities', None)
-        if custom_vice:
-            vice = Vice.objects.create(name=custom_vice, description="Custom vice")
-            validated_data['vice'] = vice
-        character = super().update(instance, validated_data)
-        # update standard abilities
-        if std_ids is not None:
-            character.standard_abilities.set(std_ids)
-        # update playbook abilities: clear and reassign if provided
-        if hamon_ids is not None:
-            character.hamon_abilities.all().delete()
-            for ha in hamon_ids:
-                CharacterHamonAbility.objects.create(character=character, hamon_ability=ha)
-        if spin_ids is not None:
-            character.spin_abilities.all().delete()
-            for sa in spin_ids:
-                CharacterSpinAbility.objects.create(character=character, spin_ability=sa)
+        playbook_ids = {key: validated_data.pop(key, None) for key, _, _, _ in self.PLAYBOOK_LINKS}
+        m2m_values = {name: validated_data[name] for name in self.M2M_FIELDS if name in validated_data}
+
+        with transaction.atomic():
+            if custom_vice:
+                validated_data['vice'] = self._custom_vice(custom_vice)
+            # ModelSerializer.update sets many-to-many fields with RelatedManager.set(), which diffs.
+            character = super().update(instance, validated_data)
+            for name, objects in m2m_values.items():
+                self._cache_related(character, name, {obj.pk: obj for obj in objects}.values())
+
+            for key, relation, model, column in self.PLAYBOOK_LINKS:
+                wanted = playbook_ids[key]
+                if wanted is None:
+                    continue
+                existing = list(model.objects.filter(character=character))
+                kept = [link for link in existing if getattr(link, column) in wanted]
+                dropped = [link.pk for link in existing if getattr(link, column) not in wanted]
+                if dropped:
+                    model.objects.filter(pk__in=dropped).delete()
+                have = {getattr(link, column) for link in kept}
+                added = [model(character=character, **{column: ability_id})
+                         for ability_id in wanted if ability_id not in have]
+                if added:
+                    model.objects.bulk_create(added)
+                self._cache_related(character, relation, kept + added)
         return character
 
+    @staticmethod
+    def _ability_details(playbook, ability_ids):
+        # Same shape as HamonAbilitySerializer/SpinAbilitySerializer, read from the ability index.
+        index = get_index_knowing(playbook, ability_ids)
+        type_key = f'{playbook.lower()}_type'
+        details = []
+        for ability_id in ability_ids:
+            ability = index.get(playbook, ability_id)
+            if ability is not None:
+                details.append({
+                    'id': ability.id, 'name': ability.name, type_key: ability.ability_type,
+                    'description': ability.description, 'stress_cost': ability.stress_cost,
+                    'frequency': ability.frequency,
+                })
+        return details
+
     def get_hamon_ability_details(self, obj):
-        return HamonAbilitySerializer(
-            [entry.hamon_ability for entry in obj.hamon_abilities.all()], many=True
-        ).data
+        return self._ability_details('HAMON', [entry.hamon_ability_id for entry in obj.hamon_abilities.all()])
 
     def get_spin_ability_details(self, obj):
-        return SpinAbilitySerializer(
-            [entry.spin_ability for entry in obj.spin_abilities.all()], many=True
-        ).data
+        return self._ability_details('SPIN', [entry.spin_ability_id for entry in obj.spin_abilities.all()])
 
     def get_standard_ability_details(self, obj):
         return AbilitySerializer(obj.standard_abilities.all(), many=True).data
 
     def get_trauma_details(self, obj):
         # obj.trauma is a list of Trauma IDs
+        if not obj.trauma:
+            return []
         traumas = Trauma.objects.filter(id__in=obj.trauma)
         return TraumaSerializer(traumas, many=True).data
 
@@ -565,9 +629,13 @@ class CampaignSerializer(serializers.ModelSerializer):
             'is_active', 'created_at', 'factions', 'campaign_characters',
             'campaign_npcs', 'pending_invitations',
             'active_session', 'active_session_detail', 'sessions',
-            'showcased_npcs', 'current_scene_type', 'progress_clocks',
+            'showcased_npcs', 'current_scene_type', 'progress_clocks', 'version',
         ]
 
+    @traced_method('serializer')
+    def to_representation(self, instance):
+        return super().to_representation(instance)
+
     def get_pending_invitations(self, obj):
         invitations = obj.invitations.filter(status='pending')
         return CampaignInvitationSerializer(invitations, many=True).data
@@ -608,6 +676,10 @@ class NPCSerializer(serializers.ModelSerializer):
         model = NPC
         fields = ['id', 'name', 'level', 'appearance', 'role', 'weakness', 'need', 'desire', 'rumour', 'secret', 'passion', 'description', 'stand_coin_stats', 'heritage', 'playbook', 'custom_abilities', 'relationships', 'harm_clock_current', 'vulnerability_clock_current', 'armor_charges', 'creator', 'campaign', 'faction', 'image', 'image_url', 'stand_description', 'stand_appearance', 'stand_manifestation', 'special_traits', 'harm_clock_max', 'special_armor_charges', 'vulnerability_clock_max', 'purveyor', 'notes', 'items', 'contacts', 'faction_status', 'inventory']
 
+    @traced_method('serializer')
+    def to_representation(self, instance):
+        return super().to_representation(instance)
+
     def create(self, validated_data):
         # Set the creator to the current user if not explicitly provided
         if 'creator' not in validated_data:
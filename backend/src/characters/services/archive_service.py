@@ -0,0 +1,167 @@
+import datetime
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, models, transaction
+
+from app import sharding
+from app.tracing import trace_methods
+from ..models import ChatMessage, Roll, RollHistory, SessionArchive, SessionEvent, StressHistory, XPHistory
+
+
+# (model, the session's reverse relation to it). RollHistory rows go with their Roll.
+ARCHIVED_RELATIONS = [
+    (Roll, 'rolls'),
+    (SessionEvent, 'events'),
+    (ChatMessage, 'session_chat_messages'),
+    (XPHistory, 'session_xp_history'),
+    (StressHistory, 'session_stress_history'),
+]
+FORMAT_VERSION = 1
+DELETE_BATCH_SIZE = 500
+
+
+class _ArchiveEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        # DjangoJSONEncoder drops microseconds; restored rows must keep their exact timestamps.
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def _row(instance):
+    return {field.attname: field.value_from_object(instance) for field in instance._meta.concrete_fields}
+
+
+def _database(model, session):
+    if sharding.enabled() and sharding.is_sharded(model):
+        return sharding.shard_alias(session.campaign_id)
+    return DEFAULT_DB_ALIAS
+
+
+def _instance(model, row, using):
+    values = {}
+    for field in model._meta.concrete_fields:
+        if field.attname in row:
+            value = row[field.attname]
+            # JSON columns hold arbitrary values; everything else parses back from its JSON form.
+            values[field.attname] = value if isinstance(field, models.JSONField) else field.to_python(value)
+    instance = model(**values)
+    instance._state.adding = False
+    instance._state.db = using
+    return instance
+
+
+@trace_methods('service')
+class SessionArchiveService:
+    """Move completed sessions' records out of the hot tables into one compressed row, and back."""
+
+    @staticmethod
+    def _querysets(session):
+        # Read from the database that is written to (the shard, or default rather than a replica).
+        querysets = [
+            model.objects.using(_database(model, session)).filter(session_id=session.pk)
+            for model, _ in ARCHIVED_RELATIONS
+        ]
+        history = RollHistory.objects.using(_database(RollHistory, session)).filter(roll__session_id=session.pk)
+        return querysets, history
+
+    @staticmethod
+    def _delete(model, using, pks):
+        # In batches, to stay under SQLite's limit on query parameters.
+        for start in range(0, len(pks), DELETE_BATCH_SIZE):
+            model.objects.using(using).filter(pk__in=pks[start:start + DELETE_BATCH_SIZE]).delete()
+
+    @staticmethod
+    def archive(session):
+        """Pack ``session``'s records into a SessionArchive and delete them; returns the archive.
+
+        Only the rows that went into the archive are deleted, so records written while it was
+        being built stay in the hot tables. Rows in ``default`` are deleted in the transaction
+        that creates the archive; rows in a campaign shard once it has committed.
+        """
+        if session.status != 'COMPLETED':
+            raise ValueError('Only completed sessions can be archived')
+
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            if SessionArchive.objects.filter(session=session).exists():
+                raise ValueError('Session is already archived')
+            querysets, history = SessionArchiveService._querysets(session)
+            rows, archived = {}, []
+            for queryset in [history] + querysets:
+                model_rows = [_row(obj) for obj in queryset.order_by('pk')]
+                rows[queryset.model._meta.label_lower] = model_rows
+                pk = queryset.model._meta.pk.attname
+                archived.append((queryset.model, queryset.db, [row[pk] for row in model_rows]))
+            payload = json.dumps({'version': FORMAT_VERSION, 'rows': rows}, cls=_ArchiveEncoder, separators=(',', ':'))
+
+            archive = SessionArchive.objects.create(
+                session=session,
+                record_counts={label: len(model_rows) for label, model_rows in rows.items()},
+                payload=zlib.compress(payload.encode()),
+            )
+            for model, using, pks in archived:
+                if using == DEFAULT_DB_ALIAS:
+                    SessionArchiveService._delete(model, using, pks)
+
+        for model, using, pks in archived:
+            if using != DEFAULT_DB_ALIAS:
+                with transaction.atomic(using=using):
+                    SessionArchiveService._delete(model, using, pks)
+        session.__dict__.pop('_archived_records', None)
+        return archive
+
+    @staticmethod
+    def records(session):
+        """The archived rows as unsaved model instances keyed by relation name, or None if not archived."""
+        if '_archived_records' in session.__dict__:
+            return session._archived_records
+        archive = None
+        if session.status == 'COMPLETED':
+            archive = SessionArchive.objects.filter(session=session).first()
+        if archive is None:
+            session._archived_records = None
+            return None
+
+        rows = json.loads(zlib.decompress(bytes(archive.payload)))['rows']
+        records = {}
+        for model, relation in ARCHIVED_RELATIONS:
+            using = _database(model, session)
+            records[relation] = [_instance(model, row, using) for row in rows.get(model._meta.label_lower, [])]
+        # The roll serializer shows each character's name.
+        models.prefetch_related_objects(records['rolls'], 'character')
+        session._archived_records = records
+        return records
+
+    @staticmethod
+    def hydrate(session):
+        """Make the session's reverse relations return its archived rows, followed by any written since.
+
+        Returns False (and leaves the relations alone) if the session is not archived.
+        """
+        records = SessionArchiveService.records(session)
+        if records is None:
+            return False
+        cache = session.__dict__.setdefault('_prefetched_objects_cache', {})
+        for model, relation in ARCHIVED_RELATIONS:
+            cache.pop(relation, None)
+            queryset = getattr(session, relation).all()
+            queryset._result_cache = list(records[relation]) + list(queryset.order_by('pk'))
+            queryset._prefetch_done = True
+            cache[relation] = queryset
+        return True
+
+    @staticmethod
+    def restore(session):
+        """Put an archived session's rows back into the hot tables and delete the archive."""
+        archive = SessionArchive.objects.get(session=session)
+        rows = json.loads(zlib.decompress(bytes(archive.payload)))['rows']
+        for model in [model for model, _ in ARCHIVED_RELATIONS] + [RollHistory]:
+            using = _database(model, session)
+            instances = [_instance(model, row, using) for row in rows.get(model._meta.label_lower, [])]
+            with transaction.atomic(using=using), sharding.keep_timestamps(model):
+                model.objects.using(using).bulk_create(instances)
+        archive.delete()
+        session.__dict__.pop('_archived_records', None)
+        session.__dict__.pop('_prefetched_objects_cache', None)
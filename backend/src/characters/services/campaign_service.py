@@ -1,8 +1,10 @@
 from django.db import models
 from django.core.exceptions import PermissionDenied
+from app.tracing import trace_methods
 from ..models import Campaign, Character, NPC
 
 
+@trace_methods('service')
 class CampaignService:
     """Service class for campaign-related business logic."""
     
@@ -1,9 +1,20 @@
 import random
-from django.db import transaction
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import F
 from django.core.exceptions import PermissionDenied
+from app import json_patch
+from app.tracing import trace_methods
+from app.versioning import VersionConflict
 from ..models import Character, CharacterHistory
+from .history_service import CharacterHistoryService
 
 
+class _ApplyInPython(Exception):
+    pass
+
+
+@trace_methods('service')
 class CharacterService:
     """Service class for character-related business logic."""
     
@@ -94,26 +105,99 @@ class CharacterService:
         
         return amount
     
+    # Sheet fields a player may edit one at a time (update-field / update-fields). Advancement
+    # totals, ownership and GM settings only change through their own endpoints.
+    PATCHABLE_FIELDS = frozenset([
+        'true_name', 'alias', 'appearance', 'image_url', 'background_note', 'background_note2', 'level',
+        'action_dots', 'playbook', 'stand_type', 'stand_name', 'stand_form', 'stand_conscious', 'coin_stats',
+        'armor_type', 'close_friend', 'rival', 'vice_details', 'loadout', 'stress', 'trauma',
+        'healing_clock_segments', 'healing_clock_filled', 'light_armor_used', 'medium_armor_used',
+        'heavy_armor_used', 'harm_level1_used', 'harm_level1_name', 'harm_level2_used', 'harm_level2_name',
+        'harm_level3_used', 'harm_level3_name', 'harm_level4_used', 'harm_level4_name', 'xp_clocks',
+        'inventory', 'reputation_status', 'custom_ability_description', 'custom_ability_type',
+        'extra_custom_abilities', 'development_temporary_ability', 'faction_reputation',
+    ])
+
     @staticmethod
     def update_field(character, field_name, value):
         """Update a specific field on a character."""
-        if not hasattr(character, field_name):
-            raise ValueError(f'Field {field_name} does not exist')
-        
-        old_value = getattr(character, field_name)
-        setattr(character, field_name, value)
-        character.save()
-        
-        # Log the change
-        CharacterHistory.objects.create(
-            character=character,
-            action='field_updated',
-            details=f'Updated {field_name}: {old_value} → {value}',
-            value=value
-        )
-        
-        return True
-    
+        return CharacterService.update_fields(character, {field_name: value})
+
+    @staticmethod
+    def update_fields(character, values):
+        """Set several sheet fields and save only the ones whose value changed.
+
+        Returns ``{field: new value}`` for the changed fields.
+        """
+        for field_name in values:
+            if field_name not in CharacterService.PATCHABLE_FIELDS:
+                raise ValueError(f'Field {field_name} cannot be edited')
+            if field_name in (character.gm_locked_fields or []):
+                raise ValueError(f"Field '{field_name}' is locked by the GM and cannot be changed.")
+
+        changed = {name: value for name, value in values.items() if getattr(character, name) != value}
+        if changed:
+            for name, value in changed.items():
+                setattr(character, name, value)
+            character.save(update_fields=list(changed))
+        return changed
+
+    # JSON fields that take JSON Patch operations (json-patch).
+    JSON_PATCH_FIELDS = ('inventory', 'reputation_status', 'xp_clocks', 'faction_reputation')
+
+    @staticmethod
+    def patch_json(character, field_name, operations):
+        """Apply RFC 6902 ``operations`` to one of the character's JSON fields; returns the new value.
+
+        Each operation is a guarded UPDATE of just that column using the database's JSON
+        functions, so concurrent patches to different keys all land. Patches the database
+        cannot apply exactly (compressed values, move/copy/test, ...) are applied in Python
+        on the locked row instead.
+        """
+        if field_name not in CharacterService.JSON_PATCH_FIELDS:
+            raise ValueError(f'Field {field_name} does not take JSON patches')
+        if field_name in (character.gm_locked_fields or []):
+            raise ValueError(f"Field '{field_name}' is locked by the GM and cannot be changed.")
+        if not isinstance(operations, list) or not operations:
+            raise json_patch.JSONPatchError('A JSON patch is a non-empty list of operations')
+
+        expected = character.expected_version
+        connection = connections[router.db_for_write(Character)]
+        sqlite_version = getattr(connection.Database, 'sqlite_version_info', (0,))
+        compiled = [json_patch.sql_operation(connection.vendor, field_name, op, sqlite_version) for op in operations]
+        # Compressed values are opaque to the database's JSON functions.
+        if None not in compiled and not getattr(settings, 'COMPRESSED_JSON_ENABLED', False):
+            try:
+                with transaction.atomic(using=connection.alias):
+                    for i, (expression, guards) in enumerate(compiled):
+                        rows = Character.objects.filter(*guards, pk=character.pk)
+                        updates = {field_name: expression}
+                        if i == 0:
+                            if expected is not None:
+                                rows = rows.filter(version=expected)
+                            updates['version'] = F('version') + 1
+                        if not rows.update(**updates):
+                            raise _ApplyInPython
+                    value, version = Character.objects.values_list(field_name, 'version').get(pk=character.pk)
+                    setattr(character, field_name, value)
+                    character.version = version
+                    CharacterHistoryService.record(character, fields=[field_name])
+                character.__dict__.pop('_expected_version', None)
+                return value
+            except _ApplyInPython:
+                pass
+
+        with transaction.atomic(using=connection.alias):
+            locked = Character.objects.select_for_update().get(pk=character.pk)
+            if expected is not None and locked.version != expected:
+                raise VersionConflict(f'Character {character.pk} is no longer at version {expected}')
+            setattr(locked, field_name, json_patch.apply_patch(getattr(locked, field_name), operations))
+            locked.save(update_fields=[field_name])
+        setattr(character, field_name, getattr(locked, field_name))
+        character.version = locked.version
+        character.__dict__.pop('_expected_version', None)
+        return getattr(character, field_name)
+
     @staticmethod
     def create_character_template(template_data):
         """Create a character template for quick character creation."""
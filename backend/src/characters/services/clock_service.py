@@ -0,0 +1,36 @@
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.db.models.functions import Greatest, Least
+
+from app.tracing import trace_methods
+from ..models import ProgressClock
+
+
+@trace_methods('service')
+class ProgressClockService:
+    """Progress clock updates done in the database, so concurrent ticks never overwrite each other."""
+
+    @staticmethod
+    def tick(deltas):
+        """Add ``{clock_id: delta}`` segments to each clock in one UPDATE; returns the clocks' new state.
+
+        Filled segments are clamped to ``0..max_segments`` and ``completed`` is set in the same
+        statement, from the row's values at the time it is updated.
+        """
+        if not deltas:
+            return []
+        delta = Case(
+            *[When(pk=clock_id, then=Value(amount)) for clock_id, amount in deltas.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+        with transaction.atomic():
+            ProgressClock.objects.filter(pk__in=deltas).update(
+                filled_segments=Greatest(Value(0), Least(F('max_segments'), F('filled_segments') + delta)),
+                # The SET expressions all see the old row, so test old filled + delta.
+                completed=Case(
+                    When(Q(filled_segments__gte=F('max_segments') - delta), then=Value(True)),
+                    default=Value(False),
+                ),
+            )
+            return list(ProgressClock.objects.filter(pk__in=deltas).order_by('pk'))
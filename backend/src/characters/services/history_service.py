@@ -0,0 +1,152 @@
+import json
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Subquery
+from django.db.models.fields.files import FieldFile
+from django.utils import timezone
+
+from app.tracing import trace_methods
+from ..models import CharacterHistory
+
+
+_MISSING = object()
+
+
+@trace_methods('service')
+class CharacterHistoryService:
+    """Snapshot + delta character history: recording, point-in-time reconstruction and compaction."""
+
+    @staticmethod
+    def tracked_state(character, fields=None):
+        """The character's field values as stored in history (JSON types, foreign keys by id).
+
+        ``fields`` limits the state to those field names (as passed to ``save(update_fields=...)``).
+        """
+        state = {}
+        for field in character._meta.concrete_fields:
+            if field.primary_key or (fields is not None and field.name not in fields and field.attname not in fields):
+                continue
+            if field.name == 'version':  # bumped by every save, not part of the sheet
+                continue
+            value = field.value_from_object(character)
+            if isinstance(value, FieldFile):
+                value = value.name or ''
+            state[field.attname] = value
+        # Round-trip so dates, decimals etc. compare equal to what was stored.
+        return json.loads(json.dumps(state, cls=DjangoJSONEncoder))
+
+    @staticmethod
+    def _chain(character_id, at=None):
+        """The latest snapshot (as of ``at``) and the deltas after it, oldest first, in one query."""
+        entries = CharacterHistory.objects.filter(character_id=character_id)
+        if at is not None:
+            entries = entries.filter(timestamp__lte=at)
+        latest_snapshot = entries.filter(kind=CharacterHistory.SNAPSHOT).order_by('-timestamp', '-pk').values('timestamp')[:1]
+        chain = list(entries.filter(timestamp__gte=Subquery(latest_snapshot)).order_by('timestamp', 'pk'))
+        # Entries sharing the snapshot's timestamp but written before it are already in it.
+        while chain and chain[0].kind != CharacterHistory.SNAPSHOT:
+            chain.pop(0)
+        return chain
+
+    @staticmethod
+    def _replay(chain):
+        state = {}
+        for entry in chain:
+            if entry.kind == CharacterHistory.SNAPSHOT:
+                state = entry.changed_fields
+            else:
+                state.update(entry.changed_fields)
+        return state
+
+    @staticmethod
+    def state_at(character_id, at=None):
+        """The character's fields as of ``at`` (default: the latest entry), or None before its first snapshot."""
+        chain = CharacterHistoryService._chain(character_id, at)
+        if not chain:
+            return None
+        return CharacterHistoryService._replay(chain)
+
+    @staticmethod
+    def record(character, editor=None, fields=None):
+        """Store what changed since the last entry: a delta, or a snapshot every SNAPSHOT_EVERY entries.
+
+        ``fields`` (a save's ``update_fields``) limits the diff to the fields that were written.
+        """
+        chain = CharacterHistoryService._chain(character.pk)
+        if not chain:
+            return CharacterHistory.objects.create(
+                character=character, editor=editor, kind=CharacterHistory.SNAPSHOT,
+                changed_fields=CharacterHistoryService.tracked_state(character),
+            )
+
+        current = CharacterHistoryService.tracked_state(character, fields)
+        previous = CharacterHistoryService._replay(chain)
+        changes = {name: value for name, value in current.items() if previous.get(name, _MISSING) != value}
+        if not changes:
+            return None
+        if len(chain) > settings.CHARACTER_HISTORY_SNAPSHOT_EVERY:
+            return CharacterHistory.objects.create(
+                character=character, editor=editor, kind=CharacterHistory.SNAPSHOT,
+                changed_fields=CharacterHistoryService.tracked_state(character),
+            )
+        return CharacterHistory.objects.create(
+            character=character, editor=editor, kind=CharacterHistory.DELTA, changed_fields=changes
+        )
+
+    @staticmethod
+    def compact(character_id, merge_before=None, retain_after=None):
+        """Compact one character's history; returns the number of entries removed.
+
+        Entries older than ``retain_after`` are folded into a single snapshot holding the state
+        as of the newest of them. Deltas older than ``merge_before`` are merged into one delta per
+        day (the day's last entry keeps the merged changes), so states within that day are lost
+        but every day's end state can still be rebuilt.
+        """
+        now = timezone.now()
+        if merge_before is None:
+            merge_before = now - timedelta(days=settings.CHARACTER_HISTORY_COMPACT_AFTER_DAYS)
+        if retain_after is None:
+            retain_after = now - timedelta(days=settings.CHARACTER_HISTORY_RETENTION_DAYS)
+
+        removed = 0
+        with transaction.atomic():
+            entries = list(
+                CharacterHistory.objects.select_for_update()
+                .filter(character_id=character_id, timestamp__lt=max(merge_before, retain_after))
+                .order_by('timestamp', 'pk')
+            )
+
+            expired = [entry for entry in entries if entry.timestamp < retain_after]
+            if len(expired) > 1 or (expired and expired[-1].kind != CharacterHistory.SNAPSHOT):
+                last = expired[-1]
+                last.changed_fields = CharacterHistoryService._replay(expired)
+                last.kind = CharacterHistory.SNAPSHOT
+                last.save(update_fields=['kind', 'payload'])
+                removed += CharacterHistory.objects.filter(pk__in=[e.pk for e in expired[:-1]]).delete()[0]
+                entries = [last] + entries[len(expired):]
+
+            doomed = []
+            mergeable = [entry for entry in entries if entry.timestamp < merge_before]
+            # Runs of deltas on the same day with no snapshot in between.
+            runs = groupby(
+                mergeable,
+                key=lambda e: (e.kind, timezone.localdate(e.timestamp)) if e.kind == CharacterHistory.DELTA else e.pk,
+            )
+            for _, run in runs:
+                run = list(run)
+                if len(run) < 2:
+                    continue
+                merged = {}
+                for entry in run:
+                    merged.update(entry.changed_fields)
+                last = run[-1]
+                last.changed_fields = merged
+                last.save(update_fields=['payload'])
+                doomed.extend(entry.pk for entry in run[:-1])
+            if doomed:
+                removed += CharacterHistory.objects.filter(pk__in=doomed).delete()[0]
+        return removed
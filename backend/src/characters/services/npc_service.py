@@ -0,0 +1,79 @@
+from django.db import transaction
+
+from app.tracing import trace_methods
+from ..models import NPC
+
+
+# Effect level to clock ticks (SRD: Limited=1, Standard=2, Great/Greater=3)
+EFFECT_TO_TICKS = {'limited': 1, 'standard': 2, 'great': 3, 'greater': 3, 'extreme': 4}
+CLOCK_TYPES = ('vulnerability', 'harm')
+
+
+@trace_methods('service')
+class NPCClockService:
+    """NPC harm/vulnerability clock updates made under row locks, so simultaneous hits all land."""
+
+    @staticmethod
+    def clock_state(npc):
+        """Both of the NPC's clocks as sent to clients."""
+        return {
+            'vulnerability': {
+                'current': npc.vulnerability_clock_current,
+                'max': npc.vulnerability_clock_max,
+                'defeated': npc.vulnerability_clock_current >= npc.vulnerability_clock_max > 0,
+            },
+            'harm': {
+                'current': npc.harm_clock_current,
+                'max': npc.harm_clock_max,
+                'filled': npc.harm_clock_current >= npc.harm_clock_max,
+            },
+        }
+
+    @staticmethod
+    def apply_effects(effects):
+        """Apply ``[(npc_id, clock_type, effect), ...]`` in order, in one transaction.
+
+        The NPC rows are locked (in pk order, so concurrent batches cannot deadlock) before
+        their clocks are read, and written back with one UPDATE. Returns one result per effect,
+        each carrying the NPC's clock state after that effect.
+        """
+        for _, clock_type, effect in effects:
+            if effect not in EFFECT_TO_TICKS:
+                raise ValueError(f'effect must be one of: {", ".join(EFFECT_TO_TICKS)}')
+            if clock_type not in CLOCK_TYPES:
+                raise ValueError('clock_type must be "vulnerability" or "harm"')
+
+        with transaction.atomic():
+            npc_ids = {npc_id for npc_id, _, _ in effects}
+            npcs = {npc.pk: npc for npc in NPC.objects.select_for_update().filter(pk__in=npc_ids).order_by('pk')}
+            if len(npcs) != len(npc_ids):
+                raise NPC.DoesNotExist(f'NPCs not found: {sorted(npc_ids - set(npcs))}')
+
+            results = []
+            for npc_id, clock_type, effect in effects:
+                npc = npcs[npc_id]
+                ticks = EFFECT_TO_TICKS[effect]
+                attname = f'{clock_type}_clock_current'
+                max_segments = getattr(npc, f'{clock_type}_clock_max')
+                previous = getattr(npc, attname)
+                current = min(previous + ticks, max_segments)
+                setattr(npc, attname, current)
+                clocks = NPCClockService.clock_state(npc)
+                result = {
+                    'npc_id': npc_id,
+                    'clock_type': clock_type,
+                    'effect': effect,
+                    'ticks_applied': ticks,
+                    'previous': previous,
+                    'current': current,
+                    'max': max_segments,
+                    'clocks': clocks,
+                }
+                if clock_type == 'vulnerability':
+                    result['defeated'] = clocks['vulnerability']['defeated']
+                else:
+                    result['filled'] = clocks['harm']['filled']
+                results.append(result)
+
+            NPC.objects.bulk_update(npcs.values(), ['vulnerability_clock_current', 'harm_clock_current'])
+        return results
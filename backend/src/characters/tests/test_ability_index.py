@@ -0,0 +1,103 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from characters import ability_index
+from characters.models import Campaign, Heritage, HamonAbility, SpinAbility
+from characters.serializers import CharacterSerializer
+
+
+class AbilityIndexTest(TestCase):
+    def setUp(self):
+        ability_index.invalidate()
+        self.breathing = HamonAbility.objects.create(name='Ripple Breathing', hamon_type='FOUNDATION', description='-')
+        self.chain = HamonAbility.objects.create(
+            name='Ripple Chain', hamon_type='TRADITIONALIST', description='-', required_a_count=2
+        )
+        self.messiah = HamonAbility.objects.create(
+            name='Hamon Messiah', hamon_type='TRADITIONALIST', description='-', required_a_count=4
+        )
+        self.arc = SpinAbility.objects.create(
+            name='Golden Arc', spin_type='CAVALIER', description='-', required_a_count=1
+        )
+
+    def test_available_by_a_count(self):
+        index = ability_index.get_index()
+        names = lambda abilities: [ability.name for ability in abilities]
+        self.assertEqual(names(index.available('HAMON', 0)), ['Ripple Breathing'])
+        self.assertEqual(names(index.available('HAMON', 3)), ['Ripple Breathing', 'Ripple Chain'])
+        self.assertEqual(len(index.available('HAMON', 6)), 3)
+        self.assertEqual(len(index.available('HAMON')), 3)
+        self.assertEqual(index.available('SPIN', 0), ())
+        self.assertEqual(index.available('STAND', 2), ())
+
+    def test_lookups_do_not_query_until_abilities_change(self):
+        ability_index.get_index()
+        with self.assertNumQueries(0):
+            ability_index.get_index().available('HAMON', 2)
+        self.chain.required_a_count = 1
+        self.chain.save()
+        self.assertIn(self.chain.pk, [ability.id for ability in ability_index.get_index().available('HAMON', 1)])
+
+    def test_check_whole_set(self):
+        unknown, insufficient = ability_index.get_index().check(
+            'HAMON', [self.breathing.pk, self.chain.pk, self.messiah.pk, 9999], 2
+        )
+        self.assertEqual(unknown, [9999])
+        self.assertEqual([ability.name for ability in insufficient], ['Hamon Messiah'])
+
+    def test_serializer_rejects_abilities_beyond_a_count(self):
+        user = User.objects.create_user(username='caesar', password='pw')
+        heritage = Heritage.objects.create(name='Human', base_hp=0)
+        data = {
+            'true_name': 'Caesar', 'playbook': 'HAMON', 'heritage': heritage.pk,
+            'campaign': Campaign.objects.create(name='Battle Tendency', gm=user).pk,
+            'coin_stats': {'power': 'A', 'speed': 'A', 'range': 'C'},
+        }
+        serializer = CharacterSerializer(data={**data, 'hamon_ability_ids': [self.breathing.pk, self.messiah.pk]})
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("need 4 'A's", str(serializer.errors))
+
+        serializer = CharacterSerializer(data={**data, 'hamon_ability_ids': [9999]})
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('hamon_ability_ids', serializer.errors)
+
+        serializer = CharacterSerializer(data={**data, 'hamon_ability_ids': [self.breathing.pk, self.chain.pk]})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        character = serializer.save(user=user)
+        self.assertEqual(
+            [ability['name'] for ability in CharacterSerializer(character).data['hamon_ability_details']],
+            ['Ripple Breathing', 'Ripple Chain'],
+        )
+
+    def test_available_playbook_abilities_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username='lisa', password='pw'))
+        heritage = Heritage.objects.create(name='Hamon User', base_hp=0)
+        response = client.get(f'/api/get_available_playbook_abilities/?heritage_id={heritage.pk}&a_count=2')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([a['name'] for a in response.data['hamon_abilities']], ['Ripple Breathing', 'Ripple Chain'])
+        response = client.get(f'/api/get_available_playbook_abilities/?heritage_id={heritage.pk}&a_count=x')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_other_workers_changes_are_picked_up(self):
+        ability_index.get_index()
+        # Written by another worker: no signal reaches this process, only the shared stamp.
+        overdrive = HamonAbility.objects.bulk_create([
+            HamonAbility(name='Sunlight Yellow Overdrive', hamon_type='FOUNDATION', description='-')
+        ])[0]
+        self.assertIsNone(ability_index.get_index().get('HAMON', overdrive.pk))
+        cache.set(ability_index.GENERATION_KEY, 'another worker')
+        self.assertIsNotNone(ability_index.get_index().get('HAMON', overdrive.pk))
+
+    def test_unknown_ids_rebuild_once_before_rejecting(self):
+        ability_index.get_index()
+        overdrive = HamonAbility.objects.bulk_create([
+            HamonAbility(name='Sunlight Yellow Overdrive', hamon_type='FOUNDATION', description='-')
+        ])[0]
+        serializer = CharacterSerializer()
+        self.assertEqual(serializer._validate_ability_ids('HAMON', [overdrive.pk]), [overdrive.pk])
+        with self.assertNumQueries(0):
+            serializer._validate_ability_ids('HAMON', [overdrive.pk])
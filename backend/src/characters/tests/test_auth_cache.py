@@ -0,0 +1,57 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from rest_framework import status
+
+
+class CachedAuthTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='jotaro', password='old-password-123')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_token_auth_costs_no_queries_once_warm(self):
+        self.assertEqual(self.client.get('/api/accounts/me/').status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/accounts/me/')
+        self.assertEqual(response.data['username'], 'jotaro')
+
+    def test_session_auth_costs_no_queries_once_warm(self):
+        client = APIClient()
+        client.login(username='jotaro', password='old-password-123')
+        client.get('/api/accounts/me/')
+        with self.assertNumQueries(0):
+            response = client.get('/api/accounts/me/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_deleted_token_is_rejected_immediately(self):
+        self.client.get('/api/accounts/me/')
+        self.token.delete()
+        self.assertEqual(self.client.get('/api/accounts/me/').status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_deactivated_user_is_rejected_immediately(self):
+        self.client.get('/api/accounts/me/')
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/accounts/me/').status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_password_change_refreshes_cached_user(self):
+        session_client = APIClient()
+        session_client.login(username='jotaro', password='old-password-123')
+        session_client.get('/api/accounts/me/')
+
+        response = self.client.post(
+            '/api/user-profiles/change-password/',
+            {'old_password': 'old-password-123', 'new_password': 'new-password-456'},
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Sessions created with the old password hash are no longer valid.
+        self.assertEqual(session_client.get('/api/accounts/me/').status_code, status.HTTP_403_FORBIDDEN)
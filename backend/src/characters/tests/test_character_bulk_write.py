@@ -0,0 +1,99 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from characters import ability_index
+from characters.models import (
+    Ability, Benefit, Campaign, Character, CharacterHamonAbility, Detriment, HamonAbility, Heritage, Vice,
+)
+from characters.serializers import CharacterSerializer
+
+
+WRITES = ('INSERT', 'UPDATE', 'DELETE')
+
+
+def writes(queries):
+    return [q['sql'] for q in queries.captured_queries if q['sql'].lstrip().upper().startswith(WRITES)]
+
+
+class CharacterBulkWriteTest(TestCase):
+    def setUp(self):
+        ability_index.invalidate()
+        self.user = User.objects.create_user(username='josuke', password='pw')
+        self.campaign = Campaign.objects.create(name='Diamond is Unbreakable', gm=self.user)
+        self.heritage = Heritage.objects.create(name='Human', base_hp=4)
+        self.benefits = [Benefit.objects.create(heritage=self.heritage, name=f'Benefit {i}', hp_cost=1) for i in range(2)]
+        self.detriments = [Detriment.objects.create(heritage=self.heritage, name=f'Detriment {i}', hp_value=1)
+                           for i in range(2)]
+        self.abilities = [Ability.objects.create(name=f'Ability {i}', type='standard') for i in range(3)]
+        self.hamon = [HamonAbility.objects.create(name=f'Hamon {i}', hamon_type='FOUNDATION', description='-')
+                      for i in range(3)]
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def _sheet(self, **extra):
+        return {
+            'true_name': 'Josuke Higashikata', 'playbook': 'STAND', 'campaign': self.campaign.pk,
+            'heritage': self.heritage.pk,
+            'selected_benefits': [b.pk for b in self.benefits],
+            'selected_detriments': [d.pk for d in self.detriments],
+            'standard_abilities': [a.pk for a in self.abilities],
+            **extra,
+        }
+
+    def test_typical_new_sheet_takes_five_writes(self):
+        ability_index.get_index()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/characters/', self._sheet(), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        # character, its first history snapshot, and one bulk insert per link table
+        self.assertEqual(len(writes(queries)), 5, writes(queries))
+
+        character = Character.objects.get(pk=response.data['id'])
+        self.assertEqual(sorted(response.data['standard_abilities']), sorted(a.pk for a in self.abilities))
+        self.assertEqual(character.standard_abilities.count(), 3)
+        self.assertEqual(character.selected_benefits.count(), 2)
+        self.assertEqual(character.selected_detriments.count(), 2)
+
+    def test_response_reuses_created_objects(self):
+        serializer = CharacterSerializer(data=self._sheet(hamon_ability_ids=[self.hamon[0].pk, self.hamon[1].pk]))
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        character = serializer.save(user=self.user)
+        # Only the heritage's own benefit/detriment lists (heritage_details) are read.
+        with self.assertNumQueries(2):
+            data = serializer.data
+        self.assertEqual([a['name'] for a in data['hamon_ability_details']], ['Hamon 0', 'Hamon 1'])
+        self.assertEqual(len(data['standard_ability_details']), 3)
+        self.assertIsNone(data['stand'])
+        self.assertEqual(CharacterHamonAbility.objects.filter(character=character).count(), 2)
+
+    def test_update_diffs_ability_links(self):
+        response = self.client.post('/api/characters/', self._sheet(
+            hamon_ability_ids=[self.hamon[0].pk, self.hamon[1].pk]), format='json')
+        character_id = response.data['id']
+        kept = CharacterHamonAbility.objects.get(character_id=character_id, hamon_ability=self.hamon[0])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(f'/api/characters/{character_id}/', {
+                'hamon_ability_ids': [self.hamon[0].pk, self.hamon[2].pk],
+                'standard_abilities': [self.abilities[0].pk, self.abilities[1].pk],
+            }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual([a['name'] for a in response.data['hamon_ability_details']], ['Hamon 0', 'Hamon 2'])
+
+        links = CharacterHamonAbility.objects.filter(character_id=character_id)
+        self.assertEqual(sorted(link.hamon_ability_id for link in links), [self.hamon[0].pk, self.hamon[2].pk])
+        self.assertTrue(links.filter(pk=kept.pk).exists())
+        link_writes = [sql for sql in writes(queries) if 'characterhamonability' in sql or 'standard_abilities' in sql]
+        # one DELETE and one INSERT for Hamon, one DELETE for the dropped standard ability
+        self.assertEqual(len(link_writes), 3, link_writes)
+
+    def test_custom_vice_is_reused(self):
+        for name in ('Josuke', 'Okuyasu'):
+            response = self.client.post('/api/characters/', self._sheet(true_name=name, custom_vice='Hair'),
+                                        format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(Vice.objects.filter(name='Hair').count(), 1)
@@ -0,0 +1,85 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from characters.models import Campaign, Character, CharacterHistory
+
+
+class CharacterFieldPatchTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='jotaro', password='pw')
+        self.campaign = Campaign.objects.create(name='Stardust Crusaders', gm=self.user)
+        self.character = Character.objects.create(true_name='Jotaro', user=self.user, campaign=self.campaign)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = f'/api/characters/{self.character.pk}/update-fields/'
+
+    def test_writes_and_returns_only_changed_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(self.url, {'fields': {
+                'true_name': 'Jotaro', 'stress': 3, 'alias': 'JoJo', 'xp_clocks': {'playbook': 2},
+            }}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['changed'], {'stress': 3, 'alias': 'JoJo', 'xp_clocks': {'playbook': 2}})
+
+        updates = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE "characters_character"')]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('"true_name"', updates[0])
+        self.assertNotIn('"inventory"', updates[0])
+
+        self.character.refresh_from_db()
+        self.assertEqual((self.character.stress, self.character.alias), (3, 'JoJo'))
+        delta = self.character.history_entries.order_by('-pk').first()
+        self.assertEqual(delta.kind, CharacterHistory.DELTA)
+        self.assertEqual(delta.changed_fields, {'stress': 3, 'alias': 'JoJo', 'xp_clocks': {'playbook': 2}})
+
+    def test_unchanged_values_do_not_write(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(self.url, {'fields': {'stress': 0}}, format='json')
+        self.assertEqual(response.data['changed'], {})
+        self.assertFalse(any(q['sql'].startswith('UPDATE') for q in queries.captured_queries))
+
+    def test_rejects_unlisted_locked_and_invalid_fields(self):
+        self.character.gm_locked_fields = ['level']
+        self.character.save()
+        response = self.client.patch(self.url, {'fields': {
+            'total_xp_spent': 50, 'user': 1, 'level': 3, 'stress': 'lots', 'alias': 'JoJo',
+        }}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(response.data['errors']), {'total_xp_spent', 'user', 'level', 'stress'})
+        self.character.refresh_from_db()
+        self.assertIsNone(self.character.alias)
+
+    def test_single_field_endpoint_uses_the_same_rules(self):
+        url = f'/api/characters/{self.character.pk}/update-field/'
+        response = self.client.patch(url, {'field': 'alias', 'value': 'JoJo'}, format='json')
+        self.assertEqual(response.data['changed'], {'alias': 'JoJo'})
+        response = self.client.patch(url, {'field': 'gm_locked_fields', 'value': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_player_cannot_change_playbook_on_a_gm_locked_sheet(self):
+        player = User.objects.create_user(username='polnareff', password='pw')
+        character = Character.objects.create(
+            true_name='Polnareff', user=player, campaign=self.campaign, playbook='STAND',
+            gm_character_locked=True, gm_allowed_edit_fields={'playbook': False},
+        )
+        client = APIClient()
+        client.force_authenticate(user=player)
+        for url, data in ((f'/api/characters/{character.pk}/update-field/', {'field': 'playbook', 'value': 'HAMON'}),
+                          (f'/api/characters/{character.pk}/update-fields/', {'fields': {'playbook': 'HAMON'}})):
+            response = client.patch(url, data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('playbook', response.data['errors'])
+        character.refresh_from_db()
+        self.assertEqual(character.playbook, 'STAND')
+
+        # The GM can still change it, and so can the player on fields the lock does not cover.
+        response = self.client.patch(f'/api/characters/{character.pk}/update-fields/',
+                                     {'fields': {'playbook': 'HAMON'}}, format='json')
+        self.assertEqual(response.data['changed'], {'playbook': 'HAMON'})
+        response = client.patch(f'/api/characters/{character.pk}/update-fields/',
+                                {'fields': {'alias': 'Silver Chariot'}}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
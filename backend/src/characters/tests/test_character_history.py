@@ -0,0 +1,99 @@
+import os
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from characters.models import Campaign, Character, CharacterHistory
+from characters.services.history_service import CharacterHistoryService
+
+
+class CharacterHistoryTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='joseph', password='pw')
+        self.campaign = Campaign.objects.create(name='Battle Tendency', gm=self.user)
+        self.character = Character.objects.create(true_name='Joseph', user=self.user, campaign=self.campaign)
+        self.start = timezone.now() - timedelta(days=400)
+        self._stamp(self.character.history_entries.get(), self.start)
+
+    def _stamp(self, entry, when):
+        CharacterHistory.objects.filter(pk=entry.pk).update(timestamp=when)
+
+    def _change(self, when, **fields):
+        for name, value in fields.items():
+            setattr(self.character, name, value)
+        self.character.save()
+        entry = self.character.history_entries.order_by('-pk').first()
+        self._stamp(entry, when)
+        return entry
+
+    def test_creation_snapshot_then_deltas_of_changed_keys(self):
+        snapshot = self.character.history_entries.get()
+        self.assertEqual(snapshot.kind, CharacterHistory.SNAPSHOT)
+        self.assertEqual(snapshot.changed_fields['true_name'], 'Joseph')
+
+        delta = self._change(self.start + timedelta(hours=1), stress=2, loadout=2)
+        self.assertEqual(delta.kind, CharacterHistory.DELTA)
+        self.assertEqual(delta.changed_fields, {'stress': 2, 'loadout': 2})
+
+        # Saving without changes records nothing.
+        self.character.save()
+        self.assertEqual(self.character.history_entries.count(), 2)
+
+    @override_settings(CHARACTER_HISTORY_SNAPSHOT_EVERY=3)
+    def test_snapshot_every_k_deltas(self):
+        for stress in range(1, 9):
+            self._change(self.start + timedelta(minutes=stress), stress=stress)
+        kinds = list(self.character.history_entries.order_by('timestamp', 'pk').values_list('kind', flat=True))
+        self.assertEqual(kinds, ['SNAPSHOT', 'DELTA', 'DELTA', 'DELTA', 'SNAPSHOT', 'DELTA', 'DELTA', 'DELTA', 'SNAPSHOT'])
+        with self.assertNumQueries(1):
+            chain = CharacterHistoryService._chain(self.character.pk)
+        self.assertEqual(len(chain), 1)
+
+    def test_state_at_replays_snapshot_and_deltas(self):
+        self._change(self.start + timedelta(days=1), stress=3)
+        self._change(self.start + timedelta(days=2), loadout=4)
+        self._change(self.start + timedelta(days=3), stress=0)
+
+        state = CharacterHistoryService.state_at(self.character.pk, self.start + timedelta(days=2, hours=1))
+        self.assertEqual((state['stress'], state['loadout']), (3, 4))
+        self.assertEqual(CharacterHistoryService.state_at(self.character.pk)['stress'], 0)
+        self.assertIsNone(CharacterHistoryService.state_at(self.character.pk, self.start - timedelta(days=1)))
+
+    def test_compaction_merges_per_day_and_enforces_retention(self):
+        now = timezone.now()
+        self._change(now - timedelta(days=380), stress=1)
+        self._change(now - timedelta(days=100, hours=3), stress=2)
+        self._change(now - timedelta(days=100, hours=2), loadout=5)
+        self._change(now - timedelta(days=100, hours=1), stress=4)
+        self._change(now - timedelta(days=1), loadout=6)
+
+        call_command('compact_character_history', retention_days=365, compact_after_days=30, stdout=open(os.devnull, 'w'))
+
+        entries = list(self.character.history_entries.order_by('timestamp', 'pk'))
+        self.assertEqual([e.kind for e in entries], ['SNAPSHOT', 'DELTA', 'DELTA'])
+        self.assertEqual(entries[0].changed_fields['stress'], 1)
+        self.assertEqual(entries[1].changed_fields, {'stress': 4, 'loadout': 5})
+        # End-of-day states survive compaction.
+        state = CharacterHistoryService.state_at(self.character.pk, now - timedelta(days=50))
+        self.assertEqual((state['stress'], state['loadout']), (4, 5))
+        self.assertEqual(CharacterHistoryService.state_at(self.character.pk)['loadout'], 6)
+
+    def test_as_of_endpoint(self):
+        self._change(self.start + timedelta(days=1), stress=5)
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        url = f'/api/characters/{self.character.pk}/as-of/'
+
+        response = client.get(url, {'at': (self.start + timedelta(hours=1)).isoformat()})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['fields']['stress'], 0)
+        self.assertEqual(client.get(url, {'at': 'yesterday'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            client.get(url, {'at': (self.start - timedelta(days=1)).isoformat()}).status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
@@ -0,0 +1,70 @@
+import json
+import os
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from app.compressed_json import Packed
+from characters.models import Character
+
+
+INVENTORY = [{'name': f'Bullet {i}', 'notes': 'Sheer Heart Attack shrapnel, kept for evidence'} for i in range(100)]
+
+
+@override_settings(COMPRESSED_JSON_ENABLED=True, COMPRESSED_JSON_MIN_BYTES=512)
+class CompressedJSONFieldTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='koichi', password='pw')
+
+    def _create(self, **fields):
+        return Character.objects.create(true_name='Koichi', user=self.user, **fields)
+
+    def _raw(self, character, column):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT "{column}" FROM characters_character WHERE id = %s', [character.pk])
+            return cursor.fetchone()[0]
+
+    def test_large_values_are_stored_compressed(self):
+        character = self._create(inventory=INVENTORY, action_dots={'hunt': 1})
+        raw = self._raw(character, 'inventory')
+        self.assertIn('__compressed__', raw)
+        self.assertLess(len(raw), len(json.dumps(INVENTORY)) // 4)
+        # Small values stay plain JSON.
+        self.assertEqual(json.loads(self._raw(character, 'action_dots')), {'hunt': 1})
+
+    def test_decoding_is_lazy(self):
+        character = Character.objects.get(pk=self._create(inventory=INVENTORY).pk)
+        self.assertIsInstance(character.__dict__['inventory'], Packed)
+        self.assertEqual(character.inventory, INVENTORY)
+        self.assertIsInstance(character.__dict__['inventory'], list)
+
+    def test_values_are_decoded(self):
+        character = self._create(inventory=INVENTORY)
+        self.assertEqual(Character.objects.values('inventory').get(pk=character.pk)['inventory'], INVENTORY)
+        self.assertEqual(Character.objects.values_list('inventory', flat=True).get(pk=character.pk), INVENTORY)
+
+    def test_gm_locked_compressed_field(self):
+        character = self._create(inventory=INVENTORY, gm_locked_fields=['inventory'])
+        character = Character.objects.get(pk=character.pk)
+        character.stress = 1
+        character.save()
+        character.inventory = []
+        with self.assertRaises(ValidationError):
+            character.save()
+
+    def test_command_rewrites_existing_rows(self):
+        with override_settings(COMPRESSED_JSON_ENABLED=False):
+            character = self._create(inventory=INVENTORY)
+        self.assertNotIn('__compressed__', self._raw(character, 'inventory'))
+
+        call_command('compress_json_columns', stdout=open(os.devnull, 'w'))
+        self.assertIn('__compressed__', self._raw(character, 'inventory'))
+
+        # Turning compression off keeps compressed rows readable and the command decompresses them.
+        with override_settings(COMPRESSED_JSON_ENABLED=False):
+            self.assertEqual(Character.objects.get(pk=character.pk).inventory, INVENTORY)
+            call_command('compress_json_columns', stdout=open(os.devnull, 'w'))
+            self.assertNotIn('__compressed__', self._raw(character, 'inventory'))
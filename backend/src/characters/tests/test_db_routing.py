@@ -0,0 +1,49 @@
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.db import router
+from django.test import RequestFactory, TestCase, override_settings
+
+from app.db_routing import ReplicaRoutingMiddleware
+from characters.models import Campaign
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], REPLICA_PIN_SECONDS=60)
+class ReplicaRoutingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.player = User.objects.create_user(username='player', password='pw')
+        self.other = User.objects.create_user(username='other', password='pw')
+        self.middleware = ReplicaRoutingMiddleware(self._view)
+        self.reads = []
+
+    def tearDown(self):
+        cache.clear()
+
+    def _view(self, request):
+        self.reads.append(router.db_for_read(Campaign))
+        return None
+
+    def _request(self, method, user):
+        request = getattr(self.factory, method)('/api/campaigns/')
+        request.user = user
+        self.middleware(request)
+        return self.reads[-1]
+
+    def test_safe_requests_read_from_the_replica(self):
+        self.assertEqual(self._request('get', self.player), 'replica')
+        self.assertEqual(self._request('get', AnonymousUser()), 'replica')
+        self.assertEqual(router.db_for_read(Campaign), 'default')
+
+    def test_unsafe_requests_use_the_primary(self):
+        self.assertEqual(self._request('post', self.player), 'default')
+        self.assertEqual(router.db_for_write(Campaign), 'default')
+
+    def test_writer_is_pinned_to_the_primary(self):
+        self._request('patch', self.player)
+        self.assertEqual(self._request('get', self.player), 'default')
+        self.assertEqual(self._request('get', self.other), 'replica')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_noop_without_replicas(self):
+        self.assertEqual(self._request('get', self.player), 'default')
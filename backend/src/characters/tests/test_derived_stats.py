@@ -0,0 +1,56 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from characters import derived_stats
+from characters.models import NPC, Character, Stand
+
+
+class DerivedStatsTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='polnareff', password='pw')
+        stats = [{'DURABILITY': grade, 'SPEED': grade} for grade in 'SABCDF']
+        stats += [{}, {'DURABILITY': None}, {'DURABILITY': 'Z', 'SPEED': 7}]
+        self.npcs = [
+            NPC.objects.create(name=f'NPC {i}', creator=self.user, stand_coin_stats=coin_stats)
+            for i, coin_stats in enumerate(stats)
+        ]
+
+    def test_rules_match_the_model_attributes(self):
+        self.assertEqual(
+            [(n.regular_armor_charges, n.special_armor_charges, n.vulnerability_clock_max, n.movement_speed)
+             for n in self.npcs],
+            [(5, 3, 0, 200), (4, 3, 12, 60), (3, 2, 10, 40), (2, 1, 8, 35), (2, 1, 6, 30), (1, 0, 4, 25),
+             (1, 0, 4, 25), (1, 0, 4, 25), (1, 0, 0, 0)],
+        )
+
+    def test_annotations_and_bulk_path_agree_with_the_attributes(self):
+        expected = {
+            npc.pk: {name: getattr(npc, name) for name in derived_stats.NPC_RULES} for npc in self.npcs
+        }
+        annotated = NPC.objects.annotate(**derived_stats.npc_annotations())
+        self.assertEqual({npc.pk: {name: npc.__dict__[name] for name in derived_stats.NPC_RULES}
+                          for npc in annotated}, expected)
+        with self.assertNumQueries(1):
+            self.assertEqual(derived_stats.npc_stats(NPC.objects.all()), expected)
+
+    def test_lists_can_filter_and_sort_by_derived_stats(self):
+        queryset = NPC.objects.annotate(**derived_stats.npc_annotations('vulnerability_clock_max'))
+        tough = queryset.filter(vulnerability_clock_max__gte=8).order_by('-vulnerability_clock_max')
+        self.assertEqual([npc.name for npc in tough], ['NPC 1', 'NPC 2', 'NPC 3'])
+
+    def test_character_rules_follow_the_stand(self):
+        without_stand = Character.objects.create(true_name='Polnareff', user=self.user)
+        with_stand = Character.objects.create(true_name='Avdol', user=self.user)
+        Stand.objects.create(character=with_stand, name="Magician's Red", type='FIGHTING', form='Humanoid',
+                             consciousness_level='B', power='B', speed='B', range='C', durability='A',
+                             precision='C', development='D')
+        with_stand = Character.objects.get(pk=with_stand.pk)
+        self.assertEqual((without_stand.stress_capacity, without_stand.development_xp_bonus), (9, 0))
+        self.assertEqual((with_stand.stress_capacity, with_stand.development_xp_bonus), (12, 1))
+
+        annotated = Character.objects.annotate(**derived_stats.character_annotations()).order_by('pk')
+        self.assertEqual([(c.stress_capacity, c.development_xp_bonus) for c in annotated], [(9, 0), (12, 1)])
+        self.assertEqual(derived_stats.character_stats(Character.objects.all()), {
+            without_stand.pk: {'stress_capacity': 9, 'development_xp_bonus': 0},
+            with_stand.pk: {'stress_capacity': 12, 'development_xp_bonus': 1},
+        })
@@ -0,0 +1,72 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+
+from characters.models import (
+    Campaign, CampaignInvitation, Character, CharacterHistory, ChatMessage, Faction, NPC, ProgressClock, Roll,
+    Session, SessionEvent,
+)
+
+
+class HotPathIndexTest(TestCase):
+    """Each hot query must be answered from its composite index, not a table scan or a sort."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.gm = User.objects.create_user(username='gm', password='pw')
+        cls.campaign = Campaign.objects.create(name='Stardust Crusaders', gm=cls.gm)
+        cls.session = Session.objects.create(campaign=cls.campaign, name='Session 1')
+        cls.character = Character.objects.create(true_name='Jotaro', user=cls.gm, campaign=cls.campaign)
+        cls.faction = Faction.objects.create(name='Speedwagon Foundation', campaign=cls.campaign)
+
+    def assertUsesIndex(self, queryset, index_name):
+        if connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN QUERY PLAN is SQLite syntax')
+        plan = queryset.explain()
+        self.assertIn(f'USING INDEX {index_name}', plan)
+        self.assertNotIn('USE TEMP B-TREE', plan)
+        self.assertNotRegex(plan, r'\bSCAN\b')
+
+    def test_session_rolls(self):
+        self.assertUsesIndex(Roll.objects.filter(session=self.session).order_by('-timestamp'), 'roll_session_ts_idx')
+
+    def test_character_rolls(self):
+        self.assertUsesIndex(
+            Roll.objects.filter(character=self.character).order_by('-timestamp'), 'roll_character_ts_idx'
+        )
+
+    def test_campaign_chat(self):
+        self.assertUsesIndex(
+            ChatMessage.objects.filter(campaign=self.campaign).order_by('timestamp'), 'chat_campaign_ts_idx'
+        )
+
+    def test_session_events(self):
+        self.assertUsesIndex(
+            SessionEvent.objects.filter(session=self.session).order_by('timestamp'), 'sessionevent_session_ts_idx'
+        )
+
+    def test_latest_character_history(self):
+        # What log_character_changes runs on every save: .latest('timestamp').
+        self.assertUsesIndex(
+            CharacterHistory.objects.filter(character=self.character).order_by('-timestamp')[:1],
+            'charhistory_char_ts_idx',
+        )
+
+    def test_visible_campaign_clocks(self):
+        self.assertUsesIndex(
+            ProgressClock.objects.filter(campaign=self.campaign, visible_to_players=True),
+            'clock_campaign_visible_idx',
+        )
+
+    def test_pending_invitations(self):
+        self.assertUsesIndex(
+            CampaignInvitation.objects.filter(invited_user=self.gm, status='pending'), 'invite_user_status_idx'
+        )
+
+    def test_campaign_faction_npcs(self):
+        self.assertUsesIndex(NPC.objects.filter(campaign=self.campaign, faction=self.faction), 'npc_campaign_faction_idx')
+
+    def test_indexes_do_not_change_results(self):
+        Roll.objects.create(character=self.character, session=self.session, results=[6], outcome='CRITICAL_SUCCESS')
+        latest = Roll.objects.create(character=self.character, session=self.session, results=[2], outcome='FAILURE')
+        self.assertEqual(Roll.objects.filter(session=self.session).order_by('-timestamp', '-pk').first(), latest)
@@ -0,0 +1,131 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from app.json_patch import JSONPatchError, apply_patch
+from characters.models import Campaign, Character, CharacterHistory
+from characters.services.character_service import CharacterService
+
+
+class ApplyPatchTest(SimpleTestCase):
+    def test_operations(self):
+        document = {'items': ['Arrow'], 'rep': {'Passione': 1}}
+        patched = apply_patch(document, [
+            {'op': 'add', 'path': '/items/-', 'value': 'Bullet'},
+            {'op': 'add', 'path': '/items/0', 'value': 'Ladybug brooch'},
+            {'op': 'replace', 'path': '/rep/Passione', 'value': 2},
+            {'op': 'copy', 'from': '/items/1', 'path': '/rep/relic'},
+            {'op': 'move', 'from': '/items/2', 'path': '/items/0'},
+            {'op': 'remove', 'path': '/items/2'},
+            {'op': 'test', 'path': '/rep/relic', 'value': 'Arrow'},
+        ])
+        self.assertEqual(patched, {'items': ['Bullet', 'Ladybug brooch'], 'rep': {'Passione': 2, 'relic': 'Arrow'}})
+        self.assertEqual(document, {'items': ['Arrow'], 'rep': {'Passione': 1}})
+
+    def test_failures(self):
+        for operation in (
+            {'op': 'remove', 'path': '/missing'},
+            {'op': 'replace', 'path': '/items/5', 'value': 1},
+            {'op': 'add', 'path': '/items/2', 'value': 1},
+            {'op': 'add', 'path': '/nope/key', 'value': 1},
+            {'op': 'test', 'path': '/items/0', 'value': 'Bow'},
+            {'op': 'add', 'path': 'items', 'value': 1},
+            {'op': 'shout', 'path': '/items'},
+        ):
+            with self.assertRaises(JSONPatchError, msg=operation):
+                apply_patch({'items': ['Arrow']}, [operation])
+
+
+class CharacterJSONPatchTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='giorno', password='pw')
+        self.campaign = Campaign.objects.create(name='Vento Aureo', gm=self.user)
+        self.character = Character.objects.create(
+            true_name='Giorno', user=self.user, campaign=self.campaign,
+            inventory=[{'name': 'Ladybug brooch'}], reputation_status={'Passione': 1},
+            faction_reputation=[{'name': 'Passione', 'rep': 1}],
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = f'/api/characters/{self.character.pk}/json-patch/'
+
+    def _patch(self, field, patch, **extra):
+        return self.client.patch(self.url, {'field': field, 'patch': patch}, format='json', **extra)
+
+    def test_append_is_a_small_database_side_write(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self._patch('inventory', [{'op': 'add', 'path': '/-', 'value': {'name': 'Arrow'}}])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['value'], [{'name': 'Ladybug brooch'}, {'name': 'Arrow'}])
+        self.assertEqual(response['ETag'], '"2"')
+        update = next(q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE'))
+        self.assertIn('json_insert', update)
+        self.assertNotIn('Ladybug', update)
+
+        delta = self.character.history_entries.order_by('-pk').first()
+        self.assertEqual(delta.kind, CharacterHistory.DELTA)
+        self.assertEqual(delta.changed_fields, {'inventory': response.data['value']})
+
+    def test_concurrent_patches_to_different_keys_both_land(self):
+        stale = Character.objects.get(pk=self.character.pk)
+        CharacterService.patch_json(self.character, 'reputation_status',
+                                    [{'op': 'add', 'path': '/Dio', 'value': -2}])
+        CharacterService.patch_json(stale, 'reputation_status',
+                                    [{'op': 'replace', 'path': '/Passione', 'value': 3}])
+        self.character.refresh_from_db()
+        self.assertEqual(self.character.reputation_status, {'Passione': 3, 'Dio': -2})
+        self.assertEqual(self.character.version, 3)
+
+    def test_nested_replace_and_remove(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self._patch('faction_reputation', [{'op': 'replace', 'path': '/0/rep', 'value': 2}])
+        self.assertEqual(response.data['value'], [{'name': 'Passione', 'rep': 2}])
+        self.assertTrue(any('json_replace' in q['sql'] for q in queries.captured_queries))
+        with CaptureQueriesContext(connection) as queries:
+            response = self._patch('inventory', [{'op': 'remove', 'path': '/0'}])
+        self.assertTrue(any('json_remove' in q['sql'] for q in queries.captured_queries))
+        self.assertEqual(response.data['value'], [])
+
+    def test_falls_back_to_python_where_the_database_cannot(self):
+        response = self._patch('inventory', [
+            {'op': 'add', 'path': '/0', 'value': {'name': 'Arrow'}},
+            {'op': 'move', 'from': '/1', 'path': '/-'},
+        ])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['value'], [{'name': 'Arrow'}, {'name': 'Ladybug brooch'}])
+
+        with override_settings(COMPRESSED_JSON_ENABLED=True, COMPRESSED_JSON_MIN_BYTES=64):
+            items = [{'op': 'add', 'path': '/-', 'value': {'name': f'Bullet {i}'}} for i in range(10)]
+            response = self._patch('inventory', items)
+        self.assertEqual(len(response.data['value']), 12)
+        # Compressed rows are left to Python even with compression switched off again.
+        response = self._patch('inventory', [{'op': 'remove', 'path': '/2'}])
+        self.assertEqual(len(response.data['value']), 11)
+        self.character.refresh_from_db()
+        self.assertEqual(self.character.inventory[2], {'name': 'Bullet 1'})
+
+    def test_rejected_patches_change_nothing(self):
+        for field, patch in (
+            ('inventory', [{'op': 'add', 'path': '/-', 'value': 'x'}, {'op': 'remove', 'path': '/9'}]),
+            ('xp_clocks', [{'op': 'add', 'path': '/a/b', 'value': 1}]),
+            ('action_dots', [{'op': 'add', 'path': '/hunt', 'value': 1}]),
+            ('inventory', {'op': 'add'}),
+        ):
+            self.assertEqual(self._patch(field, patch).status_code, status.HTTP_400_BAD_REQUEST, patch)
+        self.character.refresh_from_db()
+        self.assertEqual((self.character.inventory, self.character.version), ([{'name': 'Ladybug brooch'}], 1))
+
+        self.character.gm_locked_fields = ['inventory']
+        self.character.save()
+        response = self._patch('inventory', [{'op': 'add', 'path': '/-', 'value': 'x'}])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_if_match(self):
+        patch = [{'op': 'add', 'path': '/Dio', 'value': -2}]
+        self.assertEqual(self._patch('reputation_status', patch, HTTP_IF_MATCH='"1"').status_code, status.HTTP_200_OK)
+        response = self._patch('reputation_status', patch, HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertEqual(response.data['current']['version'], 2)
@@ -0,0 +1,95 @@
+import io
+import json
+import logging
+import threading
+
+from django.test import SimpleTestCase
+
+from app.log_pipeline import AsyncQueueHandler, JSONFormatter, SamplingFilter, configure
+
+
+class _SlowHandler(logging.Handler):
+    """Target handler that blocks until released, standing in for a stalled disk."""
+
+    def __init__(self):
+        super().__init__()
+        self.unblocked = threading.Event()
+        self.records = []
+
+    def emit(self, record):
+        self.unblocked.wait(5)
+        self.records.append(record)
+
+
+class LogPipelineTest(SimpleTestCase):
+    def _logger(self, name, handler):
+        logger = logging.getLogger(name)
+        logger.handlers = [handler]
+        logger.propagate = False
+        logger.setLevel(logging.DEBUG)
+        self.addCleanup(setattr, logger, 'handlers', [])
+        return logger
+
+    def test_records_are_written_as_json_by_the_listener(self):
+        stream = io.StringIO()
+        target = logging.StreamHandler(stream)
+        target.setFormatter(JSONFormatter())
+        handler = AsyncQueueHandler(handlers=[target])
+        self.addCleanup(handler.close)
+        logger = self._logger('tests.log_pipeline.json', handler)
+
+        logger.info('rolled %d dice', 3, extra={'character_id': 42})
+        try:
+            raise ValueError('boom')
+        except ValueError:
+            logger.exception('failed')
+        handler.drain()
+
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(lines[0]['message'], 'rolled 3 dice')
+        self.assertEqual(lines[0]['character_id'], 42)
+        self.assertEqual(lines[0]['logger'], 'tests.log_pipeline.json')
+        self.assertIn('ValueError: boom', lines[1]['exc'])
+
+    def test_caller_never_waits_on_a_stalled_target(self):
+        slow = _SlowHandler()
+        handler = AsyncQueueHandler(handlers=[slow], queue_size=2)
+        logger = self._logger('tests.log_pipeline.slow', handler)
+
+        for i in range(10):
+            logger.warning('message %d', i)
+        self.assertGreater(handler.dropped, 0)
+
+        slow.unblocked.set()
+        handler.close()
+        self.assertEqual(len(slow.records) + handler.dropped, 10)
+
+    def test_sampling_filter_thins_noisy_loggers_only(self):
+        sampler = SamplingFilter({'django.db.backends': 0.0})
+        noisy = logging.makeLogRecord({'name': 'django.db.backends.schema', 'levelno': logging.DEBUG})
+        noisy_warning = logging.makeLogRecord({'name': 'django.db.backends', 'levelno': logging.WARNING})
+        other = logging.makeLogRecord({'name': 'characters.views', 'levelno': logging.DEBUG})
+        self.assertFalse(sampler.filter(noisy))
+        self.assertTrue(sampler.filter(noisy_warning))
+        self.assertTrue(sampler.filter(other))
+
+    def test_configure_hands_built_handlers_to_the_queue(self):
+        stream = io.StringIO()
+        configure({
+            'version': 1,
+            'disable_existing_loggers': False,
+            'handlers': {
+                'stream': {'class': 'logging.StreamHandler', 'stream': stream},
+                'async': {'()': 'app.log_pipeline.AsyncQueueHandler', 'handlers': ['stream']},
+            },
+            'loggers': {'tests.log_pipeline.configured': {'handlers': ['async'], 'propagate': False}},
+        })
+        logger = logging.getLogger('tests.log_pipeline.configured')
+        handler = logger.handlers[0]
+        self.addCleanup(setattr, logger, 'handlers', [])
+        self.addCleanup(handler.close)
+        self.assertIsInstance(handler.targets[0], logging.StreamHandler)
+
+        logger.warning('through the queue')
+        handler.drain()
+        self.assertEqual(stream.getvalue(), 'through the queue\n')
@@ -0,0 +1,86 @@
+import json
+import os
+import tempfile
+
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+
+from app.metrics import MetricsRegistry, _role_cache, registry
+from characters.models import Campaign, Character
+
+
+class MetricsRegistryTest(TestCase):
+    def test_histogram_buckets_are_cumulative(self):
+        reg = MetricsRegistry()
+        labels = ('CampaignViewSet.retrieve', 'GET', '200', 'gm')
+        reg.observe('jojo_request_duration_seconds', labels, 0.02)
+        reg.observe('jojo_request_duration_seconds', labels, 0.3)
+        text = reg.render()
+        self.assertIn('# TYPE jojo_request_duration_seconds histogram', text)
+        self.assertIn('view="CampaignViewSet.retrieve",method="GET",status="200",role="gm",le="0.025"} 1', text)
+        self.assertIn('le="0.5"} 2', text)
+        self.assertIn('jojo_request_duration_seconds_count{view="CampaignViewSet.retrieve",method="GET",status="200",role="gm"} 2', text)
+
+    def test_multiprocess_files_are_merged(self):
+        labels = ('CharacterViewSet.roll_action', 'POST', '200', 'player')
+        with tempfile.TemporaryDirectory() as shared_dir:
+            worker_a = MetricsRegistry(multiproc_dir=shared_dir)
+            worker_a.observe('jojo_response_size_bytes', labels, 100)
+            worker_a.flush(force=True)
+            # Simulate a second worker process writing its own file.
+            with open(os.path.join(shared_dir, 'metrics_999999.json'), 'w') as fh:
+                json.dump([['jojo_response_size_bytes', list(labels), [1] * 8, 200.0, 1]], fh)
+            merged = worker_a.collect()
+        buckets, total, count = merged[('jojo_response_size_bytes', labels)]
+        self.assertEqual(count, 2)
+        self.assertEqual(total, 300.0)
+        self.assertEqual(buckets[0], 2)
+
+
+class MetricsMiddlewareTest(TestCase):
+    def setUp(self):
+        registry.reset()
+        # Roles are cached by user id, and ids are reused between test cases.
+        _role_cache.clear()
+        self.gm = User.objects.create_user(username='gm', password='pw')
+        self.player = User.objects.create_user(username='player', password='pw')
+        self.campaign = Campaign.objects.create(name='Golden Wind', gm=self.gm)
+        self.character = Character.objects.create(true_name='Giorno', user=self.player, campaign=self.campaign)
+
+    def test_requests_are_labelled_by_viewset_action_and_role(self):
+        client = APIClient()
+        client.force_authenticate(user=self.gm)
+        client.get(f'/api/campaigns/{self.campaign.id}/')
+        client.force_authenticate(user=self.player)
+        client.post(f'/api/characters/{self.character.id}/roll-action/', {'action': 'hunt'}, format='json')
+
+        keys = {labels for (name, labels) in registry.collect() if name == 'jojo_request_duration_seconds'}
+        self.assertIn(('CampaignViewSet.retrieve', 'GET', '200', 'gm'), keys)
+        self.assertIn(('CharacterViewSet.roll_action', 'POST', '200', 'player'), keys)
+
+    @override_settings(METRICS_TOKEN='scrape-secret')
+    def test_metrics_endpoint_needs_staff_or_token(self):
+        client = APIClient()
+        self.assertEqual(client.get('/metrics/').status_code, 403)
+        self.assertEqual(client.get('/metrics/', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        response = client.get('/metrics/', HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+
+        client.force_login(self.gm)
+        self.assertEqual(client.get('/metrics/').status_code, 403)
+        self.gm.is_staff = True
+        self.gm.save()
+        self.assertEqual(client.get('/metrics/').status_code, 200)
+
+    @override_settings(METRICS_ALLOWED_IPS=['10.0.0.5'], METRICS_TRUSTED_PROXIES=['127.0.0.1'])
+    def test_metrics_ip_allowlist_reads_through_trusted_proxies(self):
+        client = APIClient()
+        self.assertEqual(client.get('/metrics/', HTTP_X_FORWARDED_FOR='10.0.0.5').status_code, 200)
+        self.assertEqual(client.get('/metrics/', HTTP_X_FORWARDED_FOR='203.0.113.9').status_code, 403)
+        # A spoofed first hop does not help: the proxy appends the real peer.
+        self.assertEqual(client.get('/metrics/', HTTP_X_FORWARDED_FOR='10.0.0.5, 203.0.113.9').status_code, 403)
+        # Without a trusted proxy in front, X-Forwarded-For is ignored.
+        response = client.get('/metrics/', REMOTE_ADDR='203.0.113.9', HTTP_X_FORWARDED_FOR='10.0.0.5')
+        self.assertEqual(response.status_code, 403)
@@ -3,7 +3,7 @@ from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from rest_framework.test import APIClient
 from rest_framework import status
-from characters.models import Campaign, NPC, Heritage
+from characters.models import Campaign, Faction, NPC, Heritage
 
 
 class NPCModelTest(TestCase):
@@ -523,3 +523,103 @@ class NPCApplyEffectTest(TestCase):
             format='json',
         )
         self.assertEqual(resp.status_code, 400)
+
+    def test_apply_effect_returns_clock_state(self):
+        resp = self._auth_client(self.gm_user).post(
+            f'/api/npcs/{self.npc.id}/apply-effect/',
+            {'effect': 'extreme', 'clock_type': 'vulnerability'},
+            format='json',
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['clocks'], {
+            'vulnerability': {'current': 4, 'max': 6, 'defeated': False},
+            'harm': {'current': 0, 'max': 4, 'filled': False},
+        })
+
+    def test_batch_apply_effects_accumulates_in_one_transaction(self):
+        other = NPC.objects.create(name='Henchman', creator=self.gm_user, campaign=self.campaign, harm_clock_max=4)
+        resp = self._auth_client(self.gm_user).post('/api/npcs/apply-effects/', [
+            {'npc_id': self.npc.id, 'effect': 'standard', 'clock_type': 'harm'},
+            {'npc_id': other.id, 'effect': 'limited', 'clock_type': 'harm'},
+            {'npc_id': self.npc.id, 'effect': 'standard', 'clock_type': 'harm'},
+            {'npc_id': self.npc.id, 'effect': 'limited'},
+        ], format='json')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([(r['npc_id'], r['previous'], r['current']) for r in resp.data],
+                         [(self.npc.id, 0, 2), (other.id, 0, 1), (self.npc.id, 2, 4), (self.npc.id, 0, 1)])
+        self.assertTrue(resp.data[2]['filled'])
+        self.npc.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.npc.harm_clock_current, self.npc.vulnerability_clock_current), (4, 1))
+        self.assertEqual(other.harm_clock_current, 1)
+
+    def test_batch_apply_effects_is_all_or_nothing(self):
+        foreign = NPC.objects.create(name='Rival', creator=self.player_user)
+        client = self._auth_client(self.gm_user)
+        bad_effect = client.post('/api/npcs/apply-effects/', {'effects': [
+            {'npc_id': self.npc.id, 'effect': 'standard', 'clock_type': 'harm'},
+            {'npc_id': self.npc.id, 'effect': 'mighty', 'clock_type': 'harm'},
+        ]}, format='json')
+        self.assertEqual(bad_effect.status_code, 400)
+        not_mine = client.post('/api/npcs/apply-effects/', [
+            {'npc_id': self.npc.id, 'effect': 'standard', 'clock_type': 'harm'},
+            {'npc_id': foreign.id, 'effect': 'standard', 'clock_type': 'harm'},
+        ], format='json')
+        self.assertEqual(not_mine.status_code, 404)
+        self.npc.refresh_from_db()
+        self.assertEqual(self.npc.harm_clock_current, 0)
+
+
+class NPCListFilterTest(TestCase):
+    """Filtering and sorting the NPC list by faction, level, grades and derived stats."""
+
+    def setUp(self):
+        self.gm_user = User.objects.create_user(username='gm', email='gm@test.com', password='testpass')
+        self.campaign = Campaign.objects.create(name='Test Campaign', gm=self.gm_user)
+        self.faction = Faction.objects.create(name='Passione', campaign=self.campaign)
+        for name, durability, speed, level, faction in (
+            ('Bucciarati', 'B', 'A', 3, self.faction),
+            ('Abbacchio', 'C', 'C', 2, self.faction),
+            ('Diavolo', 'A', 'S', 5, self.faction),
+            ('Cioccolata', 'B', 'D', 4, None),
+            ('Mista', 'D', 'B', 2, self.faction),
+        ):
+            NPC.objects.create(
+                name=name, creator=self.gm_user, campaign=self.campaign, faction=faction, level=level,
+                stand_coin_stats={'DURABILITY': durability, 'SPEED': speed},
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.gm_user)
+
+    def _names(self, query):
+        response = self.client.get(f'/api/npcs/?{query}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        return [npc['name'] for npc in response.data]
+
+    def test_faction_and_min_grade_sorted_by_vulnerability_clock(self):
+        self.assertEqual(
+            self._names(f'faction={self.faction.id}&min_durability=B&ordering=-vulnerability_clock_max'),
+            ['Diavolo', 'Bucciarati'],
+        )
+
+    def test_derived_stat_and_level_bounds(self):
+        self.assertEqual(self._names('min_movement_speed=40&max_level=4&ordering=name'), ['Bucciarati', 'Mista'])
+        self.assertEqual(self._names('level=2&ordering=-name'), ['Mista', 'Abbacchio'])
+
+    def test_grade_ordering_and_exact_grade(self):
+        self.assertEqual(self._names('ordering=-speed')[:2], ['Diavolo', 'Bucciarati'])
+        self.assertEqual(self._names('durability=b&ordering=name'), ['Bucciarati', 'Cioccolata'])
+        self.assertEqual(self._names('min_speed=C&max_speed=A&ordering=speed,name'), ['Abbacchio', 'Mista', 'Bucciarati'])
+
+    def test_invalid_parameters_are_rejected(self):
+        for query in ('min_durability=Q', 'level=high', 'ordering=secret', 'playbook=BOXING', 'faction=x'):
+            self.assertEqual(self.client.get(f'/api/npcs/?{query}').status_code, status.HTTP_400_BAD_REQUEST, query)
+
+    def test_update_response_reflects_new_grades(self):
+        npc = NPC.objects.create(name='Pesci', creator=self.gm_user, campaign=self.campaign,
+                                 stand_coin_stats={'DURABILITY': 'F'})
+        response = self.client.patch(f'/api/npcs/{npc.id}/', {'stand_coin_stats': {'DURABILITY': 'A'}}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual((response.data['vulnerability_clock_max'], response.data['special_armor_charges']), (12, 3))
+        fetched = self.client.get(f'/api/npcs/{npc.id}/').data
+        self.assertEqual((fetched['vulnerability_clock_max'], fetched['special_armor_charges']), (12, 3))
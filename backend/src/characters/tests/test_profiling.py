@@ -0,0 +1,76 @@
+import pstats
+import shutil
+import tempfile
+import threading
+import time
+
+from django.test import TestCase
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from app.profiling import StackSampler, store
+from characters.models import Campaign
+
+
+class ProfilingTest(TestCase):
+    def setUp(self):
+        self._original_dir = store.directory
+        store.directory = tempfile.mkdtemp()
+        self.staff = User.objects.create_user(username='staff', password='pw', is_staff=True)
+        self.gm = User.objects.create_user(username='gm', password='pw')
+        self.campaign = Campaign.objects.create(name='Stone Ocean', gm=self.gm)
+        self.other_campaign = Campaign.objects.create(name='Steel Ball Run', gm=self.gm)
+        self.staff_client = APIClient()
+        self.staff_client.force_authenticate(user=self.staff)
+
+    def tearDown(self):
+        shutil.rmtree(store.directory, ignore_errors=True)
+        store.directory = self._original_dir
+
+    def test_arm_requires_staff_and_a_criterion(self):
+        client = APIClient()
+        client.force_authenticate(user=self.gm)
+        response = client.post('/api/_debug/profiles/arm/', {'path': '/api/'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.staff_client.post('/api/_debug/profiles/arm/', {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_campaign_trigger_captures_one_cprofile(self):
+        response = self.staff_client.post(
+            '/api/_debug/profiles/arm/', {'campaign_id': self.campaign.id, 'count': 1}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        client = APIClient()
+        client.force_authenticate(user=self.gm)
+        client.get(f'/api/campaigns/{self.other_campaign.id}/')
+        client.get(f'/api/campaigns/{self.campaign.id}/')
+        client.get(f'/api/campaigns/{self.campaign.id}/')
+
+        listing = self.staff_client.get('/api/_debug/profiles/').data
+        self.assertEqual(listing['armed'], [])
+        self.assertEqual(len(listing['profiles']), 1)
+        profile = listing['profiles'][0]
+        self.assertEqual(profile['path'], f'/api/campaigns/{self.campaign.id}/')
+        self.assertEqual(profile['user_id'], self.gm.id)
+
+        download = self.staff_client.get(f"/api/_debug/profiles/{profile['name']}/")
+        self.assertEqual(download.status_code, status.HTTP_200_OK)
+        stats = pstats.Stats(store.path_for(profile['name']))
+        self.assertTrue(any(func[2] == 'retrieve' for func in stats.stats))
+
+    def test_download_rejects_unknown_names(self):
+        response = self.staff_client.get('/api/_debug/profiles/..%2Fsettings.py/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_stack_sampler_collapses_stacks(self):
+        sampler = StackSampler(threading.get_ident(), interval=0.001)
+        sampler.start()
+        deadline = time.perf_counter() + 0.05
+        while time.perf_counter() < deadline:
+            pass
+        sampler.stop()
+        output = sampler.collapsed()
+        self.assertIn('test_stack_sampler_collapses_stacks', output)
+        self.assertTrue(all(line.rsplit(' ', 1)[1].isdigit() for line in output.splitlines()))
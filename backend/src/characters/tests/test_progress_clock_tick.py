@@ -0,0 +1,74 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from characters.models import Campaign, ProgressClock
+from characters.services.clock_service import ProgressClockService
+
+
+class ProgressClockTickTest(TestCase):
+    def setUp(self):
+        self.gm = User.objects.create_user(username='gm', password='pw')
+        self.player = User.objects.create_user(username='player', password='pw')
+        self.campaign = Campaign.objects.create(name='Golden Wind', gm=self.gm)
+        self.alarm = ProgressClock.objects.create(
+            name='Alarm', clock_type='DANGER', max_segments=4, filled_segments=2, campaign=self.campaign
+        )
+        self.heist = ProgressClock.objects.create(
+            name='Heist', clock_type='MISSION', max_segments=8, filled_segments=1, campaign=self.campaign
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.gm)
+
+    def test_tick_updates_all_clocks_in_one_statement(self):
+        with self.assertNumQueries(4):  # savepoint, UPDATE, SELECT, release
+            clocks = ProgressClockService.tick({self.alarm.pk: 1, self.heist.pk: 3})
+        self.assertEqual([(c.filled_segments, c.completed) for c in clocks], [(3, False), (4, False)])
+
+    def test_tick_clamps_and_completes(self):
+        ProgressClockService.tick({self.alarm.pk: 5, self.heist.pk: -4})
+        self.alarm.refresh_from_db()
+        self.heist.refresh_from_db()
+        self.assertEqual((self.alarm.filled_segments, self.alarm.completed), (4, True))
+        self.assertEqual((self.heist.filled_segments, self.heist.completed), (0, False))
+
+        ProgressClockService.tick({self.alarm.pk: -1})
+        self.alarm.refresh_from_db()
+        self.assertEqual((self.alarm.filled_segments, self.alarm.completed), (3, False))
+
+    def test_tick_endpoint_sums_repeated_clocks(self):
+        response = self.client.post('/api/progress-clocks/tick/', [
+            {'clock_id': self.alarm.pk, 'delta': 1},
+            {'clock_id': self.heist.pk, 'delta': 2},
+            {'clock_id': self.alarm.pk, 'delta': 1},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(c['id'], c['filled_segments'], c['completed']) for c in response.data],
+            [(self.alarm.pk, 4, True), (self.heist.pk, 3, False)],
+        )
+
+    def test_tick_endpoint_accepts_wrapped_ticks(self):
+        response = self.client.post(
+            '/api/progress-clocks/tick/', {'ticks': [{'clock_id': self.heist.pk, 'delta': 1}]}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['filled_segments'], 2)
+
+    def test_tick_endpoint_rejects_bad_input(self):
+        for body in ([], [{'clock_id': self.alarm.pk}], [{'clock_id': self.alarm.pk, 'delta': 'x'}],
+                     [{'clock_id': 999999, 'delta': 1}]):
+            response = self.client.post('/api/progress-clocks/tick/', body, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, body)
+        self.alarm.refresh_from_db()
+        self.assertEqual(self.alarm.filled_segments, 2)
+
+    def test_only_the_gm_can_tick(self):
+        self.client.force_authenticate(user=self.player)
+        response = self.client.post(
+            '/api/progress-clocks/tick/', [{'clock_id': self.alarm.pk, 'delta': 1}], format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.alarm.refresh_from_db()
+        self.assertEqual(self.alarm.filled_segments, 2)
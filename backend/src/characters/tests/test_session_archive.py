@@ -0,0 +1,92 @@
+import os
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from characters.models import (
+    Campaign, Character, ChatMessage, Roll, RollHistory, Session, SessionArchive, SessionEvent, StressHistory,
+    XPHistory,
+)
+from characters.services.archive_service import SessionArchiveService
+
+
+class SessionArchiveTest(TestCase):
+    def setUp(self):
+        self.gm = User.objects.create_user(username='gm', password='pw')
+        self.campaign = Campaign.objects.create(name='Diamond is Unbreakable', gm=self.gm)
+        self.session = Session.objects.create(campaign=self.campaign, name='Morioh', status='COMPLETED')
+        self.character = Character.objects.create(true_name='Josuke', user=self.gm, campaign=self.campaign)
+        roll = Roll.objects.create(
+            character=self.character, session=self.session, action_name='skirmish', results=[6, 2],
+            outcome='CRITICAL_SUCCESS',
+        )
+        RollHistory.objects.create(campaign=self.campaign, roll=roll)
+        SessionEvent.objects.create(session=self.session, character=self.character, event_type='OTHER',
+                                    details={'note': 'Crazy Diamond'})
+        ChatMessage.objects.create(campaign=self.campaign, session=self.session, sender=self.gm, message='Great!')
+        XPHistory.objects.create(character=self.character, session=self.session, amount=2, reason='Desperate roll')
+        StressHistory.objects.create(character=self.character, session=self.session, amount=1, reason='Push')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.gm)
+
+    def test_archive_moves_records_out_of_the_hot_tables(self):
+        before = self.client.get(f'/api/sessions/{self.session.pk}/').data
+        timeline_before = self.client.get(f'/api/sessions/{self.session.pk}/timeline/').data
+
+        archive = SessionArchiveService.archive(self.session)
+
+        self.assertEqual(archive.record_counts['characters.roll'], 1)
+        for model in (Roll, RollHistory, SessionEvent, ChatMessage, XPHistory, StressHistory):
+            self.assertFalse(model.objects.exists(), model.__name__)
+        self.assertEqual(self.client.get(f'/api/sessions/{self.session.pk}/').data, before)
+        self.assertEqual(self.client.get(f'/api/sessions/{self.session.pk}/timeline/').data, timeline_before)
+
+    def test_timeline_is_chronological(self):
+        timeline = self.client.get(f'/api/sessions/{self.session.pk}/timeline/').data
+        self.assertEqual([entry['type'] for entry in timeline], ['roll', 'event', 'chat', 'xp', 'stress'])
+        self.assertEqual(timeline[0]['data']['character_name'], 'Josuke')
+
+    def test_only_completed_sessions_are_archived(self):
+        active = Session.objects.create(campaign=self.campaign, name='Next', status='ACTIVE')
+        with self.assertRaises(ValueError):
+            SessionArchiveService.archive(active)
+
+    def test_reopening_restores_records(self):
+        timestamp = Roll.objects.get().timestamp
+        SessionArchiveService.archive(self.session)
+
+        response = self.client.patch(f'/api/sessions/{self.session.pk}/', {'status': 'ACTIVE'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(SessionArchive.objects.exists())
+        self.assertEqual(Roll.objects.get().timestamp, timestamp)
+        self.assertEqual(RollHistory.objects.get().campaign, self.campaign)
+        self.assertEqual(XPHistory.objects.get().amount, 2)
+
+    def test_command_archives_completed_sessions(self):
+        call_command('archive_sessions', older_than_days=-1, stdout=open(os.devnull, 'w'))
+        self.assertTrue(SessionArchive.objects.filter(session=self.session).exists())
+        self.assertFalse(Roll.objects.exists())
+
+    def test_records_written_during_archiving_are_kept(self):
+        create = SessionArchive.objects.create
+
+        def late_message(**kwargs):
+            ChatMessage.objects.create(campaign=self.campaign, session=self.session, sender=self.gm, message='Late')
+            return create(**kwargs)
+
+        with mock.patch.object(SessionArchive.objects, 'create', side_effect=late_message):
+            archive = SessionArchiveService.archive(self.session)
+        self.assertEqual(archive.record_counts['characters.chatmessage'], 1)
+        self.assertEqual(list(ChatMessage.objects.values_list('message', flat=True)), ['Late'])
+
+    def test_failed_delete_rolls_back_the_archive(self):
+        with mock.patch.object(SessionArchiveService, '_delete', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                SessionArchiveService.archive(self.session)
+        self.assertFalse(SessionArchive.objects.exists())
+        self.assertEqual(Roll.objects.count(), 1)
+        self.assertEqual(XPHistory.objects.count(), 1)
@@ -0,0 +1,134 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from app import sharding
+from characters.models import Campaign, Character, ChatMessage, Roll, RollHistory, Session
+from characters.services.archive_service import SessionArchiveService
+
+
+class CampaignShardingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Shared by the tests so the migrated template shard is only built once.
+        cls.shard_dir = tempfile.mkdtemp()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.shard_dir, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.override = override_settings(CAMPAIGN_SHARDING=True, CAMPAIGN_SHARD_DIR=self.shard_dir)
+        self.override.enable()
+        # Ids are reused between test cases, so forget what earlier tests cached.
+        sharding._session_campaigns.clear()
+
+        self.gm = User.objects.create_user(username='gm', password='pw')
+        self.outsider = User.objects.create_user(username='outsider', password='pw')
+        self.campaign = Campaign.objects.create(name='Phantom Blood', gm=self.gm)
+        self.other_campaign = Campaign.objects.create(name='Battle Tendency', gm=self.gm)
+        self.session = Session.objects.create(campaign=self.campaign, name='Session 1', status='ACTIVE')
+        self.character = Character.objects.create(
+            true_name='Jonathan', user=self.gm, campaign=self.campaign, action_dots={'skirmish': 2}
+        )
+        # Shard aliases are registered at runtime; let this test case open them.
+        shards = {'campaign_template', f'campaign_{self.campaign.pk}', f'campaign_{self.other_campaign.pk}'}
+        self.enterContext(mock.patch.object(type(self), 'databases', self.databases | shards))
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.gm)
+
+    def tearDown(self):
+        for campaign_id in (self.campaign.pk, self.other_campaign.pk):
+            sharding.drop_shard(campaign_id)
+        self.override.disable()
+
+    def test_roll_action_writes_to_the_campaign_shard(self):
+        response = self.client.post(
+            f'/api/characters/{self.character.id}/roll-action/',
+            {'action': 'skirmish', 'session_id': self.session.id}, format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(os.path.exists(os.path.join(self.shard_dir, f'campaign_{self.campaign.pk}.sqlite3')))
+        self.assertEqual(Roll.objects.using('default').count(), 0)
+        self.assertEqual(Roll.objects.for_campaign(self.campaign.pk).count(), 1)
+        self.assertEqual(RollHistory.objects.for_campaign(self.campaign.pk).count(), 1)
+        # Reverse relations of default-database objects follow them into the shard.
+        self.assertEqual(list(self.session.rolls.values_list('id', flat=True)), [response.data['roll_id']])
+
+        listing = self.client.get(f'/api/rolls/?campaign={self.campaign.pk}')
+        self.assertEqual([r['character_name'] for r in listing.data], ['Jonathan'])
+        self.assertEqual(self.client.get('/api/rolls/').data, [])
+
+        self.client.force_authenticate(user=self.outsider)
+        self.assertEqual(self.client.get(f'/api/rolls/?campaign={self.campaign.pk}').data, [])
+
+    def test_campaigns_do_not_share_a_database(self):
+        ChatMessage.objects.create(campaign=self.campaign, sender=self.gm, message='Ora ora')
+        ChatMessage.objects.create(campaign=self.other_campaign, sender=self.gm, message='Muda muda')
+        self.assertEqual(
+            list(ChatMessage.objects.for_campaign(self.other_campaign.pk).values_list('message', flat=True)),
+            ['Muda muda'],
+        )
+
+    def test_detail_routes_find_the_shard_from_the_id(self):
+        ChatMessage.objects.create(campaign=self.other_campaign, sender=self.gm, message='Muda muda')
+        roll = Roll.objects.create(
+            character=self.character, session=self.session, action_name='skirmish', results=[3], outcome='PARTIAL_SUCCESS'
+        )
+        self.assertEqual(sharding.campaign_of_pk(roll.pk), self.campaign.pk)
+        other = ChatMessage.objects.for_campaign(self.other_campaign.pk).get()
+        self.assertEqual(sharding.campaign_of_pk(other.pk), self.other_campaign.pk)
+
+        self.assertEqual(self.client.get(f'/api/rolls/{roll.pk}/').data['id'], roll.pk)
+        response = self.client.patch(f'/api/rolls/{roll.pk}/', {'position': 'desperate'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Roll.objects.for_campaign(self.campaign.pk).get().position, 'desperate')
+        self.assertEqual(self.client.get(f'/api/chat-messages/{other.pk}/').data['message'], 'Muda muda')
+
+        self.client.force_authenticate(user=self.outsider)
+        self.assertEqual(self.client.get(f'/api/rolls/{roll.pk}/').status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_deleting_a_session_removes_its_shard_rows(self):
+        Roll.objects.create(
+            character=self.character, session=self.session, action_name='skirmish', results=[6], outcome='CRITICAL_SUCCESS'
+        )
+        self.session.delete()
+        self.assertEqual(Roll.objects.for_campaign(self.campaign.pk).count(), 0)
+
+    def test_split_moves_existing_rows_and_keeps_timestamps(self):
+        with override_settings(CAMPAIGN_SHARDING=False):
+            roll = Roll.objects.create(
+                character=self.character, session=self.session, action_name='skirmish', results=[4], outcome='FULL_SUCCESS'
+            )
+            RollHistory.objects.create(campaign=self.campaign, roll=roll)
+        call_command('split_campaign_shards', stdout=open(os.devnull, 'w'))
+
+        self.assertEqual(Roll.objects.using('default').count(), 0)
+        copied = Roll.objects.for_campaign(self.campaign.pk).get()
+        self.assertEqual((copied.pk, copied.timestamp), (roll.pk, roll.timestamp))
+        self.assertEqual(RollHistory.objects.for_campaign(self.campaign.pk).get().roll_id, roll.pk)
+        # Copied rows keep their old ids, which do not name a campaign; the detail route still finds them.
+        self.assertEqual(self.client.get(f'/api/rolls/{roll.pk}/').data['id'], roll.pk)
+
+    def test_archiving_a_sharded_session(self):
+        Roll.objects.create(
+            character=self.character, session=self.session, action_name='skirmish', results=[5], outcome='FULL_SUCCESS'
+        )
+        self.session.status = 'COMPLETED'
+        self.session.save()
+        SessionArchiveService.archive(self.session)
+        self.assertEqual(Roll.objects.for_campaign(self.campaign.pk).count(), 0)
+
+        timeline = self.client.get(f'/api/sessions/{self.session.pk}/timeline/').data
+        self.assertEqual([(e['type'], e['data']['character_name']) for e in timeline], [('roll', 'Jonathan')])
+        SessionArchiveService.restore(self.session)
+        self.assertEqual(Roll.objects.for_campaign(self.campaign.pk).count(), 1)
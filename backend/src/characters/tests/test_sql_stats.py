@@ -0,0 +1,97 @@
+from django.db import connection
+from django.test import TestCase
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from app.sql_stats import SQLStatsCollector, collector, fingerprint, record_query
+
+
+class SQLFingerprintTest(TestCase):
+    def test_literals_are_stripped(self):
+        a = fingerprint("SELECT * FROM characters_character WHERE id = 12 AND true_name = 'Jotaro'")
+        b = fingerprint("SELECT * FROM characters_character WHERE id = 7 AND true_name = 'Dio'")
+        self.assertEqual(a, b)
+        self.assertEqual(a, "SELECT * FROM characters_character WHERE id = ? AND true_name = ?")
+
+    def test_in_lists_and_values_collapse(self):
+        self.assertEqual(
+            fingerprint('SELECT "x" FROM "t" WHERE "id" IN (%s, %s, %s)'),
+            fingerprint('SELECT "x" FROM "t" WHERE "id" IN (%s)'),
+        )
+        self.assertEqual(
+            fingerprint('INSERT INTO "t" ("a", "b") VALUES (%s, %s), (%s, %s)'),
+            'INSERT INTO "t" ("a", "b") VALUES (?, ?)',
+        )
+
+    def test_identifiers_with_digits_are_kept(self):
+        self.assertIn('"T3"', fingerprint('SELECT "T3"."id" FROM "t" "T3" LIMIT 21'))
+
+
+class SQLStatsCollectorTest(TestCase):
+    def test_aggregates_per_fingerprint(self):
+        stats = SQLStatsCollector()
+        stats.record('SELECT 1 FROM t WHERE id = 1', 0.010, rows=1)
+        stats.record('SELECT 1 FROM t WHERE id = 2', 0.030, rows=1)
+        rows = stats.snapshot()
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['calls'], 2)
+        self.assertEqual(rows[0]['rows'], 2)
+        self.assertAlmostEqual(rows[0]['total_time'], 40.0)
+        self.assertAlmostEqual(rows[0]['mean_time'], 20.0)
+        self.assertAlmostEqual(rows[0]['p95_time'], 30.0)
+
+    def test_memory_is_bounded(self):
+        stats = SQLStatsCollector(max_fingerprints=2, sample_size=4)
+        stats.record('SELECT a FROM t', 0.001)
+        stats.record('SELECT b FROM t', 0.001)
+        stats.record('SELECT c FROM t', 0.001)
+        for _ in range(10):
+            stats.record('SELECT c FROM t', 0.001)
+        queries = [r['query'] for r in stats.snapshot()]
+        self.assertEqual(sorted(queries), ['SELECT b FROM t', 'SELECT c FROM t'])
+        self.assertEqual(stats.evicted, 1)
+        self.assertEqual(len(stats._entries['SELECT c FROM t'].samples), 4)
+
+    def test_reset(self):
+        stats = SQLStatsCollector()
+        stats.record('SELECT 1', 0.001)
+        stats.reset()
+        self.assertEqual(stats.snapshot(), [])
+
+
+class SQLStatsEndpointTest(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username='staff', password='pw', is_staff=True)
+        self.player = User.objects.create_user(username='player', password='pw')
+        collector.reset()
+
+    def test_staff_only(self):
+        client = APIClient()
+        client.force_authenticate(user=self.player)
+        response = client.get('/api/_debug/sql-stats/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_requests_are_recorded_and_resettable(self):
+        client = APIClient()
+        client.force_authenticate(user=self.staff)
+        client.get('/api/campaigns/')
+        response = client.get('/api/_debug/sql-stats/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(any('characters_campaign' in s['query'] for s in response.data['statements']))
+
+        response = client.delete('/api/_debug/sql-stats/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(collector.snapshot(), [])
+
+    def test_rows_count_fetched_rows_of_selects(self):
+        for name in ('a', 'b', 'c'):
+            User.objects.create_user(username=f'player-{name}', password='pw')
+        with connection.execute_wrapper(record_query):
+            self.assertEqual(len(list(User.objects.filter(is_staff=False))), 4)
+            self.assertIsNotNone(User.objects.filter(username='staff').first())
+            User.objects.filter(username__startswith='player-').update(first_name='Jojo')
+        rows = {s['query']: s['rows'] for s in collector.snapshot()}
+        self.assertEqual([n for q, n in rows.items() if 'WHERE NOT' in q and q.startswith('SELECT')], [4])
+        self.assertEqual([n for q, n in rows.items() if '"username" = ?' in q], [1])
+        self.assertEqual([n for q, n in rows.items() if q.startswith('UPDATE')], [3])
@@ -0,0 +1,38 @@
+import os
+import sqlite3
+import tempfile
+
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+
+from app.sqlite_tuning import DEFAULT_PRAGMAS, apply_pragmas, pragmas_for
+
+
+class SQLiteTuningTest(SimpleTestCase):
+    databases = {'default'}
+
+    def test_pragmas_are_applied_to_a_file_database(self):
+        with tempfile.TemporaryDirectory() as workdir:
+            raw = sqlite3.connect(os.path.join(workdir, 'tuned.sqlite3'))
+            try:
+                apply_pragmas(raw, DEFAULT_PRAGMAS)
+                self.assertEqual(raw.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+                self.assertEqual(raw.execute('PRAGMA synchronous').fetchone()[0], 1)  # NORMAL
+                self.assertEqual(raw.execute('PRAGMA busy_timeout').fetchone()[0], 5000)
+                self.assertEqual(raw.execute('PRAGMA temp_store').fetchone()[0], 2)  # MEMORY
+            finally:
+                raw.close()
+
+    @override_settings(SQLITE_PRAGMAS={'busy_timeout': 1234})
+    def test_database_entry_overrides_project_defaults(self):
+        self.assertEqual(pragmas_for({}), {'busy_timeout': 1234})
+        self.assertEqual(pragmas_for({'PRAGMAS': {}}), {})
+        self.assertEqual(pragmas_for({'PRAGMAS': None}), {})
+
+    def test_default_connection_is_tuned(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+
+    def test_defaults_live_in_the_module(self):
+        self.assertEqual(pragmas_for({}), DEFAULT_PRAGMAS)
@@ -0,0 +1,70 @@
+from django.test import TestCase
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from app.tracing import buffer, span, traced
+from characters.models import Campaign, Character
+
+
+class SpanNoopTest(TestCase):
+    def test_span_outside_trace_is_noop(self):
+        with span('outside') as current:
+            self.assertIsNone(current)
+
+        @traced()
+        def add(a, b):
+            return a + b
+        self.assertEqual(add(1, 2), 3)
+
+
+class TracingMiddlewareTest(TestCase):
+    def setUp(self):
+        buffer.clear()
+        self.staff = User.objects.create_user(username='staff', password='pw', is_staff=True)
+        self.gm = User.objects.create_user(username='gm', password='pw')
+        self.campaign = Campaign.objects.create(name='Diamond is Unbreakable', gm=self.gm)
+        self.character = Character.objects.create(true_name='Josuke', user=self.gm, campaign=self.campaign)
+
+    def _spans_by_name(self, trace):
+        return {s['name']: s for s in trace['spans']}
+
+    def test_campaign_detail_trace_nests_view_serializer_and_db(self):
+        client = APIClient()
+        client.force_authenticate(user=self.gm)
+        response = client.get(f'/api/campaigns/{self.campaign.id}/')
+        trace = buffer.get(response['X-Trace-Id'])
+        self.assertIsNotNone(trace)
+
+        spans = self._spans_by_name(trace)
+        root = spans['http.request']
+        view = spans['CampaignViewSet.retrieve']
+        serializer = spans['CampaignSerializer.to_representation']
+        self.assertIsNone(root['parent_id'])
+        self.assertEqual(view['parent_id'], root['span_id'])
+        self.assertEqual(serializer['parent_id'], view['span_id'])
+        db_spans = [s for s in trace['spans'] if s['kind'] == 'db']
+        self.assertTrue(any(s['parent_id'] == serializer['span_id'] for s in db_spans))
+        self.assertLessEqual(serializer['duration_ms'], trace['duration_ms'])
+
+    def test_signal_handler_span(self):
+        client = APIClient()
+        client.force_authenticate(user=self.gm)
+        response = client.patch(
+            f'/api/characters/{self.character.id}/update-field/', {'field': 'alias', 'value': 'JoJo'}, format='json'
+        )
+        trace = buffer.get(response['X-Trace-Id'])
+        self.assertIn('log_character_changes', self._spans_by_name(trace))
+
+    def test_trace_endpoints_are_staff_only(self):
+        client = APIClient()
+        client.force_authenticate(user=self.gm)
+        client.get('/api/campaigns/')
+        self.assertEqual(client.get('/api/_debug/traces/').status_code, status.HTTP_403_FORBIDDEN)
+
+        client.force_authenticate(user=self.staff)
+        listing = client.get('/api/_debug/traces/')
+        self.assertEqual(listing.status_code, status.HTTP_200_OK)
+        self.assertEqual(listing.data[0]['attrs']['view'], 'CampaignViewSet.list')
+        detail = client.get(f"/api/_debug/traces/{listing.data[0]['trace_id']}/")
+        self.assertEqual(detail.status_code, status.HTTP_200_OK)
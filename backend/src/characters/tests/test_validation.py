@@ -0,0 +1,82 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+
+from characters import ability_index
+from characters.models import Ability, Character, CharacterHamonAbility, HamonAbility, Heritage, Stand
+from characters.validation import (
+    MODEL_RULES, CharacterFacts, facts_for, summarize, validate_character, validate_characters,
+)
+
+
+ACTION_DOTS = {'insight': {'hunt': 1, 'study': 1, 'survey': 1, 'tinker': 1},
+               'prowess': {'finesse': 1, 'prowl': 1, 'skirmish': 1, 'wreck': 0},
+               'resolve': {'bizarre': 0, 'command': 0, 'consort': 0, 'sway': 0}}
+
+
+class CharacterValidationEngineTest(TestCase):
+    def setUp(self):
+        ability_index.invalidate()
+        self.user = User.objects.create_user(username='giorno', password='pw')
+        self.heritage = Heritage.objects.create(name='Human', base_hp=0)
+        self.abilities = [Ability.objects.create(name=f'Ability {i}', type='standard') for i in range(3)]
+        self.hamon = HamonAbility.objects.create(
+            name='Ripple Chain', hamon_type='TRADITIONALIST', description='-', required_a_count=2
+        )
+
+    def _character(self, name, stress=9, durability='D', abilities=3):
+        character = Character.objects.create(
+            user=self.user, true_name=name, heritage=self.heritage, action_dots=ACTION_DOTS, stress=stress,
+        )
+        character.standard_abilities.add(*self.abilities[:abilities])
+        Stand.objects.create(character=character, name=f'{name} Stand', type='FIGHTING', form='-',
+                             consciousness_level='C', power='C', speed='D', range='D',
+                             durability=durability, precision='D', development='F')
+        return character
+
+    def test_batch_reports_every_problem_in_a_few_queries(self):
+        valid = [self._character(f'Valid {i}') for i in range(5)]
+        stressed = self._character('Stressed', stress=7)
+        short = self._character('Short', abilities=1)
+        no_stand = Character.objects.create(user=self.user, true_name='Standless', heritage=self.heritage,
+                                            action_dots=ACTION_DOTS, stress=9, total_xp_spent=5)
+        CharacterHamonAbility.objects.create(character=short, hamon_ability=self.hamon)
+
+        ability_index.get_index()  # built once per process
+        with self.assertNumQueries(4):
+            results = validate_characters(facts_for(Character.objects.all()))
+
+        self.assertNotIn(valid[0].pk, results)
+        self.assertEqual([issue.code for issue in results[stressed.pk]], ['stress'])
+        self.assertEqual([issue.code for issue in results[short.pk]], ['ability_count', 'ability_prerequisites'])
+        self.assertEqual([issue.code for issue in results[no_stand.pk]], ['stand_coin', 'ability_count', 'xp_advancements'])
+        self.assertEqual(results[no_stand.pk][0].message, 'A level 1 character must have a Stand with stats defined.')
+        self.assertEqual(dict(summarize(results))['stress'], 1)
+
+    def test_queryset_and_instance_facts_agree(self):
+        character = self._character('Bucciarati', durability='C')
+        from_queryset = next(facts_for(Character.objects.filter(pk=character.pk)))
+        character = Character.objects.prefetch_related(
+            'standard_abilities', 'hamon_abilities', 'spin_abilities'
+        ).select_related('stand').get(pk=character.pk)
+        with self.assertNumQueries(0):
+            from_instance = CharacterFacts.from_instance(character)
+        self.assertEqual(from_instance, from_queryset)
+        issues = {issue.code: issue.message for issue in validate_character(from_instance, MODEL_RULES)}
+        self.assertEqual(issues['stress'], 'Stress must be 10 for a level 1 character with C Stand Durability.')
+
+    def test_chunks_cover_every_character(self):
+        for i in range(7):
+            self._character(f'Member {i}', stress=8)
+        self.assertEqual(len(validate_characters(facts_for(Character.objects.all(), chunk_size=3))), 7)
+
+    def test_audit_command(self):
+        self._character('Fugo')
+        broken = self._character('Narancia', stress=1)
+        out = StringIO()
+        call_command('validate_all_characters', stdout=out)
+        output = out.getvalue()
+        self.assertIn(f'Character {broken.pk}: stress: Stress must be 9', output)
+        self.assertIn('1 of 2 characters have problems', output)
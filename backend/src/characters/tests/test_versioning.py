@@ -0,0 +1,82 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from app.versioning import VersionConflict, parse_if_match
+from characters.models import Campaign, Character, Crew
+
+
+class RowVersionTest(TestCase):
+    def setUp(self):
+        self.gm = User.objects.create_user(username='gm', password='pw')
+        self.campaign = Campaign.objects.create(name='Steel Ball Run', gm=self.gm)
+        self.character = Character.objects.create(true_name='Johnny', user=self.gm, campaign=self.campaign)
+        self.crew = Crew.objects.create(name='Riders', campaign=self.campaign, proposed_name='Saints')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.gm)
+
+    def test_every_save_bumps_the_version(self):
+        self.assertEqual(self.campaign.version, 1)
+        self.campaign.description = 'A race across America'
+        self.campaign.save()
+        self.campaign.save(update_fields=['description'])
+        self.assertEqual(self.campaign.version, 3)
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.version, 3)
+
+    def test_conditional_save_detects_a_concurrent_write(self):
+        first = Campaign.objects.get(pk=self.campaign.pk)
+        second = Campaign.objects.get(pk=self.campaign.pk)
+        first.expect_version(1)
+        first.name = 'First'
+        first.save()
+        second.expect_version(1)
+        second.name = 'Second'
+        with self.assertRaises(VersionConflict), transaction.atomic():
+            second.save()
+        self.campaign.refresh_from_db()
+        self.assertEqual((self.campaign.name, self.campaign.version), ('First', 2))
+
+    def test_parse_if_match(self):
+        self.assertIsNone(parse_if_match(None))
+        self.assertIsNone(parse_if_match('*'))
+        self.assertEqual(parse_if_match('"3", W/"4", "x"'), {3, 4})
+
+    def test_retrieve_and_update_send_etags(self):
+        url = f'/api/campaigns/{self.campaign.pk}/'
+        self.assertEqual(self.client.get(url)['ETag'], '"1"')
+        response = self.client.patch(url, {'description': 'Stage 1'}, format='json', HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['ETag'], '"2"')
+        self.assertEqual(response.data['version'], 2)
+
+    def test_stale_if_match_gets_412_with_current_state(self):
+        url = f'/api/campaigns/{self.campaign.pk}/'
+        Campaign.objects.get(pk=self.campaign.pk).save()  # someone else's edit
+        response = self.client.patch(url, {'description': 'Stage 2'}, format='json', HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertEqual(response['ETag'], '"2"')
+        self.assertEqual(response.data['current']['version'], 2)
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.description, '')
+
+    def test_field_patch_honours_if_match(self):
+        url = f'/api/characters/{self.character.pk}/update-fields/'
+        response = self.client.patch(url, {'fields': {'stress': 1}}, format='json', HTTP_IF_MATCH='"1"')
+        self.assertEqual(response['ETag'], '"2"')
+        response = self.client.patch(url, {'fields': {'stress': 2}}, format='json', HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertEqual(response.data['current']['stress'], 1)
+
+    def test_approve_name_only_approves_the_proposal_seen(self):
+        url = f'/api/crews/{self.crew.pk}/approve-name/'
+        self.crew.proposed_name = 'Sinners'
+        self.crew.save()
+        response = self.client.post(url, HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertEqual(response.data['current']['proposed_name'], 'Sinners')
+        response = self.client.post(url, HTTP_IF_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['approved_name'], 'Sinners')
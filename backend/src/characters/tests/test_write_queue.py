@@ -0,0 +1,85 @@
+import os
+import tempfile
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.test import TransactionTestCase
+
+from app.write_queue import WriteQueue
+from characters.models import Campaign
+
+
+class WriteQueueTest(TransactionTestCase):
+    def setUp(self):
+        self.gm = User.objects.create_user(username='gm', password='pw')
+        self.lock_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.lock_dir.cleanup)
+        self.writer = WriteQueue(lock_path=os.path.join(self.lock_dir.name, 'db.writelock'))
+
+    def _submit_in_threads(self, funcs):
+        errors = [None] * len(funcs)
+
+        def submit(i, func):
+            try:
+                self.writer.submit(func)
+            except Exception as exc:
+                errors[i] = exc
+
+        threads = [threading.Thread(target=submit, args=(i, f)) for i, f in enumerate(funcs)]
+        for thread in threads:
+            thread.start()
+        return threads, errors
+
+    def _hold_writer(self):
+        """Occupy the writer thread until the returned event is set, so later jobs pile up."""
+        started, release = threading.Event(), threading.Event()
+
+        def block():
+            started.set()
+            release.wait(5)
+
+        threads, _ = self._submit_in_threads([block])
+        started.wait(5)
+        return release, threads
+
+    def _wait_for_queue(self, size):
+        while self.writer._queue.qsize() < size:
+            time.sleep(0.001)
+
+    def test_concurrent_writes_share_one_commit(self):
+        release, blocker = self._hold_writer()
+        funcs = [lambda i=i: Campaign.objects.create(name=f'Campaign {i}', gm=self.gm) for i in range(8)]
+        threads, errors = self._submit_in_threads(funcs)
+        self._wait_for_queue(8)
+        release.set()
+        for thread in blocker + threads:
+            thread.join(5)
+
+        self.assertEqual(errors, [None] * 8)
+        self.assertEqual(Campaign.objects.count(), 8)
+        self.assertEqual(self.writer.batches, 2)
+        self.assertEqual(self.writer.jobs, 9)
+
+    def test_failing_job_only_rolls_back_itself(self):
+        def broken():
+            Campaign.objects.create(name='Half written', gm=self.gm)
+            raise ValueError('rejected')
+
+        release, blocker = self._hold_writer()
+        threads, errors = self._submit_in_threads([
+            lambda: Campaign.objects.create(name='Kept', gm=self.gm),
+            broken,
+        ])
+        self._wait_for_queue(2)
+        release.set()
+        for thread in blocker + threads:
+            thread.join(5)
+
+        self.assertIsNone(errors[0])
+        self.assertIsInstance(errors[1], ValueError)
+        self.assertEqual(list(Campaign.objects.values_list('name', flat=True)), ['Kept'])
+
+    def test_submit_returns_the_job_result(self):
+        campaign = self.writer.submit(Campaign.objects.create, name='Vento Aureo', gm=self.gm)
+        self.assertEqual(Campaign.objects.get(pk=campaign.pk).name, 'Vento Aureo')
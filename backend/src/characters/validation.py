@@ -0,0 +1,301 @@
+"""Character sheet validation over pre-fetched data, for one character or thousands.
+
+The rules read a ``CharacterFacts`` tuple, never the database, and report
+``ValidationIssue``s instead of raising on the first problem. Where the facts come from
+decides the cost:
+
+* ``CharacterFacts.from_instance()`` reads an instance, using its prefetched stand and
+  ability relations when present (``Character.clean()``);
+* ``facts_for(queryset)`` reads a whole queryset in four queries per chunk: the characters
+  with their stand grades, then standard ability counts and Hamon/Spin ability ids;
+* the serializer builds facts from submitted data directly.
+
+Each rule reports at most one issue, the first problem it finds, so ``Character.clean()``
+keeps raising the messages it always has. ``RULES`` lists every rule by name;
+``MODEL_RULES`` are the ones ``clean()`` enforces, ``SERIALIZER_RULES`` the ones the API
+checks on every write.
+"""
+from collections import Counter, defaultdict
+from typing import NamedTuple
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count
+
+from .ability_index import count_a_ranks, get_index
+from .derived_stats import CHARACTER_RULES, GRADE_POINTS, STAND_STATS
+from .models import Character, CharacterHamonAbility, CharacterSpinAbility, Stand
+
+
+class ValidationIssue(NamedTuple):
+    character_id: int
+    field: str
+    code: str
+    message: str
+
+
+class CharacterFacts(NamedTuple):
+    pk: int = None
+    level: int = 1
+    action_dots: dict = {}
+    stress: int = 0
+    stand: dict = None  # {stat: grade}, None without a Stand
+    gm_can_have_s_rank_stand_stats: bool = False
+    has_custom_ability: bool = False
+    standard_ability_count: int = 0
+    hamon_ability_ids: tuple = ()
+    spin_ability_ids: tuple = ()
+    coin_a_ranks: int = 0  # 'A' grades in coin_stats
+    xp_clocks: dict = {}
+    total_xp_spent: int = 0
+    heritage_points_gained: int = 0
+    stand_coin_points_gained: int = 0
+    action_dice_gained: int = 0
+
+    @classmethod
+    def from_instance(cls, character):
+        """Facts for a saved or unsaved instance; prefetched relations are used when present."""
+        if Character.stand.is_cached(character):
+            stand = Character.stand.related.get_cached_value(character)
+            grades = {stat: getattr(stand, stat) for stat in STAND_STATS} if stand is not None else None
+        elif character.pk is not None:
+            grades = Stand.objects.filter(character_id=character.pk).values(*STAND_STATS).first()
+        else:
+            grades = None
+        cached = getattr(character, '_prefetched_objects_cache', {})
+
+        def ids(relation, column):
+            if character.pk is None:
+                return ()
+            if relation in cached:
+                return tuple(getattr(entry, column) for entry in cached[relation])
+            return tuple(getattr(character, relation).values_list(column, flat=True))
+
+        if character.pk is None:
+            standard_count = 0
+        elif 'standard_abilities' in cached:
+            standard_count = len(cached['standard_abilities'])
+        else:
+            standard_count = character.standard_abilities.count()
+
+        return cls(
+            pk=character.pk,
+            level=character.level,
+            action_dots=character.action_dots,
+            stress=character.stress,
+            stand=grades,
+            gm_can_have_s_rank_stand_stats=character.gm_can_have_s_rank_stand_stats,
+            has_custom_ability=bool(character.custom_ability_description),
+            standard_ability_count=standard_count,
+            hamon_ability_ids=ids('hamon_abilities', 'hamon_ability_id'),
+            spin_ability_ids=ids('spin_abilities', 'spin_ability_id'),
+            coin_a_ranks=count_a_ranks(character.coin_stats),
+            xp_clocks=character.xp_clocks,
+            total_xp_spent=character.total_xp_spent,
+            heritage_points_gained=character.heritage_points_gained,
+            stand_coin_points_gained=character.stand_coin_points_gained,
+            action_dice_gained=character.action_dice_gained,
+        )
+
+
+FACT_COLUMNS = (
+    'pk', 'level', 'action_dots', 'stress', 'gm_can_have_s_rank_stand_stats', 'custom_ability_description',
+    'coin_stats', 'xp_clocks', 'total_xp_spent', 'heritage_points_gained', 'stand_coin_points_gained',
+    'action_dice_gained', 'stand__id',
+) + tuple(f'stand__{stat}' for stat in STAND_STATS)
+
+
+def facts_for(queryset, chunk_size=500):
+    """``CharacterFacts`` for every character in ``queryset``, four queries per chunk."""
+    rows = queryset.order_by('pk').values(*FACT_COLUMNS).iterator(chunk_size=chunk_size)
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield from _facts_for_chunk(chunk)
+            chunk = []
+    yield from _facts_for_chunk(chunk)
+
+
+def _facts_for_chunk(rows):
+    if not rows:
+        return
+    pks = [row['pk'] for row in rows]
+    through = Character.standard_abilities.through
+    standard_counts = dict(
+        through.objects.filter(character_id__in=pks).values('character_id')
+        .annotate(n=Count('pk')).values_list('character_id', 'n')
+    )
+    hamon, spin = defaultdict(list), defaultdict(list)
+    for character_id, ability_id in CharacterHamonAbility.objects.filter(
+            character_id__in=pks).values_list('character_id', 'hamon_ability_id'):
+        hamon[character_id].append(ability_id)
+    for character_id, ability_id in CharacterSpinAbility.objects.filter(
+            character_id__in=pks).values_list('character_id', 'spin_ability_id'):
+        spin[character_id].append(ability_id)
+
+    for row in rows:
+        pk = row['pk']
+        yield CharacterFacts(
+            pk=pk,
+            level=row['level'],
+            action_dots=row['action_dots'],
+            stress=row['stress'],
+            stand={stat: row[f'stand__{stat}'] for stat in STAND_STATS} if row['stand__id'] is not None else None,
+            gm_can_have_s_rank_stand_stats=row['gm_can_have_s_rank_stand_stats'],
+            has_custom_ability=bool(row['custom_ability_description']),
+            standard_ability_count=standard_counts.get(pk, 0),
+            hamon_ability_ids=tuple(hamon[pk]),
+            spin_ability_ids=tuple(spin[pk]),
+            coin_a_ranks=count_a_ranks(row['coin_stats']),
+            xp_clocks=row['xp_clocks'],
+            total_xp_spent=row['total_xp_spent'],
+            heritage_points_gained=row['heritage_points_gained'],
+            stand_coin_points_gained=row['stand_coin_points_gained'],
+            action_dice_gained=row['action_dice_gained'],
+        )
+
+
+def _flat_action_dots(action_dots):
+    # Sheets store either {hunt: 1, ...} or {insight: {hunt: 1, ...}, ...}.
+    if not isinstance(action_dots, dict):
+        return {}
+    flat = {}
+    for key, value in action_dots.items():
+        if isinstance(value, dict):
+            flat.update(value)
+        else:
+            flat[key] = value
+    return flat
+
+
+def _action_dots(facts):
+    if facts.level != 1:
+        return
+    dots = _flat_action_dots(facts.action_dots)
+    if sum(value for value in dots.values() if isinstance(value, (int, float))) != 7:
+        return 'action_dots', 'A new character at level 1 must have exactly 7 action dots.'
+    for action, value in dots.items():
+        if isinstance(value, (int, float)) and value > 2:  # Max 2 dots per action at level 1
+            return 'action_dots', f'Action "{action}" cannot have more than 2 dots at level 1.'
+
+
+def _stand_coin(facts):
+    if facts.level != 1:
+        return
+    if facts.stand is None:
+        return 'stand', 'A level 1 character must have a Stand with stats defined.'
+    total = 0
+    for stat in STAND_STATS:
+        grade = facts.stand.get(stat)
+        if grade not in GRADE_POINTS:
+            return 'stand_coin_stats', f'Invalid grade "{grade}" for stat "{stat}". Must be S, A, B, C, D, or F.'
+        if grade == 'S' and not facts.gm_can_have_s_rank_stand_stats:
+            return 'stand_coin_stats', f'Player characters cannot have S-rank in {stat} unless explicitly allowed by the GM.'
+        total += GRADE_POINTS[grade]
+    if total != 6:
+        return 'stand_coin_stats', f'A new character at level 1 must have exactly 6 Stand Coin points. Current total: {total}.'
+
+
+def _stress(facts):
+    if facts.level != 1:
+        return
+    durability = facts.stand.get('durability') if facts.stand is not None else None
+    expected = CHARACTER_RULES['stress_capacity'].value(durability)
+    if facts.stress != expected:
+        return 'stress', f'Stress must be {expected} for a level 1 character with {durability} Stand Durability.'
+
+
+def _ability_count(facts):
+    # SRD: At start choose 3 abilities; each A-rank in Stand Coin unlocks 2 more.
+    if facts.level != 1:
+        return
+    a_ranks = sum(1 for grade in (facts.stand or {}).values() if grade == 'A')
+    expected = 3 + a_ranks * 2
+    total = (facts.standard_ability_count + facts.has_custom_ability
+             + len(facts.hamon_ability_ids) + len(facts.spin_ability_ids))
+    if total != expected:
+        return 'standard_abilities', (
+            f'A level 1 character must have exactly {expected} abilities (3 base + 2 per A-rank in Stand Coin).'
+        )
+
+
+def _xp_advancements(facts):
+    if facts.total_xp_spent % 10 != 0:
+        return 'total_xp_spent', 'Total XP spent must be a multiple of 10 for advancements.'
+    expected = (
+        facts.heritage_points_gained * 5 +  # 5 XP per heritage point
+        facts.stand_coin_points_gained * 10 +  # 10 XP per stand coin point
+        facts.action_dice_gained * 5  # 5 XP per action die
+    )
+    if facts.total_xp_spent != expected:
+        return 'total_xp_spent', (
+            f'Total XP spent ({facts.total_xp_spent}) does not match XP calculated from advancements ({expected}).'
+        )
+    for field, label in (('action_dice_gained', 'Action dice'), ('stand_coin_points_gained', 'Stand coin points'),
+                         ('heritage_points_gained', 'Heritage points')):
+        if getattr(facts, field) < 0:
+            return field, f'{label} gained cannot be negative.'
+
+
+def _ability_prerequisites(facts):
+    index = get_index()
+    for playbook, label, ability_ids in (('HAMON', 'Hamon', facts.hamon_ability_ids),
+                                         ('SPIN', 'Spin', facts.spin_ability_ids)):
+        _, insufficient = index.check(playbook, ability_ids, facts.coin_a_ranks)
+        if insufficient:
+            ability = insufficient[0]
+            return f'{playbook.lower()}_ability_ids', (
+                f"Insufficient 'A' ratings: need {ability.required_a_count} 'A's to select {label} ability "
+                f"'{ability.name}' (you have {facts.coin_a_ranks})."
+            )
+
+
+def _playbook_xp(facts):
+    playbook_xp = (facts.xp_clocks or {}).get('playbook', 0)
+    if playbook_xp > 10:
+        return 'xp_clocks', f'Playbook track XP cannot exceed 10; received {playbook_xp}.'
+
+
+RULES = {
+    'action_dots': _action_dots,
+    'stand_coin': _stand_coin,
+    'stress': _stress,
+    'ability_count': _ability_count,
+    'xp_advancements': _xp_advancements,
+    'ability_prerequisites': _ability_prerequisites,
+    'playbook_xp': _playbook_xp,
+}
+MODEL_RULES = ('action_dots', 'stand_coin', 'stress', 'ability_count', 'xp_advancements')
+SERIALIZER_RULES = ('ability_prerequisites', 'playbook_xp')
+
+
+def validate_character(facts, rules=None):
+    """Every issue with one character's facts, in rule order."""
+    issues = []
+    for name in rules or RULES:
+        problem = RULES[name](facts)
+        if problem is not None:
+            issues.append(ValidationIssue(facts.pk, problem[0], name, problem[1]))
+    return issues
+
+
+def validate_characters(facts, rules=None):
+    """``{character_id: [issues]}`` for the characters in ``facts`` that have any."""
+    results = {}
+    for character in facts:
+        issues = validate_character(character, rules)
+        if issues:
+            results[character.pk] = issues
+    return results
+
+
+def summarize(results):
+    """How many characters break each rule, most common first."""
+    return Counter(issue.code for issues in results.values() for issue in issues).most_common()
+
+
+def as_validation_error(issues):
+    errors = defaultdict(list)
+    for issue in issues:
+        errors[issue.field].append(issue.message)
+    return ValidationError(dict(errors))
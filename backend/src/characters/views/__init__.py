@@ -21,6 +21,10 @@ from .utility_views import (
     global_search, get_available_playbook_abilities, 
     api_documentation, home, SpendCoinAPIView
 )
+from .debug_views import (
+    sql_stats, profile_list, profile_arm, profile_download,
+    trace_list, trace_detail, metrics
+)
 
 __all__ = [
     'CharacterViewSet', 'CampaignViewSet', 'CampaignInvitationViewSet', 'ShowcasedNPCViewSet',
@@ -33,5 +37,7 @@ __all__ = [
     'HamonAbilityViewSet', 'SpinAbilityViewSet', 'TraumaViewSet',
     'CharacterHistoryViewSet', 'ExperienceTrackerViewSet',
     'global_search', 'get_available_playbook_abilities', 'api_documentation',
-    'home', 'SpendCoinAPIView'
+    'home', 'SpendCoinAPIView', 'sql_stats',
+    'profile_list', 'profile_arm', 'profile_download',
+    'trace_list', 'trace_detail', 'metrics'
 ] 
\ No newline at end of file
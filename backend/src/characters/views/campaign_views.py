@@ -5,11 +5,12 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from app.versioning import VersionedViewMixin
 from ..models import Campaign, CampaignInvitation, Character, ShowcasedNPC, NPC
 from ..serializers import CampaignSerializer, CampaignInvitationSerializer, ShowcasedNPCSerializer
 
 
-class CampaignViewSet(viewsets.ModelViewSet):
+class CampaignViewSet(VersionedViewMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     queryset = Campaign.objects.all()
     serializer_class = CampaignSerializer
@@ -1,7 +1,7 @@
 from django.shortcuts import render
 from django.http import JsonResponse
 from django.db import models
-from rest_framework import viewsets, status, permissions
+from rest_framework import viewsets, status, permissions, serializers
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.decorators import action
@@ -11,11 +11,17 @@ from django.core.exceptions import PermissionDenied
 import json
 
 import random
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from app.versioning import VersionConflict, VersionedViewMixin
+from app.write_queue import run_write
 from ..models import Character, Session, Roll, RollHistory
 from ..serializers import CharacterSerializer
+from ..services.character_service import CharacterService
+from ..services.history_service import CharacterHistoryService
 
 
-class CharacterViewSet(viewsets.ModelViewSet):
+class CharacterViewSet(VersionedViewMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     serializer_class = CharacterSerializer
     queryset = Character.objects.all()
@@ -74,26 +80,105 @@ class CharacterViewSet(viewsets.ModelViewSet):
         """Update a specific field on a character."""
         character = self.get_object()
         field_name = request.data.get('field')
-        value = request.data.get('value')
         
         if not field_name:
             return Response(
                 {'error': 'Field name is required'}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        # Check if field exists and is editable
-        if not hasattr(character, field_name):
+        return self._patch_fields(character, {field_name: request.data.get('value')})
+
+    @action(detail=True, methods=['patch'], url_path='update-fields')
+    def update_fields(self, request, pk=None):
+        """Update several fields at once: ``{"fields": {"stress": 3, "alias": "JoJo"}}``.
+
+        Only the fields whose value changed are written (and returned, under ``changed``).
+        """
+        character = self.get_object()
+        values = request.data.get('fields')
+        if not isinstance(values, dict) or not values:
             return Response(
-                {'error': f'Field {field_name} does not exist'}, 
+                {'error': 'fields must be a non-empty object of field: value pairs'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        # Update the field
-        setattr(character, field_name, value)
-        character.save()
-        
-        return Response({'message': f'Field {field_name} updated successfully'})
+        return self._patch_fields(character, values)
+
+    def _patch_fields(self, character, values):
+        failed = self.check_if_match(character)
+        if failed is not None:
+            return failed
+        serializer_fields = self.get_serializer(character).fields
+        locked = set(character.gm_locked_fields or [])
+        # The GM's sheet lock, as CharacterSerializer.validate() applies it to full updates.
+        if character.gm_character_locked and character.campaign_id and character.campaign.gm_id != self.request.user.pk:
+            allowed = character.gm_allowed_edit_fields or {}
+            locked.update(field for field in CharacterSerializer.GM_RESTRICTED_FIELDS if not allowed.get(field, True))
+        validated, errors = {}, {}
+        for name, value in values.items():
+            if name not in CharacterService.PATCHABLE_FIELDS:
+                errors[name] = ['This field cannot be edited here.']
+            elif name in locked:
+                errors[name] = ['This field is locked by the GM.']
+            else:
+                try:
+                    validated[name] = serializer_fields[name].run_validation(value)
+                except serializers.ValidationError as e:
+                    errors[name] = e.detail
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            changed = run_write(CharacterService.update_fields, character, validated)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except VersionConflict:
+            return self.precondition_failed(character)
+        return self.with_etag(Response({
+            'changed': {
+                name: None if value is None else serializer_fields[name].to_representation(value)
+                for name, value in changed.items()
+            }
+        }), character.version)
+
+    @action(detail=True, methods=['patch'], url_path='json-patch')
+    def json_patch(self, request, pk=None):
+        """Apply a JSON Patch to one JSON field: ``{"field": "inventory", "patch": [{"op": "add", ...}]}``.
+
+        Returns the field's new value. Honours If-Match like the other updates.
+        """
+        character = self.get_object()
+        field_name = request.data.get('field')
+        failed = self.check_if_match(character)
+        if failed is not None:
+            return failed
+        try:
+            value = run_write(CharacterService.patch_json, character, field_name, request.data.get('patch'))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except VersionConflict:
+            return self.precondition_failed(character)
+        return self.with_etag(Response({'field': field_name, 'value': value}), character.version)
+
+    @action(detail=True, methods=['get'], url_path='as-of')
+    def as_of(self, request, pk=None):
+        """Reconstruct the character's fields as of ``?at=<ISO datetime>`` from its history."""
+        character = self.get_object()
+        at = parse_datetime(request.query_params.get('at', ''))
+        if at is None:
+            return Response(
+                {'error': 'Query parameter "at" must be an ISO 8601 datetime'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if timezone.is_naive(at):
+            at = timezone.make_aware(at)
+
+        state = CharacterHistoryService.state_at(character.pk, at)
+        if state is None:
+            return Response(
+                {'error': 'No history for this character at that time'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response({'character': character.pk, 'at': at, 'fields': state})
 
     @action(detail=True, methods=['post'], url_path='roll-action')
     def roll_action(self, request, pk=None):
@@ -198,32 +283,36 @@ class CharacterViewSet(viewsets.ModelViewSet):
         else:
             outcome = 'FAILURE'
 
-        # Deduct stress for push
-        if stress_cost > 0:
-            character.stress = max(0, current_stress - stress_cost)
-            character.save(update_fields=['stress'])
-
-        roll = None
+        session = None
         if session_id:
-            try:
-                session = Session.objects.get(id=session_id)
-                if character.campaign_id != session.campaign_id:
-                    return Response({'error': 'Session must belong to character\'s campaign.'}, status=status.HTTP_400_BAD_REQUEST)
-                roll = Roll.objects.create(
-                    character=character,
-                    session=session,
-                    roll_type=roll_type,
-                    action_name=action_name,
-                    position=position,
-                    effect=effect,
-                    dice_pool=dice_pool,
-                    results=dice_results,
-                    outcome=outcome,
-                    description=f"{action_name} roll"
-                )
-                RollHistory.objects.create(campaign=session.campaign, roll=roll)
-            except Session.DoesNotExist:
-                pass
+            session = Session.objects.filter(id=session_id).first()
+            if session is not None and character.campaign_id != session.campaign_id:
+                return Response({'error': 'Session must belong to character\'s campaign.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        def write_roll():
+            # Deduct stress for push
+            if stress_cost > 0:
+                character.stress = max(0, current_stress - stress_cost)
+                character.save(update_fields=['stress'])
+            if session is None:
+                return None
+            roll = Roll.objects.create(
+                character=character,
+                session=session,
+                roll_type=roll_type,
+                action_name=action_name,
+                position=position,
+                effect=effect,
+                dice_pool=dice_pool,
+                results=dice_results,
+                outcome=outcome,
+                description=f"{action_name} roll"
+            )
+            RollHistory.objects.create(campaign_id=session.campaign_id, roll=roll)
+            return roll
+
+        # One transaction; batched with other players' writes when SQLITE_WRITE_QUEUE is on.
+        roll = run_write(write_roll) if stress_cost > 0 or session is not None else None
 
         return Response({
             'action': action_name,
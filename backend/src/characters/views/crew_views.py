@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.exceptions import PermissionDenied
 from rest_framework import viewsets, status
 from rest_framework.permissions import IsAuthenticated
@@ -6,11 +6,12 @@ from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.parsers import MultiPartParser, FormParser
 
+from app.versioning import VersionConflict, VersionedViewMixin
 from ..models import Crew
 from ..serializers import CrewSerializer
 
 
-class CrewViewSet(viewsets.ModelViewSet):
+class CrewViewSet(VersionedViewMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     queryset = Crew.objects.all()
     serializer_class = CrewSerializer
@@ -45,14 +46,22 @@ class CrewViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
+        failed = self.check_if_match(crew)
+        if failed is not None:
+            return failed
+
         # Update the proposed name
         crew.proposed_name = proposed_name
-        crew.save()
+        try:
+            with transaction.atomic():
+                crew.save()
+        except VersionConflict:
+            return self.precondition_failed(crew)
         
-        return Response({
+        return self.with_etag(Response({
             'message': f'Proposed name: {proposed_name}',
             'proposed_name': proposed_name
-        })
+        }), crew.version)
 
     @action(detail=True, methods=['post'], url_path='approve-name')
     def approve_name(self, request, pk=None):
@@ -72,15 +81,24 @@ class CrewViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        # With If-Match, only approve the proposal the GM was looking at.
+        failed = self.check_if_match(crew)
+        if failed is not None:
+            return failed
+
         # Approve the name
         crew.name = crew.proposed_name
         crew.proposed_name = None
-        crew.save()
+        try:
+            with transaction.atomic():
+                crew.save()
+        except VersionConflict:
+            return self.precondition_failed(crew)
         
-        return Response({
+        return self.with_etag(Response({
             'message': f'Crew name approved: {crew.name}',
             'approved_name': crew.name
-        })
+        }), crew.version)
 
     def perform_update(self, serializer):
         # Ensure only the GM can update the crew
@@ -0,0 +1,150 @@
+import hmac
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseForbidden
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from app.metrics import registry as metrics_registry
+from app.profiling import store as profile_store
+from app.sql_stats import collector as sql_stats_collector
+from app.tracing import buffer as trace_buffer
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAdminUser])
+def sql_stats(request):
+    """Staff-only: aggregated SQL timings per query fingerprint. DELETE resets the counters."""
+    if request.method == 'DELETE':
+        sql_stats_collector.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    order_by = request.GET.get('order', 'total_time')
+    try:
+        limit = int(request.GET.get('limit', 50))
+    except ValueError:
+        return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'since': sql_stats_collector.since,
+        'fingerprints_evicted': sql_stats_collector.evicted,
+        'max_fingerprints': sql_stats_collector.max_fingerprints,
+        'statements': sql_stats_collector.snapshot(order_by=order_by, limit=limit),
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def profile_list(request):
+    """Staff-only: captured request profiles (newest first) and currently armed triggers."""
+    return Response({
+        'armed': profile_store.triggers(),
+        'profiles': profile_store.list(),
+    })
+
+
+@api_view(['POST', 'DELETE'])
+@permission_classes([IsAdminUser])
+def profile_arm(request):
+    """Staff-only: arm a profiling trigger for a user, path prefix and/or campaign. DELETE disarms all."""
+    if request.method == 'DELETE':
+        profile_store.disarm()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    user_id = request.data.get('user_id')
+    path = request.data.get('path') or None
+    campaign_id = request.data.get('campaign_id')
+    mode = request.data.get('mode', 'cprofile')
+    if user_id is None and path is None and campaign_id is None:
+        return Response({'error': 'Provide at least one of user_id, path or campaign_id.'}, status=status.HTTP_400_BAD_REQUEST)
+    if mode not in ('cprofile', 'sample'):
+        return Response({'error': 'mode must be "cprofile" or "sample".'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        user_id = None if user_id is None else int(user_id)
+        count = max(1, min(100, int(request.data.get('count', 1))))
+        ttl = max(1, int(request.data.get('ttl', 3600)))
+    except (TypeError, ValueError):
+        return Response({'error': 'user_id, count and ttl must be integers.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    trigger = profile_store.arm(user_id=user_id, path=path, campaign_id=campaign_id, count=count, ttl=ttl, mode=mode)
+    return Response(trigger, status=status.HTTP_201_CREATED)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def profile_download(request, name):
+    """Staff-only: download one profile file (.prof for pstats, .collapsed for flamegraphs)."""
+    path = profile_store.path_for(name)
+    if path is None:
+        return Response({'error': 'Profile not found.'}, status=status.HTTP_404_NOT_FOUND)
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=name)
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAdminUser])
+def trace_list(request):
+    """Staff-only: recent request traces (summaries). ?min_duration_ms= filters slow ones; DELETE clears."""
+    if request.method == 'DELETE':
+        trace_buffer.clear()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    try:
+        min_duration = float(request.GET.get('min_duration_ms', 0))
+    except ValueError:
+        return Response({'error': 'min_duration_ms must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response([
+        {
+            'trace_id': t['trace_id'],
+            'started_at': t['started_at'],
+            'name': t['name'],
+            'attrs': t['attrs'],
+            'duration_ms': t['duration_ms'],
+            'span_count': len(t['spans']),
+        }
+        for t in trace_buffer.recent() if t['duration_ms'] >= min_duration
+    ])
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def trace_detail(request, trace_id):
+    """Staff-only: every span of one trace with parent ids and offsets from the request start."""
+    trace = trace_buffer.get(trace_id)
+    if trace is None:
+        return Response({'error': 'Trace not found.'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(trace)
+
+
+def _client_ip(request):
+    """The client address; X-Forwarded-For is only read through proxies in METRICS_TRUSTED_PROXIES."""
+    trusted = getattr(settings, 'METRICS_TRUSTED_PROXIES', [])
+    forwarded = [hop.strip() for hop in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if hop.strip()]
+    # Each proxy appends the address it received from; the nearest untrusted hop is the client.
+    hops = [request.META.get('REMOTE_ADDR')] + forwarded[::-1]
+    for hop in hops:
+        if hop not in trusted:
+            return hop
+    return hops[-1]
+
+
+def _metrics_allowed(request):
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token and hmac.compare_digest(request.META.get('HTTP_AUTHORIZATION', '').encode(), f'Bearer {token}'.encode()):
+        return True
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_active and user.is_staff:
+        return True
+    return _client_ip(request) in getattr(settings, 'METRICS_ALLOWED_IPS', [])
+
+
+def metrics(request):
+    """Prometheus scrape target, for staff, the METRICS_TOKEN bearer and METRICS_ALLOWED_IPS."""
+    if not _metrics_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(metrics_registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+metrics.metrics_exempt = True
+for _view in (sql_stats, profile_list, profile_arm, profile_download, trace_list, trace_detail, metrics):
+    _view.profiling_exempt = True
@@ -1,6 +1,12 @@
 from django.db import models
-from rest_framework import viewsets
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from app import sharding
+from app.write_queue import run_write
 
 from ..models import (
     Claim, CrewSpecialAbility, CrewPlaybook, CrewUpgrade,
@@ -11,6 +17,7 @@ from ..serializers import (
     CrewUpgradeSerializer, XPHistorySerializer, StressHistorySerializer,
     ChatMessageSerializer, ProgressClockSerializer
 )
+from ..services.clock_service import ProgressClockService
 
 
 class ClaimViewSet(viewsets.ModelViewSet):
@@ -48,12 +55,26 @@ class StressHistoryViewSet(viewsets.ModelViewSet):
     queryset = StressHistory.objects.all()
     serializer_class = StressHistorySerializer
 
+    def perform_create(self, serializer):
+        run_write(serializer.save)
+
 
 class ChatMessageViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     queryset = ChatMessage.objects.all()
     serializer_class = ChatMessageSerializer
 
+    def get_queryset(self):
+        if sharding.enabled():
+            campaign_id = sharding.requested_campaign(self.request, ChatMessage, self.kwargs.get('pk'))
+            if campaign_id is None:
+                return ChatMessage.objects.none()
+            return ChatMessage.objects.for_campaign(campaign_id)
+        return super().get_queryset()
+
+    def perform_create(self, serializer):
+        run_write(serializer.save)
+
 
 class ProgressClockViewSet(viewsets.ModelViewSet):
     """CRUD for progress clocks. GM-only create/update/delete; filter by campaign/session."""
@@ -101,4 +122,36 @@ class ProgressClockViewSet(viewsets.ModelViewSet):
         if not instance.campaign and not self.request.user.is_staff:
             from rest_framework.exceptions import PermissionDenied
             raise PermissionDenied('Only staff can delete clocks without a campaign.')
-        instance.delete()
\ No newline at end of file
+        instance.delete()
+
+    @action(detail=False, methods=['post'])
+    def tick(self, request):
+        """Advance several clocks at once: ``[{"clock_id": 1, "delta": 2}, ...]`` (or ``{"ticks": [...]}``)."""
+        ticks = request.data.get('ticks') if isinstance(request.data, dict) else request.data
+        if not isinstance(ticks, list) or not ticks:
+            return Response(
+                {'error': 'Expected a non-empty list of {"clock_id", "delta"} objects'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        deltas = {}
+        for tick in ticks:
+            try:
+                clock_id, delta = int(tick['clock_id']), int(tick['delta'])
+            except (KeyError, TypeError, ValueError):
+                return Response(
+                    {'error': f'Invalid tick {tick!r}: clock_id and delta must be integers'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            # Several ticks of one clock in a batch add up.
+            deltas[clock_id] = deltas.get(clock_id, 0) + delta
+
+        clocks = dict(ProgressClock.objects.filter(pk__in=deltas).values_list('pk', 'campaign__gm_id'))
+        missing = sorted(set(deltas) - set(clocks))
+        if missing:
+            return Response({'error': 'Unknown progress clocks', 'clock_ids': missing}, status=status.HTTP_400_BAD_REQUEST)
+        user = request.user
+        if not user.is_staff and any(gm_id != user.id for gm_id in clocks.values()):
+            raise PermissionDenied('Only the GM can tick progress clocks.')
+
+        updated = ProgressClockService.tick(deltas)
+        return Response(ProgressClockSerializer(updated, many=True).data)
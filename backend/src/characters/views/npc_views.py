@@ -1,14 +1,15 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.db.models import Q
 
+from app.write_queue import run_write
+from ..derived_stats import GRADE_POINTS, NPC_RULES, STAND_STATS, grade_rank, grades_between, npc_annotations
 from ..models import NPC
 from ..serializers import NPCSerializer
-
-# Effect level to clock ticks (SRD: Limited=1, Standard=2, Great/Greater=3)
-EFFECT_TO_TICKS = {'limited': 1, 'standard': 2, 'great': 3, 'greater': 3, 'extreme': 4}
+from ..services.npc_service import NPCClockService
 
 
 class NPCViewSet(viewsets.ModelViewSet):
@@ -19,11 +20,76 @@ class NPCViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         user = self.request.user
         qs = NPC.objects.all() if user.is_staff else NPC.objects.filter(Q(creator=user) | Q(campaign__gm=user)).distinct()
+        # Derived stats come from the database with the rows instead of per-object lookups.
+        qs = qs.annotate(**npc_annotations())
         campaign_id = self.request.query_params.get('campaign')
         if campaign_id:
             qs = qs.filter(campaign_id=campaign_id)
         return qs
 
+    # Numbers that take ?<name>=, ?min_<name>= and ?max_<name>=.
+    NUMERIC_FILTERS = ('level',) + tuple(NPC_RULES)
+    ORDERING_FIELDS = ('id', 'name', 'level') + tuple(NPC_RULES) + STAND_STATS
+
+    def filter_queryset(self, queryset):
+        """Filter and sort in SQL.
+
+        ``?faction=3&min_durability=B&ordering=-vulnerability_clock_max,name``: exact
+        ``faction``/``heritage``/``playbook``; ``level`` and the derived stats as a value or a
+        ``min_``/``max_`` bound; Stand Coin grades (``durability=A``, ``min_speed=C``) from
+        ``stand_coin_stats``; ``ordering`` over names, levels, derived stats and grades
+        (best first with ``-``).
+        """
+        queryset = super().filter_queryset(queryset)
+        params = self.request.query_params
+        filters = {}
+        for name in ('faction', 'heritage'):
+            if name in params:
+                filters[f'{name}_id'] = self._int_param(name)
+        if 'playbook' in params:
+            playbook = params['playbook'].upper()
+            if playbook not in dict(NPC.PLAYBOOK_CHOICES):
+                raise ValidationError({'playbook': f'Must be one of {", ".join(dict(NPC.PLAYBOOK_CHOICES))}.'})
+            filters['playbook'] = playbook
+        for name in self.NUMERIC_FILTERS:
+            for prefix, suffix in (('', ''), ('min_', '__gte'), ('max_', '__lte')):
+                if prefix + name in params:
+                    filters[name + suffix] = self._int_param(prefix + name)
+        for stat in STAND_STATS:
+            key = f'stand_coin_stats__{stat.upper()}__in'
+            if stat in params:
+                filters[key] = [self._grade_param(stat)]
+            if f'min_{stat}' in params or f'max_{stat}' in params:
+                low = self._grade_param(f'min_{stat}') if f'min_{stat}' in params else None
+                high = self._grade_param(f'max_{stat}') if f'max_{stat}' in params else None
+                filters[key] = [g for g in grades_between(low, high) if g in filters.get(key, GRADE_POINTS)]
+        queryset = queryset.filter(**filters)
+
+        if params.get('ordering'):
+            ordering = []
+            for term in params['ordering'].split(','):
+                name = term.strip().lstrip('-')
+                if name not in self.ORDERING_FIELDS:
+                    raise ValidationError({'ordering': f'Cannot order by {name!r}'})
+                if name in STAND_STATS:
+                    queryset = queryset.annotate(**{f'{name}_rank': grade_rank(f'stand_coin_stats__{name.upper()}')})
+                    name = f'{name}_rank'
+                ordering.append(('-' if term.strip().startswith('-') else '') + name)
+            queryset = queryset.order_by(*ordering, 'pk')
+        return queryset
+
+    def _int_param(self, name):
+        try:
+            return int(self.request.query_params[name])
+        except ValueError:
+            raise ValidationError({name: 'Must be an integer.'})
+
+    def _grade_param(self, name):
+        grade = self.request.query_params[name].upper()
+        if grade not in GRADE_POINTS:
+            raise ValidationError({name: f'Must be one of {", ".join(GRADE_POINTS)}.'})
+        return grade
+
     def _user_can_edit_npc_clocks(self, request, npc):
         """Only GM (campaign GM or NPC creator) can tick NPC clocks. Players cannot deal harm to NPCs."""
         user = request.user
@@ -48,49 +114,67 @@ class NPCViewSet(viewsets.ModelViewSet):
                 {'error': 'Only the GM (or NPC creator) can apply effect to NPC clocks. Players cannot deal harm to NPCs.'},
                 status=status.HTTP_403_FORBIDDEN
             )
-        effect = (request.data.get('effect') or '').strip().lower()
-        clock_type = (request.data.get('clock_type') or 'vulnerability').strip().lower()
-        if effect not in EFFECT_TO_TICKS:
+        effect, clock_type = self._parse_effect(request.data)
+        try:
+            results = run_write(NPCClockService.apply_effects, [(npc.pk, clock_type, effect)])
+        except ValueError as e:
             return Response(
-                {'error': f'effect must be one of: {", ".join(EFFECT_TO_TICKS)}', 'effect': effect},
+                {'error': str(e), 'effect': effect, 'clock_type': clock_type},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        if clock_type not in ('vulnerability', 'harm'):
+        except NPC.DoesNotExist:
+            return Response({'error': 'NPC not found'}, status=status.HTTP_404_NOT_FOUND)
+        result = results[0]
+        del result['npc_id']
+        return Response(result)
+
+    @action(detail=False, methods=['post'], url_path='apply-effects')
+    def apply_effects(self, request):
+        """
+        GM-only batch form of apply-effect: ``[{"npc_id", "effect", "clock_type"}, ...]`` (or
+        ``{"effects": [...]}``) applied in order in one transaction. All or nothing.
+        """
+        items = request.data.get('effects') if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list) or not items:
             return Response(
-                {'error': 'clock_type must be "vulnerability" or "harm"', 'clock_type': clock_type},
+                {'error': 'Expected a non-empty list of {"npc_id", "effect", "clock_type"} objects'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        ticks = EFFECT_TO_TICKS[effect]
-        if clock_type == 'vulnerability':
-            max_segments = npc.vulnerability_clock_max
-            current = npc.vulnerability_clock_current
-            new_value = min(current + ticks, max_segments)
-            npc.vulnerability_clock_current = new_value
-            npc.save(update_fields=['vulnerability_clock_current'])
-            return Response({
-                'clock_type': 'vulnerability',
-                'effect': effect,
-                'ticks_applied': ticks,
-                'previous': current,
-                'current': new_value,
-                'max': max_segments,
-                'defeated': new_value >= max_segments and max_segments > 0,
-            })
-        else:
-            max_segments = npc.harm_clock_max
-            current = npc.harm_clock_current
-            new_value = min(current + ticks, max_segments)
-            npc.harm_clock_current = new_value
-            npc.save(update_fields=['harm_clock_current'])
-            return Response({
-                'clock_type': 'harm',
-                'effect': effect,
-                'ticks_applied': ticks,
-                'previous': current,
-                'current': new_value,
-                'max': max_segments,
-                'filled': new_value >= max_segments,
-            })
+        effects = []
+        for item in items:
+            try:
+                npc_id = int(item['npc_id'])
+            except (KeyError, TypeError, ValueError):
+                return Response(
+                    {'error': f'Invalid effect {item!r}: npc_id must be an integer'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            effect, clock_type = self._parse_effect(item)
+            effects.append((npc_id, clock_type, effect))
+
+        npc_ids = {npc_id for npc_id, _, _ in effects}
+        npcs = {npc.pk: npc for npc in self.get_queryset().filter(pk__in=npc_ids).select_related('campaign')}
+        missing = sorted(npc_ids - set(npcs))
+        if missing:
+            return Response({'error': 'NPCs not found', 'npc_ids': missing}, status=status.HTTP_404_NOT_FOUND)
+        if not all(self._user_can_edit_npc_clocks(request, npc) for npc in npcs.values()):
+            return Response(
+                {'error': 'Only the GM (or NPC creator) can apply effect to NPC clocks. Players cannot deal harm to NPCs.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        try:
+            results = run_write(NPCClockService.apply_effects, effects)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except NPC.DoesNotExist as e:
+            return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+        return Response(results)
+
+    @staticmethod
+    def _parse_effect(data):
+        effect = (data.get('effect') or '').strip().lower()
+        clock_type = (data.get('clock_type') or 'vulnerability').strip().lower()
+        return effect, clock_type
 
     def perform_create(self, serializer):
         serializer.save(creator=self.request.user) 
\ No newline at end of file
@@ -4,6 +4,7 @@ from rest_framework import viewsets, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from app import sharding
 from ..models import Roll
 from ..serializers import RollSerializer
 
@@ -15,6 +16,8 @@ class RollViewSet(viewsets.ModelViewSet):
     http_method_names = ['get', 'patch', 'head', 'options']
 
     def get_queryset(self):
+        if sharding.enabled():
+            return self._get_sharded_queryset()
         qs = Roll.objects.all().select_related('character', 'session', 'session__campaign')
         campaign_id = self.request.query_params.get('campaign')
         session_id = self.request.query_params.get('session')
@@ -34,6 +37,20 @@ class RollViewSet(viewsets.ModelViewSet):
             ).distinct()
         return qs.order_by('-timestamp')
 
+    def _get_sharded_queryset(self):
+        # Rolls live in the campaign's own database: pick it from the query params (or the id), no joins.
+        campaign_id = sharding.requested_campaign(self.request, Roll, self.kwargs.get('pk'))
+        if campaign_id is None:
+            return Roll.objects.none()
+        qs = Roll.objects.for_campaign(campaign_id).prefetch_related('character')
+        session_id = self.request.query_params.get('session')
+        character_id = self.request.query_params.get('character')
+        if session_id:
+            qs = qs.filter(session_id=session_id)
+        if character_id:
+            qs = qs.filter(character_id=character_id)
+        return qs.order_by('-timestamp')
+
     def partial_update(self, request, *args, **kwargs):
         """GM-only: update position and effect on a roll."""
         roll = self.get_object()
@@ -5,8 +5,13 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.decorators import action
 
-from ..models import Session, SessionEvent
-from ..serializers import SessionSerializer, SessionEventSerializer, SessionRecordsSerializer
+from app import sharding
+from ..models import Session, SessionArchive, SessionEvent
+from ..serializers import (
+    SessionSerializer, SessionEventSerializer, SessionRecordsSerializer, RollSerializer,
+    ChatMessageSerializer, XPHistorySerializer, StressHistorySerializer,
+)
+from ..services.archive_service import SessionArchiveService
 
 
 class IsCampaignGMOrReadOnly(permissions.BasePermission):
@@ -54,7 +59,31 @@ class SessionViewSet(viewsets.ModelViewSet):
         session = self.get_object()
         if session.campaign.gm != self.request.user and not self.request.user.is_staff:
             raise PermissionDenied("Only the GM can update this session")
-        serializer.save()
+        session = serializer.save()
+        # Reopening an archived session brings its records back into the hot tables.
+        if session.status != 'COMPLETED' and SessionArchive.objects.filter(session=session).exists():
+            SessionArchiveService.restore(session)
+
+    @action(detail=True, methods=['get'])
+    def timeline(self, request, pk=None):
+        """Rolls, events, chat, XP and stress changes of the session in chronological order."""
+        session = self.get_object()
+        SessionArchiveService.hydrate(session)
+        entries = []
+        for entry_type, relation, serializer_class in [
+            ('roll', 'rolls', RollSerializer),
+            ('event', 'events', SessionEventSerializer),
+            ('chat', 'session_chat_messages', ChatMessageSerializer),
+            ('xp', 'session_xp_history', XPHistorySerializer),
+            ('stress', 'session_stress_history', StressHistorySerializer),
+        ]:
+            records = list(getattr(session, relation).all())
+            if entry_type == 'roll':
+                models.prefetch_related_objects(records, 'character')
+            for record, data in zip(records, serializer_class(records, many=True).data):
+                entries.append({'type': entry_type, 'timestamp': record.timestamp, 'data': data})
+        entries.sort(key=lambda entry: entry['timestamp'])
+        return Response(entries)
 
     @action(detail=True, methods=['post'], url_path='propose-score')
     def propose_score(self, request, pk=None):
@@ -104,6 +133,13 @@ class SessionEventViewSet(viewsets.ModelViewSet):
     serializer_class = SessionEventSerializer
 
     def get_queryset(self):
+        if sharding.enabled():
+            campaign_id = sharding.requested_campaign(self.request, SessionEvent, self.kwargs.get('pk'))
+            if campaign_id is None:
+                return SessionEvent.objects.none()
+            qs = SessionEvent.objects.for_campaign(campaign_id)
+            session_id = self.request.query_params.get('session')
+            return qs.filter(session_id=session_id) if session_id else qs
         # Filter events based on user permissions
         user = self.request.user
         if user.is_staff:
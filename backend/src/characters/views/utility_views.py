@@ -9,8 +9,9 @@ from django.db.models import Q
 
 from ..models import (
     Character, Campaign, NPC, Crew, Heritage, Vice, Ability,
-    StandAbility, HamonAbility, SpinAbility
+    StandAbility
 )
+from ..ability_index import get_index
 
 
 # Optional root view
@@ -148,13 +149,27 @@ def global_search(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_available_playbook_abilities(request):
-    """Get available abilities for character playbooks."""
+    """Get available abilities for character playbooks.
+
+    With ``a_count`` only the Hamon/Spin abilities a character with that many A-rank Coin
+    stats can take are listed; they are served from the in-memory ability index.
+    """
     heritage_id = request.GET.get('heritage_id')
     if not heritage_id:
         return Response(
             {'error': 'Heritage ID is required'}, 
             status=status.HTTP_400_BAD_REQUEST
         )
+
+    a_count = request.GET.get('a_count')
+    if a_count is not None:
+        try:
+            a_count = int(a_count)
+        except ValueError:
+            return Response(
+                {'error': 'a_count must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
     
     try:
         heritage = Heritage.objects.get(id=heritage_id)
@@ -182,27 +197,17 @@ def get_available_playbook_abilities(request):
             }
             for sa in stand_abilities
         ]
-    elif heritage.name.lower() == 'hamon user':
-        hamon_abilities = HamonAbility.objects.all()
-        abilities['hamon_abilities'] = [
-            {
-                'id': ha.id,
-                'name': ha.name,
-                'description': ha.description,
-                'cost': ha.cost
-            }
-            for ha in hamon_abilities
-        ]
-    elif heritage.name.lower() == 'spin user':
-        spin_abilities = SpinAbility.objects.all()
-        abilities['spin_abilities'] = [
+    elif heritage.name.lower() in ('hamon user', 'spin user'):
+        playbook = 'HAMON' if heritage.name.lower() == 'hamon user' else 'SPIN'
+        abilities[f'{playbook.lower()}_abilities'] = [
             {
-                'id': spa.id,
-                'name': spa.name,
-                'description': spa.description,
-                'cost': spa.cost
+                'id': ability.id,
+                'name': ability.name,
+                'description': ability.description,
+                'required_a_count': ability.required_a_count,
+                'cost': ability.stress_cost
             }
-            for spa in spin_abilities
+            for ability in get_index().available(playbook, a_count)
         ]
     
     return Response(abilities)
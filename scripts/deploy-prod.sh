@@ -51,6 +51,10 @@ python manage.py test
 # Start production server
 echo "🌐 Starting production server..."
 # Use gunicorn for production
+# Workers share one metrics directory so /metrics/ reports totals across all of them
+# Prometheus scrapes /metrics/ with "Authorization: Bearer $METRICS_TOKEN" (set it in the environment)
+export METRICS_MULTIPROC_DIR="${METRICS_MULTIPROC_DIR:-/tmp/jojo_metrics}"
+rm -rf "$METRICS_MULTIPROC_DIR" && mkdir -p "$METRICS_MULTIPROC_DIR"
 gunicorn app.wsgi:application --bind 0.0.0.0:8000 --workers 3 --timeout 120
 
 echo "✅ Deployment complete!"